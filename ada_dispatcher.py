@@ -0,0 +1,257 @@
+# ADA Dispatcher - tenant-affinity routing for multi-worker ADA deployments
+# Runs N single-worker uvicorn processes on loopback ports behind a small
+# dispatcher that pins each tenantId to one worker, so per-tenant in-process
+# caches stay warm instead of being hit 1/N of the time.
+
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple
+import os
+import sys
+import asyncio
+import bisect
+import contextlib
+import hashlib
+import json
+import logging
+import subprocess
+from datetime import datetime
+
+# httpx is only needed to serve the dispatcher app; routing and supervision work without it
+try:
+    import httpx
+    UPSTREAM_ERRORS: tuple = (httpx.HTTPError, OSError)
+    CONNECT_ERRORS: tuple = (httpx.ConnectError, ConnectionRefusedError)
+except ImportError:
+    httpx = None
+    UPSTREAM_ERRORS = (OSError,)
+    CONNECT_ERRORS = (ConnectionRefusedError,)
+
+logger = logging.getLogger(__name__)
+
+ADA_RING_REPLICAS = int(os.getenv("ADA_RING_REPLICAS", "128"))
+ADA_WORKER_BASE_PORT = int(os.getenv("ADA_WORKER_BASE_PORT", "8100"))
+ADA_WORKER_CHECK_SECONDS = float(os.getenv("ADA_WORKER_CHECK_SECONDS", "2.0"))
+
+DISPATCH_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+
+# Connection-scoped headers that must not be relayed; content-length is recomputed
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "content-length"
+}
+
+class ConsistentHashRing:
+    """Consistent hash ring with virtual nodes.
+
+    Adding or removing a node only moves the keys that hashed to that node's
+    arcs, so the remaining workers keep their tenants.
+    """
+
+    def __init__(self, nodes: Optional[List[str]] = None, replicas: int = ADA_RING_REPLICAS):
+        self.replicas = replicas
+        self._hashes: List[int] = []
+        self._owners: Dict[int, str] = {}
+        self.nodes: set = set()
+        for node in nodes or []:
+            self.add(node)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.replicas):
+            h = self._hash(f"{node}#{i}")
+            self._owners[h] = node
+            bisect.insort(self._hashes, h)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        for i in range(self.replicas):
+            h = self._hash(f"{node}#{i}")
+            if self._owners.get(h) == node:
+                del self._owners[h]
+                idx = bisect.bisect_left(self._hashes, h)
+                if idx < len(self._hashes) and self._hashes[idx] == h:
+                    self._hashes.pop(idx)
+
+    def get(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        idx = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._owners[self._hashes[idx]]
+
+def uvicorn_worker_command(port: int) -> List[str]:
+    return [
+        sys.executable, "-m", "uvicorn", "ada_engine:app",
+        "--host", "127.0.0.1",
+        "--port", str(port),
+        "--workers", "1"
+    ]
+
+class WorkerSupervisor:
+    """Spawns ADA worker processes and keeps the hash ring in sync with the live set"""
+
+    def __init__(self, workers: int, base_port: int = ADA_WORKER_BASE_PORT,
+                 command: Callable[[int], List[str]] = uvicorn_worker_command):
+        self.ports = [base_port + i for i in range(workers)]
+        self.command = command
+        self.processes: Dict[int, subprocess.Popen] = {}
+        self.ring = ConsistentHashRing()
+
+    @staticmethod
+    def worker_url(port: int) -> str:
+        return f"http://127.0.0.1:{port}"
+
+    def spawn(self, port: int):
+        self.processes[port] = subprocess.Popen(self.command(port))
+        logger.info(f"Started ADA worker on port {port} (pid {self.processes[port].pid})")
+
+    def start(self):
+        for port in self.ports:
+            self.spawn(port)
+
+    def stop(self):
+        for proc in self.processes.values():
+            proc.terminate()
+        for proc in self.processes.values():
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    async def check_workers(self, client: Any):
+        """One health pass: respawn exited workers, keep only healthy ones on the ring"""
+        for port in self.ports:
+            url = self.worker_url(port)
+            proc = self.processes.get(port)
+            if proc is not None and proc.poll() is not None:
+                logger.warning(f"ADA worker on port {port} exited ({proc.returncode}), restarting")
+                self.ring.remove(url)
+                self.spawn(port)
+                continue
+            try:
+                response = await client.get(f"{url}/health", timeout=1.0)
+                healthy = response.status_code == 200
+            except UPSTREAM_ERRORS:
+                healthy = False
+            if healthy:
+                if url not in self.ring.nodes:
+                    logger.info(f"ADA worker on port {port} is healthy, joining the ring")
+                self.ring.add(url)
+            elif url in self.ring.nodes:
+                logger.warning(f"ADA worker on port {port} failed its health check, leaving the ring")
+                self.ring.remove(url)
+
+    async def monitor(self, client: Any):
+        """Drop dead or unhealthy workers from the ring, respawn them, re-add once healthy"""
+        while True:
+            await self.check_workers(client)
+            await asyncio.sleep(ADA_WORKER_CHECK_SECONDS)
+
+class DispatchError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def tenant_key(headers: Dict[str, str], body: bytes, path: str) -> str:
+    """Routing key: X-Tenant-Id header, then a JSON body's tenantId, then the path"""
+    tenant_id = headers.get("x-tenant-id", "")
+    if not tenant_id and body:
+        try:
+            tenant_id = str(json.loads(body).get("tenantId", ""))
+        except (ValueError, AttributeError):
+            tenant_id = ""
+    return tenant_id or path
+
+def forward_headers(headers: Iterable[Tuple[str, str]], drop: Iterable[str] = ()) -> List[Tuple[str, str]]:
+    """Relayable (name, value) pairs; repeated headers such as set-cookie are kept"""
+    skip = HOP_BY_HOP_HEADERS | {name.lower() for name in drop}
+    return [(k, v) for k, v in headers if k.lower() not in skip]
+
+async def dispatch(ring: ConsistentHashRing, client: Any, method: str, path: str,
+                   params: Any, headers: List[Tuple[str, str]], body: bytes) -> Any:
+    """Send a request to its tenant's worker and return the upstream response.
+
+    A worker that refuses the connection never saw the request, so it leaves the
+    ring and the request fails over to the tenant's next owner; any other
+    transport error is a 502 because the worker may have acted on it.
+    """
+    key = tenant_key({k.lower(): v for k, v in headers}, body, path)
+    request_headers = forward_headers(headers, drop=("host",))
+    while True:
+        target = ring.get(key)
+        if target is None:
+            raise DispatchError(503, "No ADA workers available")
+        try:
+            return await client.request(
+                method,
+                f"{target}/{path}",
+                params=params,
+                content=body,
+                headers=request_headers
+            )
+        except CONNECT_ERRORS as e:
+            logger.warning(f"ADA worker {target} refused connection, failing over: {e}")
+            ring.remove(target)
+        except UPSTREAM_ERRORS as e:
+            ring.remove(target)
+            raise DispatchError(502, f"ADA worker unavailable: {str(e)}")
+
+def create_dispatcher_app(supervisor: WorkerSupervisor):
+    """Build the front-end app that forwards each request to its tenant's worker"""
+    from fastapi import FastAPI, HTTPException, Request, Response
+
+    state: Dict[str, Any] = {}
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: FastAPI):
+        state["client"] = httpx.AsyncClient(timeout=None)
+        supervisor.start()
+        monitor = asyncio.create_task(supervisor.monitor(state["client"]))
+        try:
+            yield
+        finally:
+            monitor.cancel()
+            await state["client"].aclose()
+            supervisor.stop()
+
+    dispatcher = FastAPI(title="DealershipAI ADA Dispatcher", version="1.0.0", lifespan=lifespan)
+
+    @dispatcher.get("/dispatcher/health")
+    async def dispatcher_health():
+        return {
+            "status": "healthy" if supervisor.ring.nodes else "degraded",
+            "workers": sorted(supervisor.ring.nodes),
+            "timestamp": datetime.now().isoformat()
+        }
+
+    @dispatcher.api_route("/{path:path}", methods=DISPATCH_METHODS)
+    async def forward(path: str, request: Request):
+        try:
+            upstream = await dispatch(
+                supervisor.ring,
+                state["client"],
+                request.method,
+                path,
+                request.query_params,
+                list(request.headers.items()),
+                await request.body()
+            )
+        except DispatchError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+        response = Response(content=upstream.content, status_code=upstream.status_code)
+        # httpx has already decoded the body, so its content-encoding no longer applies
+        response.raw_headers.extend(
+            (k.lower().encode("latin-1"), v.encode("latin-1"))
+            for k, v in forward_headers(upstream.headers.multi_items(), drop=("content-encoding",))
+        )
+        return response
+
+    return dispatcher
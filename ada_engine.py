@@ -7,11 +7,13 @@ from pydantic import BaseModel
 from typing import List, Dict, Any, Optional
 import uvicorn
 import os
+import sys
 from datetime import datetime
 import json
 
 # Import our ADA workflow
 from lib.analysis.ada_workflow import run_ada_analysis
+from ada_dispatcher import WorkerSupervisor, create_dispatcher_app
 
 app = FastAPI(
     title="DealershipAI ADA Engine",
@@ -125,10 +127,21 @@ async def metrics():
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(
-        "ada_engine:app",
-        host="0.0.0.0",
-        port=port,
-        workers=2,
-        reload=False
-    )
+    workers = int(os.getenv("ADA_WORKERS", "2"))
+
+    if "--supervise" in sys.argv or os.getenv("ADA_SUPERVISOR", "false").lower() == "true":
+        # Tenant-affinity mode: one dispatcher, N pinned workers
+        uvicorn.run(
+            create_dispatcher_app(WorkerSupervisor(workers)),
+            host="0.0.0.0",
+            port=port,
+            reload=False
+        )
+    else:
+        uvicorn.run(
+            "ada_engine:app",
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            reload=False
+        )
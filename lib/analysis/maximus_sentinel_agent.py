@@ -6,13 +6,25 @@ Continuously monitors live API feeds and triggers corrective actions
 
 import asyncio
 import aiohttp
+import atexit
+import functools
+import hashlib
+import heapq
+import itertools
 import os
 import json
 import logging
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
 from supabase import create_client
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -21,6 +33,86 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Concurrency limits for the monitoring fan-out
+SENTINEL_MAX_CONCURRENCY = int(os.getenv("SENTINEL_MAX_CONCURRENCY", "100"))
+SENTINEL_FEED_CONCURRENCY = {
+    "gbp": int(os.getenv("SENTINEL_GBP_CONCURRENCY", "25")),
+    "pagespeed": int(os.getenv("SENTINEL_PAGESPEED_CONCURRENCY", "10")),
+    "tsm": int(os.getenv("SENTINEL_TSM_CONCURRENCY", "5")),
+    "competitive": int(os.getenv("SENTINEL_COMPETITIVE_CONCURRENCY", "25"))
+}
+
+# Feed cache: fresh for the per-feed TTL, then served stale (while one
+# background refresh runs) for up to SENTINEL_CACHE_STALE_SECONDS more
+SENTINEL_FEED_TTL_SECONDS = {
+    "gbp": float(os.getenv("SENTINEL_GBP_TTL_SECONDS", "600")),
+    "pagespeed": float(os.getenv("SENTINEL_PAGESPEED_TTL_SECONDS", "21600")),
+    "tsm": float(os.getenv("SENTINEL_TSM_TTL_SECONDS", "3600")),
+    "competitive": float(os.getenv("SENTINEL_COMPETITIVE_TTL_SECONDS", "900"))
+}
+SENTINEL_CACHE_STALE_SECONDS = float(os.getenv("SENTINEL_CACHE_STALE_SECONDS", "3600"))
+
+# Event sink: sentinel_events are buffered and bulk-inserted off the event loop
+SENTINEL_EVENT_BATCH_SIZE = int(os.getenv("SENTINEL_EVENT_BATCH_SIZE", "200"))
+SENTINEL_EVENT_FLUSH_SECONDS = float(os.getenv("SENTINEL_EVENT_FLUSH_SECONDS", "5"))
+SENTINEL_EVENT_SPILL_PATH = Path(os.getenv(
+    "SENTINEL_EVENT_SPILL_PATH", str(Path(__file__).parent / "output" / "sentinel_events.spill.ndjson")
+))
+SENTINEL_EVENT_SPILL_MAX_BYTES = int(os.getenv("SENTINEL_EVENT_SPILL_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Alert dispatch: dedup window, digest folding and webhook rate limit
+SENTINEL_ALERT_SUPPRESS_SECONDS = float(os.getenv("SENTINEL_ALERT_SUPPRESS_SECONDS", "3600"))
+SENTINEL_ALERT_DIGEST_MIN = int(os.getenv("SENTINEL_ALERT_DIGEST_MIN", "3"))
+SENTINEL_ALERT_DIGEST_LINES = int(os.getenv("SENTINEL_ALERT_DIGEST_LINES", "20"))
+SENTINEL_WEBHOOK_RATE_PER_SECOND = float(os.getenv("SENTINEL_WEBHOOK_RATE_PER_SECOND", "1"))
+SENTINEL_WEBHOOK_BURST = int(os.getenv("SENTINEL_WEBHOOK_BURST", "5"))
+
+# Adaptive scheduling: per dealer/check intervals between these bounds
+SENTINEL_MIN_INTERVAL_SECONDS = float(os.getenv("SENTINEL_MIN_INTERVAL_SECONDS", "60"))
+SENTINEL_MAX_INTERVAL_SECONDS = float(os.getenv("SENTINEL_MAX_INTERVAL_SECONDS", str(4 * 3600)))
+SENTINEL_SAFETY_FACTOR = float(os.getenv("SENTINEL_SAFETY_FACTOR", "4"))
+SENTINEL_INTERVAL_GROWTH = float(os.getenv("SENTINEL_INTERVAL_GROWTH", "2"))
+SENTINEL_VOLATILITY_ALPHA = float(os.getenv("SENTINEL_VOLATILITY_ALPHA", "0.3"))
+SENTINEL_BREACH_MEMORY_SECONDS = float(os.getenv("SENTINEL_BREACH_MEMORY_SECONDS", "7200"))
+SENTINEL_HOUSEKEEPING_SECONDS = float(os.getenv("SENTINEL_HOUSEKEEPING_SECONDS", "60"))
+
+# Sharding: dealers split across sentinel instances via a shared coordination store
+SENTINEL_SHARDING = os.getenv("SENTINEL_SHARDING", "false").lower() == "true"
+SENTINEL_INSTANCE_ID = os.getenv("SENTINEL_INSTANCE_ID", f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}")
+SENTINEL_COORDINATION_PATH = Path(os.getenv(
+    "SENTINEL_COORDINATION_PATH", str(Path(__file__).parent / "output" / "sentinel_coordination.sqlite3")
+))
+SENTINEL_MEMBER_TTL_SECONDS = float(os.getenv("SENTINEL_MEMBER_TTL_SECONDS", "180"))
+SENTINEL_LEASE_SECONDS = float(os.getenv("SENTINEL_LEASE_SECONDS", "180"))
+# On first join, membership is polled until it stops changing, for at most SENTINEL_JOIN_SECONDS
+SENTINEL_JOIN_SECONDS = float(os.getenv("SENTINEL_JOIN_SECONDS", "5"))
+SENTINEL_JOIN_POLL_SECONDS = float(os.getenv("SENTINEL_JOIN_POLL_SECONDS", "0.5"))
+
+# Upstream resilience: per-feed circuit breakers, jittered retries, optional hedging
+SENTINEL_BREAKER_FAILURES = int(os.getenv("SENTINEL_BREAKER_FAILURES", "5"))
+SENTINEL_BREAKER_RESET_SECONDS = float(os.getenv("SENTINEL_BREAKER_RESET_SECONDS", "60"))
+SENTINEL_RETRY_ATTEMPTS = int(os.getenv("SENTINEL_RETRY_ATTEMPTS", "2"))
+SENTINEL_RETRY_BACKOFF_SECONDS = float(os.getenv("SENTINEL_RETRY_BACKOFF_SECONDS", "0.5"))
+SENTINEL_HEDGE_AFTER_SECONDS = float(os.getenv("SENTINEL_HEDGE_AFTER_SECONDS", "0"))  # 0 disables hedging
+SENTINEL_MOCK_FALLBACK = os.getenv("SENTINEL_MOCK_FALLBACK", "false").lower() == "true"
+
+# Trigger rules are re-read from the spec when the file changes
+ENGINE_SPEC_PATH = Path(os.getenv(
+    "DTRI_SPEC_PATH", str(Path(__file__).resolve().parents[2] / "config" / "DTRI_MAXIMUS_spec.json")
+))
+SENTINEL_SPEC_CHECK_SECONDS = float(os.getenv("SENTINEL_SPEC_CHECK_SECONDS", "5"))
+
+# Breach state: hysteresis and persistence gating for alerts, events and recalibration
+SENTINEL_BREACH_STATE_PATH = Path(os.getenv(
+    "SENTINEL_BREACH_STATE_PATH", str(Path(__file__).parent / "output" / "sentinel_breach_state.sqlite3")
+))
+SENTINEL_HYSTERESIS_BAND = float(os.getenv("SENTINEL_HYSTERESIS_BAND", "0.05"))
+SENTINEL_RECALIBRATION_MIN_BREACHES = int(os.getenv("SENTINEL_RECALIBRATION_MIN_BREACHES", "3"))
+SENTINEL_RECALIBRATION_MIN_SECONDS = float(os.getenv("SENTINEL_RECALIBRATION_MIN_SECONDS", "3600"))
+
+# Process-wide monitoring metrics (see sentinel_metrics())
+_metrics: Dict[str, Any] = {}
+
 # -------- Utilities --------
 def supabase_client():
     """Initialize Supabase client with service role key"""
@@ -30,15 +122,155 @@ def supabase_client():
         raise ValueError("SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set")
     return create_client(url, key)
 
+class EventSink:
+    """Buffered writer for the sentinel_events table.
+
+    log_event only appends to an in-memory buffer; a worker thread turns the
+    buffer into bulk inserts whenever it reaches the batch size or the flush
+    interval elapses, using one Supabase client for the life of the process.
+    Batches the remote rejects (or can't be reached for) are appended to a
+    local NDJSON spill file and replayed, oldest first, on the next flush.
+    Without Supabase credentials events go straight to the spill; it is capped
+    at SENTINEL_EVENT_SPILL_MAX_BYTES, past which new events are dropped.
+    """
+
+    def __init__(self, spill_path: Path = SENTINEL_EVENT_SPILL_PATH,
+                 batch_size: int = SENTINEL_EVENT_BATCH_SIZE, flush_seconds: float = SENTINEL_EVENT_FLUSH_SECONDS,
+                 spill_max_bytes: int = SENTINEL_EVENT_SPILL_MAX_BYTES):
+        self.spill_path = Path(spill_path)
+        self.spill_max_bytes = spill_max_bytes
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self._client = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self.stats = {"enqueued": 0, "written": 0, "spilled": 0, "dropped": 0, "flushes": 0}
+        self._thread = threading.Thread(target=self._run, name="sentinel-event-sink", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, event: Dict[str, Any]):
+        with self._lock:
+            self._buffer.append(event)
+            self.stats["enqueued"] += 1
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> int:
+        """Bulk insert in batch-sized chunks; returns rows accepted before any failure"""
+        written = 0
+        try:
+            if self._client is None:
+                self._client = supabase_client()
+            for start in range(0, len(rows), self.batch_size):
+                chunk = rows[start:start + self.batch_size]
+                self._client.table("sentinel_events").insert(chunk).execute()
+                written += len(chunk)
+        except Exception as e:
+            logger.error(f"Error logging sentinel events ({len(rows) - written} unsent): {e}")
+        return written
+
+    def _read_spill(self) -> List[Dict[str, Any]]:
+        if not self.spill_path.exists():
+            return []
+        with open(self.spill_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def _append_spill(self, rows: List[Dict[str, Any]]) -> int:
+        """Append rows up to the spill size cap; returns rows kept"""
+        self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+        size = self.spill_path.stat().st_size if self.spill_path.exists() else 0
+        lines = []
+        for row in rows:
+            line = json.dumps(row, default=str) + "\n"
+            if size + len(line) > self.spill_max_bytes:
+                break
+            size += len(line)
+            lines.append(line)
+        if len(lines) < len(rows):
+            self.stats["dropped"] += len(rows) - len(lines)
+            logger.error(f"Sentinel event spill {self.spill_path} is full, dropped {len(rows) - len(lines)} events")
+        if lines:
+            with open(self.spill_path, 'a') as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+        return len(lines)
+
+    def flush(self) -> int:
+        """Write buffered (and previously spilled) events; returns rows written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if self._client is None and not (os.getenv("SUPABASE_URL") and os.getenv("SUPABASE_SERVICE_ROLE_KEY")):
+                # No remote to replay to: keep new events on disk without rereading the spill
+                if batch:
+                    self.stats["spilled"] += self._append_spill(batch)
+                return 0
+            spilled = self._read_spill()
+            if not batch and not spilled:
+                return 0
+            self.stats["flushes"] += 1
+            rows = spilled + batch
+            written = self._insert(rows)
+            if written < len(rows):
+                if written == 0:
+                    self.stats["spilled"] += self._append_spill(batch)
+                else:
+                    # Partially accepted: keep only the unsent tail, oldest first
+                    tmp_path = self.spill_path.with_suffix(".tmp")
+                    with open(tmp_path, 'w') as f:
+                        f.writelines(json.dumps(row, default=str) + "\n" for row in rows[written:])
+                    os.replace(tmp_path, self.spill_path)
+                    self.stats["spilled"] += min(len(batch), len(rows) - written)
+                logger.warning(f"{len(rows) - written} sentinel events spilled to {self.spill_path}")
+            elif spilled:
+                self.spill_path.unlink()
+            self.stats["written"] += written
+            if written:
+                logger.info(f"Logged {written} sentinel events")
+            return written
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Event sink flush error: {e}")
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=self.flush_seconds + 5)
+        self.flush()
+
+_event_sink: Optional[EventSink] = None
+_event_sink_lock = threading.Lock()
+
+def event_sink() -> EventSink:
+    """Process-wide sentinel event sink"""
+    global _event_sink
+    with _event_sink_lock:
+        if _event_sink is None:
+            _event_sink = EventSink()
+            atexit.register(_event_sink.close)
+        return _event_sink
+
 def load_engine_spec() -> Dict[str, Any]:
     """Load DTRI-MAXIMUS engine specification"""
-    spec_path = Path(__file__).resolve().parents[2] / "config" / "DTRI_MAXIMUS_spec.json"
+    spec_path = ENGINE_SPEC_PATH
     if not spec_path.exists():
         logger.warning(f"DTRI spec not found at {spec_path}, using defaults")
         return get_default_spec()
     
     with open(spec_path) as f:
-        return json.load(f)
+        spec = json.load(f)
+    return spec
 
 def get_default_spec() -> Dict[str, Any]:
     """Default specification if config file is missing"""
@@ -59,43 +291,163 @@ def get_default_spec() -> Dict[str, Any]:
         }
     }
 
-async def post_alert(title: str, message: str, severity: str = "info", dealer_id: str = None):
-    """Post alert to webhook/Slack"""
-    webhook = os.getenv("SENTINEL_WEBHOOK_URL")
-    if not webhook:
-        logger.info(f"Alert: {severity.upper()} - {title}: {message}")
-        return
-    
-    payload = {
-        "text": f"*{severity.upper()} ALERT:* {title}\n{message}",
-        "username": "MAXIMUS Sentinel",
-        "icon_emoji": ":warning:" if severity == "critical" else ":information_source:"
-    }
-    
-    if dealer_id:
-        payload["text"] += f"\nDealer: {dealer_id}"
-    
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, holding at most `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0:
+            raise ValueError(f"Token bucket rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AlertDispatcher:
+    """Deduplicating, digesting alert sender for the sentinel webhook.
+
+    post_alert only queues. An alert for the same dealer and event type that is
+    already queued, or was sent inside the suppression window, is dropped. flush() (called once per monitoring
+    cycle) folds alerts of the same type and severity into a single digest
+    message when at least SENTINEL_ALERT_DIGEST_MIN dealers are affected, and
+    sends everything over one pooled session, paced by a token bucket.
+    """
+
+    def __init__(self, webhook: Optional[str], suppress_seconds: float = SENTINEL_ALERT_SUPPRESS_SECONDS,
+                 digest_min: int = SENTINEL_ALERT_DIGEST_MIN,
+                 rate_per_second: float = SENTINEL_WEBHOOK_RATE_PER_SECOND, burst: int = SENTINEL_WEBHOOK_BURST):
+        self.webhook = webhook
+        self.suppress_seconds = suppress_seconds
+        self.digest_min = max(2, digest_min)
+        self.bucket = TokenBucket(rate_per_second, burst)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending: List[Dict[str, Any]] = []
+        self._queued: set = set()
+        self._last_sent: Dict[tuple, float] = {}
+        self.stats = {"queued": 0, "suppressed": 0, "digests": 0, "posted": 0, "failed": 0}
+
+    def submit(self, title: str, message: str, severity: str, dealer_id: Optional[str], event_type: Optional[str]):
+        event_type = event_type or title
+        now = time.monotonic()
+        key = (dealer_id, event_type)
+        last = self._last_sent.get(key)
+        if key in self._queued or (last is not None and now - last < self.suppress_seconds):
+            self.stats["suppressed"] += 1
+            return
+        self._queued.add(key)
+        self._pending.append({
+            "title": title, "message": message, "severity": severity,
+            "dealer_id": dealer_id, "event_type": event_type
+        })
+        self.stats["queued"] += 1
+
+    def _payloads(self, alerts: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], List[tuple]]]:
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for alert in alerts:
+            groups.setdefault((alert["event_type"], alert["severity"]), []).append(alert)
+        
+        payloads = []
+        for (_, severity), group in groups.items():
+            icon = ":warning:" if severity == "critical" else ":information_source:"
+            if len(group) < self.digest_min:
+                for alert in group:
+                    text = f"*{severity.upper()} ALERT:* {alert['title']}\n{alert['message']}"
+                    if alert["dealer_id"]:
+                        text += f"\nDealer: {alert['dealer_id']}"
+                    payloads.append(({"text": text, "username": "MAXIMUS Sentinel", "icon_emoji": icon},
+                                     [(alert["dealer_id"], alert["event_type"])]))
+                continue
+            
+            first = group[0]
+            title = first["title"].replace(f" – {first['dealer_id']}", "") if first["dealer_id"] else first["title"]
+            lines = [f"• {a['dealer_id'] or 'global'}: {a['message']}" for a in group[:SENTINEL_ALERT_DIGEST_LINES]]
+            if len(group) > SENTINEL_ALERT_DIGEST_LINES:
+                lines.append(f"…and {len(group) - SENTINEL_ALERT_DIGEST_LINES} more dealers")
+            text = f"*{severity.upper()} ALERT DIGEST:* {title} ({len(group)} dealers)\n" + "\n".join(lines)
+            payloads.append(({"text": text, "username": "MAXIMUS Sentinel", "icon_emoji": icon},
+                             [(a["dealer_id"], a["event_type"]) for a in group]))
+            self.stats["digests"] += 1
+        return payloads
+
+    async def flush(self) -> int:
+        """Send queued alerts (digested); returns webhook posts made"""
+        alerts, self._pending = self._pending, []
+        self._queued.clear()
+        now = time.monotonic()
+        self._last_sent = {key: sent for key, sent in self._last_sent.items()
+                           if now - sent < self.suppress_seconds}
+        if not alerts:
+            return 0
+        
+        payloads = self._payloads(alerts)
+        if not self.webhook:
+            for payload, keys in payloads:
+                logger.info(f"Alert: {payload['text']}")
+                self._last_sent.update(dict.fromkeys(keys, now))
+            return 0
+        
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        posted = 0
+        for payload, keys in payloads:
+            await self.bucket.acquire()
+            try:
+                async with self._session.post(self.webhook, json=payload) as response:
+                    if response.status == 200:
+                        posted += 1
+                        # Only delivered alerts start a suppression window
+                        self._last_sent.update(dict.fromkeys(keys, time.monotonic()))
+                    else:
+                        self.stats["failed"] += 1
+                        logger.error(f"Failed to post alert: {response.status}")
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Error posting alert: {e}")
+        self.stats["posted"] += posted
+        logger.info(f"Posted {posted} webhook messages for {len(alerts)} alerts")
+        return posted
+
+    async def close(self):
+        await self.flush()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+_alert_dispatcher: Optional[AlertDispatcher] = None
+
+def alert_dispatcher() -> AlertDispatcher:
+    """Process-wide alert dispatcher"""
+    global _alert_dispatcher
+    if _alert_dispatcher is None:
+        _alert_dispatcher = AlertDispatcher(os.getenv("SENTINEL_WEBHOOK_URL"))
+    return _alert_dispatcher
+
+async def post_alert(title: str, message: str, severity: str = "info", dealer_id: str = None,
+                     event_type: str = None):
+    """Queue alert for the webhook/Slack (deduplicated and digested by the alert dispatcher)"""
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(webhook, json=payload) as response:
-                if response.status == 200:
-                    logger.info(f"Alert posted successfully: {title}")
-                else:
-                    logger.error(f"Failed to post alert: {response.status}")
+        alert_dispatcher().submit(title, message, severity, dealer_id, event_type)
     except Exception as e:
         logger.error(f"Error posting alert: {e}")
 
 async def log_event(event: Dict[str, Any]):
-    """Log event to Supabase sentinel_events table"""
+    """Queue event for the Supabase sentinel_events table (bulk-written by the event sink)"""
     try:
-        sb = supabase_client()
-        result = sb.table("sentinel_events").insert(event).execute()
+        event_sink().enqueue(event)
         logger.info(f"Event logged: {event['event_type']} for {event['dealer_id']}")
-        return result
     except Exception as e:
         logger.error(f"Error logging event: {e}")
 
-async def trigger_beta_recalibration():
+async def trigger_beta_recalibration() -> bool:
     """Trigger β-recalibration if pattern persists"""
     try:
         recalibrate_url = os.getenv("APP_BASE_URL", "http://localhost:3000") + "/api/beta/recalibrate"
@@ -103,26 +455,264 @@ async def trigger_beta_recalibration():
             async with session.post(recalibrate_url) as response:
                 if response.status == 200:
                     logger.info("Beta recalibration triggered")
-                else:
-                    logger.warning(f"Beta recalibration failed: {response.status}")
+                    return True
+                logger.warning(f"Beta recalibration failed: {response.status}")
     except Exception as e:
         logger.error(f"Error triggering beta recalibration: {e}")
+    return False
+
+# -------- Feed Cache --------
+class FeedCache:
+    """TTL cache for feed pulls with in-flight deduplication.
+
+    Concurrent callers asking for the same (feed, key) share one request.
+    Entries older than the feed TTL but inside the stale window are returned
+    immediately while a single background refresh replaces them. A caller
+    passing ``max_age`` below the TTL (a pair re-checked faster than the feed
+    is cached) gets nothing older than that, and never a stale entry.
+    """
+
+    def __init__(self, ttls: Dict[str, float], stale_seconds: float):
+        self.ttls = ttls
+        self.stale_seconds = stale_seconds
+        self._entries: Dict[tuple, tuple] = {}
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    async def get(self, feed: str, key: tuple, fetch, max_age: Optional[float] = None) -> Any:
+        cache_key = (feed,) + key
+        stats = self._stats.setdefault(feed, {"hits": 0, "stale_hits": 0, "coalesced": 0, "misses": 0})
+        ttl = self.ttls.get(feed, 0)
+        stale_seconds = self.stale_seconds
+        if max_age is not None and max_age < ttl:
+            ttl, stale_seconds = max_age, 0.0
+        entry = self._entries.get(cache_key)
+        
+        if entry and ttl > 0:
+            age = time.monotonic() - entry[0]
+            if age < ttl:
+                stats["hits"] += 1
+                return entry[1]
+            if age < ttl + stale_seconds:
+                stats["stale_hits"] += 1
+                if cache_key not in self._inflight:
+                    self._start_fetch(cache_key, fetch)
+                return entry[1]
+        
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            stats["coalesced"] += 1
+        else:
+            stats["misses"] += 1
+            task = self._start_fetch(cache_key, fetch)
+        # Shielded so one cancelled caller doesn't cancel the shared request
+        result = await asyncio.shield(task)
+        if feed_status(result) != "ok" and entry:
+            # Upstream failed: hand back the last good value, flagged so triggers skip it
+            return dict(entry[1], feed_status="stale", feed_age_seconds=round(time.monotonic() - entry[0], 1))
+        return result
+
+    def _start_fetch(self, cache_key: tuple, fetch) -> asyncio.Task:
+        task = asyncio.ensure_future(fetch())
+        self._inflight[cache_key] = task
+        
+        def store(done: asyncio.Task):
+            self._inflight.pop(cache_key, None)
+            if not done.cancelled() and done.exception() is None and feed_status(done.result()) == "ok":
+                self._entries[cache_key] = (time.monotonic(), done.result())
+        
+        task.add_done_callback(store)
+        return task
+
+    async def drain(self):
+        """Wait for background refreshes and drop entries past their stale window"""
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight.values()), return_exceptions=True)
+        self.purge()
+
+    def purge(self):
+        """Drop entries past their stale window"""
+        now = time.monotonic()
+        expired = [k for k, (stored_at, _) in self._entries.items()
+                   if now - stored_at >= self.ttls.get(k[0], 0) + self.stale_seconds]
+        for k in expired:
+            del self._entries[k]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        report = {}
+        for feed, counts in self._stats.items():
+            total = sum(counts.values())
+            served = counts["hits"] + counts["stale_hits"] + counts["coalesced"]
+            report[feed] = dict(counts, requests=total, hit_ratio=round(served / total, 4) if total else 0.0)
+        return report
+
+_feed_cache: Optional[FeedCache] = None
+
+def feed_cache() -> FeedCache:
+    """Process-wide feed cache"""
+    global _feed_cache
+    if _feed_cache is None:
+        _feed_cache = FeedCache(SENTINEL_FEED_TTL_SECONDS, SENTINEL_CACHE_STALE_SECONDS)
+    return _feed_cache
+
+def cached_feed(feed: str):
+    """Serve a feed puller through the feed cache, keyed by its non-session arguments"""
+    def decorator(fetch):
+        @functools.wraps(fetch)
+        async def wrapper(session: aiohttp.ClientSession, *args, max_age: Optional[float] = None):
+            return await feed_cache().get(feed, args, lambda: fetch(session, *args), max_age)
+        return wrapper
+    return decorator
+
+# -------- Upstream Resilience --------
+class CircuitBreaker:
+    """Per-upstream breaker: opens after consecutive failed calls, then lets one trial call through"""
+
+    def __init__(self, failure_threshold: int = SENTINEL_BREAKER_FAILURES,
+                 reset_seconds: float = SENTINEL_BREAKER_RESET_SECONDS):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {"calls": 0, "failures": 0, "short_circuited": 0, "retries": 0, "hedges": 0, "opened": 0}
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = "half_open"
+            return True
+        return False
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        self.stats["failures"] += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.stats["opened"] += 1
+                logger.warning(f"Circuit opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.stats, state=self.state, consecutive_failures=self.failures)
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+def circuit_breaker(feed: str) -> CircuitBreaker:
+    """Process-wide breaker for one upstream feed"""
+    if feed not in _circuit_breakers:
+        _circuit_breakers[feed] = CircuitBreaker()
+    return _circuit_breakers[feed]
+
+class UpstreamStatusError(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retryable = status == 429 or status >= 500
+
+def feed_status(data: Any) -> str:
+    """'ok', 'stale' (last good value served while the upstream fails), 'unavailable' or 'mock'"""
+    return data.get("feed_status", "ok") if isinstance(data, dict) else "ok"
+
+def feed_usable(data: Dict[str, Any]) -> bool:
+    """Whether trigger checks may evaluate this feed result"""
+    return feed_status(data) == "ok" or (SENTINEL_MOCK_FALLBACK and feed_status(data) == "mock")
+
+async def _get_json(session: aiohttp.ClientSession, url: str, timeout: float) -> Dict[str, Any]:
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as r:
+        if r.status == 200:
+            return await r.json()
+        raise UpstreamStatusError(r.status)
+
+async def _hedged_get_json(session: aiohttp.ClientSession, url: str, timeout: float, breaker: CircuitBreaker) -> Dict[str, Any]:
+    """GET, sending a second identical request if the first is slower than SENTINEL_HEDGE_AFTER_SECONDS"""
+    if SENTINEL_HEDGE_AFTER_SECONDS <= 0:
+        return await _get_json(session, url, timeout)
+    
+    pending = {asyncio.ensure_future(_get_json(session, url, timeout))}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=SENTINEL_HEDGE_AFTER_SECONDS)
+        if not done:
+            breaker.stats["hedges"] += 1
+            pending.add(asyncio.ensure_future(_get_json(session, url, timeout)))
+        error: Optional[BaseException] = None
+        while True:
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+            if not pending:
+                raise error
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def fetch_feed(session: aiohttp.ClientSession, feed: str, url: str, timeout: float,
+                     mock=None) -> Dict[str, Any]:
+    """GET a feed through its circuit breaker with jittered-backoff retries.
+
+    Failures return {"feed_status": "unavailable"} (or mock data flagged "mock"
+    when SENTINEL_MOCK_FALLBACK is set) instead of raising; an open circuit
+    fails immediately without touching the network.
+    """
+    breaker = circuit_breaker(feed)
+    breaker.stats["calls"] += 1
+    if not breaker.allow():
+        breaker.stats["short_circuited"] += 1
+        return _feed_unavailable(feed, "circuit open", mock)
+    
+    # The half-open trial must settle the breaker even if this call is cancelled
+    trial = breaker.state == "half_open"
+    settled = False
+    try:
+        error: Optional[Exception] = None
+        for attempt in range(max(1, SENTINEL_RETRY_ATTEMPTS)):
+            if attempt:
+                breaker.stats["retries"] += 1
+                # Full jitter keeps retries from many dealers from arriving in lockstep
+                await asyncio.sleep(random.uniform(0, SENTINEL_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)))
+            try:
+                data = await _hedged_get_json(session, url, timeout, breaker)
+                settled = True
+                breaker.record_success()
+                return data
+            except UpstreamStatusError as e:
+                error = e
+                if not e.retryable:
+                    # The upstream answered; the request itself is bad
+                    settled = True
+                    breaker.record_success()
+                    return _feed_unavailable(feed, str(e), mock)
+            except Exception as e:
+                error = e
+        
+        settled = True
+        breaker.record_failure()
+        return _feed_unavailable(feed, str(error) or type(error).__name__, mock)
+    finally:
+        if trial and not settled:
+            breaker.record_failure()
+
+def _feed_unavailable(feed: str, reason: str, mock=None) -> Dict[str, Any]:
+    logger.warning(f"{feed} feed unavailable: {reason}")
+    if SENTINEL_MOCK_FALLBACK and mock is not None:
+        return dict(mock(), feed_status="mock")
+    return {"feed_status": "unavailable", "feed_error": reason}
 
 # -------- Feed Pullers --------
+@cached_feed("gbp")
 async def fetch_gbp_review_metrics(session: aiohttp.ClientSession, dealer_id: str) -> Dict[str, Any]:
     """Fetch Google Business Profile review metrics"""
-    try:
-        # Mock implementation - replace with actual GBP API
-        url = f"https://api.example-gbp.com/reviews?dealer={dealer_id}"
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as r:
-            if r.status == 200:
-                return await r.json()
-            else:
-                logger.warning(f"GBP API returned {r.status} for {dealer_id}")
-                return get_mock_review_data()
-    except Exception as e:
-        logger.error(f"Error fetching GBP data for {dealer_id}: {e}")
-        return get_mock_review_data()
+    # Mock implementation - replace with actual GBP API
+    url = f"https://api.example-gbp.com/reviews?dealer={dealer_id}"
+    return await fetch_feed(session, "gbp", url, 10, get_mock_review_data)
 
 def get_mock_review_data() -> Dict[str, Any]:
     """Mock review data for testing"""
@@ -134,20 +724,12 @@ def get_mock_review_data() -> Dict[str, Any]:
         "rating": 4.2
     }
 
+@cached_feed("pagespeed")
 async def fetch_pagespeed(session: aiohttp.ClientSession, domain: str) -> Dict[str, Any]:
     """Fetch PageSpeed Insights data"""
-    try:
-        # Mock implementation - replace with actual PageSpeed API
-        url = f"https://www.googleapis.com/pagespeedonline/v5/runPagespeed?url={domain}"
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as r:
-            if r.status == 200:
-                return await r.json()
-            else:
-                logger.warning(f"PageSpeed API returned {r.status} for {domain}")
-                return get_mock_pagespeed_data()
-    except Exception as e:
-        logger.error(f"Error fetching PageSpeed data for {domain}: {e}")
-        return get_mock_pagespeed_data()
+    # Mock implementation - replace with actual PageSpeed API
+    url = f"https://www.googleapis.com/pagespeedonline/v5/runPagespeed?url={domain}"
+    return await fetch_feed(session, "pagespeed", url, 15, get_mock_pagespeed_data)
 
 def get_mock_pagespeed_data() -> Dict[str, Any]:
     """Mock PageSpeed data for testing"""
@@ -167,20 +749,11 @@ def get_mock_pagespeed_data() -> Dict[str, Any]:
         }
     }
 
+@cached_feed("tsm")
 async def fetch_tsm_external(session: aiohttp.ClientSession) -> Dict[str, Any]:
     """Fetch external TSM (Trust Sensitivity Multiplier) data"""
-    try:
-        # Mock economic API - replace with actual economic data source
-        async with session.get("https://api.economyfeeds.com/tsm_index", 
-                              timeout=aiohttp.ClientTimeout(total=10)) as r:
-            if r.status == 200:
-                return await r.json()
-            else:
-                logger.warning("TSM API unavailable, using default")
-                return get_mock_tsm_data()
-    except Exception as e:
-        logger.error(f"Error fetching TSM data: {e}")
-        return get_mock_tsm_data()
+    # Mock economic API - replace with actual economic data source
+    return await fetch_feed(session, "tsm", "https://api.economyfeeds.com/tsm_index", 10, get_mock_tsm_data)
 
 def get_mock_tsm_data() -> Dict[str, Any]:
     """Mock TSM data for testing"""
@@ -191,20 +764,12 @@ def get_mock_tsm_data() -> Dict[str, Any]:
         "last_updated": datetime.utcnow().isoformat()
     }
 
+@cached_feed("competitive")
 async def fetch_competitive_dtri(session: aiohttp.ClientSession, dealer_id: str) -> Dict[str, Any]:
     """Fetch competitive DTRI delta data"""
-    try:
-        # Mock competitive intelligence API
-        url = f"https://api.dealershipai.yourdomain.com/competitors/dtri?dealer={dealer_id}"
-        async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as r:
-            if r.status == 200:
-                return await r.json()
-            else:
-                logger.warning(f"Competitive API returned {r.status} for {dealer_id}")
-                return get_mock_competitive_data()
-    except Exception as e:
-        logger.error(f"Error fetching competitive data for {dealer_id}: {e}")
-        return get_mock_competitive_data()
+    # Mock competitive intelligence API
+    url = f"https://api.dealershipai.yourdomain.com/competitors/dtri?dealer={dealer_id}"
+    return await fetch_feed(session, "competitive", url, 10, get_mock_competitive_data)
 
 def get_mock_competitive_data() -> Dict[str, Any]:
     """Mock competitive data for testing"""
@@ -216,175 +781,824 @@ def get_mock_competitive_data() -> Dict[str, Any]:
         "last_updated": datetime.utcnow().isoformat()
     }
 
-# -------- Sentinel Logic --------
-async def sentinel_monitor():
-    """Main sentinel monitoring loop"""
-    logger.info("Starting MAXIMUS Sentinel monitoring cycle")
-    
-    spec = load_engine_spec()
-    triggers = spec["V_AGENTIC_AND_AUTONOMOUS_LOGIC"]["AUTONOMOUS_TRIGGERS"]
-    
-    # Get dealer list from environment or use defaults
-    dealers_env = os.getenv("MONITORED_DEALERS", "toyota-naples,fort-myers-honda")
-    dealers = [d.strip() for d in dealers_env.split(",")]
-    
-    logger.info(f"Monitoring {len(dealers)} dealers: {dealers}")
-    
-    async with aiohttp.ClientSession() as session:
-        for dealer in dealers:
-            logger.info(f"Checking dealer: {dealer}")
-            
-            try:
-                # 1️⃣ Review velocity & sentiment
-                await check_review_metrics(session, dealer, triggers)
-                
-                # 2️⃣ PageSpeed (VDP Experience)
-                await check_pagespeed_metrics(session, dealer, triggers)
-                
-                # 3️⃣ Economic TSM monitor
-                await check_tsm_metrics(session, dealer, triggers)
-                
-                # 4️⃣ Competitive DTRI delta
-                await check_competitive_metrics(session, dealer, triggers)
-                
-            except Exception as e:
-                logger.error(f"Error monitoring dealer {dealer}: {e}")
+# -------- Trigger Rules --------
+TRIGGER_OPERATORS = {">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal}
+
+def _lookup(data: Any, path: tuple) -> Any:
+    for part in path:
+        if not isinstance(data, dict) or part not in data:
+            return None
+        data = data[part]
+    return data
+
+def _render(template: str, fields: Dict[str, Any]) -> str:
+    try:
+        return template.format_map(fields)
+    except (KeyError, ValueError, IndexError, TypeError):
+        return template
+
+class TriggerEngine:
+    """Spec-declared trigger rules compiled into one vectorized evaluator.
+
+    Every distinct (feed, metric path) the rules read becomes a column of a
+    dealers x metrics matrix, and every condition a (column, operator,
+    threshold) leaf. evaluate() fills the matrix from the fetched feed payloads,
+    compares all leaves for the whole fleet at once and folds them up the
+    all/any trees, yielding breach flags and a relative headroom (distance to
+    the threshold; an "all" is as far as its farthest condition, an "any" as
+    near as its nearest) per dealer and rule.
+    """
+
+    def __init__(self, rules: List[Dict[str, Any]], thresholds: Dict[str, Any]):
+        self.thresholds = dict(thresholds)
+        self.rules: List[Dict[str, Any]] = []
+        self.columns: List[tuple] = []  # (feed, path, scale, default)
+        self._column_index: Dict[tuple, int] = {}
+        leaves: List[tuple] = []         # (column, op, threshold)
+        
+        for rule in rules:
+            if "id" not in rule or "when" not in rule:
+                raise ValueError(f"Trigger rule needs 'id' and 'when': {rule}")
+            feed = rule.get("feed")
+            if feed not in FEED_FETCHERS:
+                raise ValueError(f"Trigger rule {rule['id']} uses unknown feed {feed!r}")
+            aliases: Dict[str, int] = {}
+            tree = self._compile(rule["when"], feed, leaves, aliases, rule["id"])
+            metric_value = rule.get("metric_value")
+            if metric_value is not None and metric_value not in aliases:
+                raise ValueError(f"Trigger rule {rule['id']} metric_value {metric_value!r} is not one of its metrics")
+            self.rules.append(dict(rule, tree=tree, aliases=aliases))
+        
+        self.feeds = sorted({rule["feed"] for rule in self.rules})
+        self._feed_index = {feed: i for i, feed in enumerate(self.feeds)}
+        self._leaf_columns = np.array([leaf[0] for leaf in leaves], dtype=np.intp)
+        self._leaf_thresholds = np.array([leaf[2] for leaf in leaves], dtype=float)
+        self._leaf_ops = np.array([leaf[1] for leaf in leaves])
+        # Headroom is (threshold - value) for upper bounds and (value - threshold) for lower bounds
+        self._leaf_sign = np.where(np.isin(self._leaf_ops, [">", ">="]), 1.0, -1.0)
+        scale = np.abs(self._leaf_thresholds)
+        self._leaf_scale = np.where(scale > 0, scale, 1.0)
+        self._rule_feeds = np.array([self._feed_index[rule["feed"]] for rule in self.rules], dtype=np.intp)
+
+    def _compile(self, node: Dict[str, Any], feed: str, leaves: List[tuple], aliases: Dict[str, int], rule_id: str):
+        for combinator in ("all", "any"):
+            if combinator in node:
+                children = node[combinator]
+                if not children:
+                    raise ValueError(f"Trigger rule {rule_id} has an empty '{combinator}'")
+                return (combinator, [self._compile(child, feed, leaves, aliases, rule_id) for child in children])
+        
+        op = node.get("op")
+        if op not in TRIGGER_OPERATORS:
+            raise ValueError(f"Trigger rule {rule_id} has unsupported operator {op!r}")
+        threshold = node.get("threshold")
+        if isinstance(threshold, str):
+            if threshold not in self.thresholds:
+                raise ValueError(f"Trigger rule {rule_id} references unknown threshold {threshold!r}")
+            threshold = self.thresholds[threshold]
+        path = tuple(str(node["metric"]).split("."))
+        key = (feed, path, float(node.get("scale", 1.0)), node.get("default"))
+        if key not in self._column_index:
+            self._column_index[key] = len(self.columns)
+            self.columns.append(key)
+        aliases[node.get("as", path[-1])] = self._column_index[key]
+        leaves.append((self._column_index[key], op, float(threshold)))
+        return ("leaf", len(leaves) - 1)
+
+    def matrix(self, results: Dict[str, List[Any]], n_dealers: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(dealers x metrics values, dealers x feeds availability) from fetched payloads"""
+        values = np.full((n_dealers, len(self.columns)), np.nan)
+        available = np.zeros((n_dealers, len(self.feeds)), dtype=bool)
+        for feed, f in self._feed_index.items():
+            payloads = results.get(feed)
+            if payloads is None:
                 continue
-    
-    logger.info("Sentinel monitoring cycle complete")
+            columns = [(c, path, scale, default) for c, (col_feed, path, scale, default) in enumerate(self.columns)
+                       if col_feed == feed]
+            for i, data in enumerate(payloads):
+                if data is None or not feed_usable(data):
+                    continue
+                available[i, f] = True
+                for c, path, scale, default in columns:
+                    value = _lookup(data, path)
+                    if value is None:
+                        value = default
+                    try:
+                        values[i, c] = float(value) * scale
+                    except (TypeError, ValueError):
+                        pass
+        return values, available
 
-async def check_review_metrics(session: aiohttp.ClientSession, dealer: str, triggers: Dict[str, Any]):
-    """Check review response metrics"""
-    review_data = await fetch_gbp_review_metrics(session, dealer)
-    review_velocity = review_data.get("velocity", 1.0)
-    avg_resp_time = review_data.get("avg_response_time", 0)
-    
-    threshold_time = triggers.get("REVIEW_CRISIS_THRESHOLD", 4.0)
-    threshold_velocity = triggers.get("REVIEW_VELOCITY_THRESHOLD", 0.85)
-    
-    if avg_resp_time > threshold_time and review_velocity < threshold_velocity:
-        message = f"Average response time is {avg_resp_time}h, velocity={review_velocity}. Triggering CRISIS SOW."
+    def evaluate(self, results: Dict[str, List[Any]], n_dealers: int) -> Dict[str, np.ndarray]:
+        """Evaluate every rule for every dealer in one pass"""
+        values, available = self.matrix(results, n_dealers)
+        leaf_values = values[:, self._leaf_columns]
+        leaf_breach = np.zeros(leaf_values.shape, dtype=bool)
+        with np.errstate(invalid="ignore"):
+            for op, compare in TRIGGER_OPERATORS.items():
+                mask = self._leaf_ops == op
+                if mask.any():
+                    leaf_breach[:, mask] = compare(leaf_values[:, mask], self._leaf_thresholds[mask])
+        leaf_headroom = self._leaf_sign * (self._leaf_thresholds - leaf_values) / self._leaf_scale
         
-        await post_alert(
-            f"Review Response Lag – {dealer}",
-            message,
-            severity="critical",
-            dealer_id=dealer
-        )
+        def fold(node):
+            kind, body = node
+            if kind == "leaf":
+                return leaf_breach[:, body], leaf_headroom[:, body]
+            parts = [fold(child) for child in body]
+            breaches = np.stack([p[0] for p in parts])
+            headrooms = np.stack([p[1] for p in parts])
+            if kind == "all":
+                return breaches.all(axis=0), np.fmax.reduce(headrooms, axis=0)
+            return breaches.any(axis=0), np.fmin.reduce(headrooms, axis=0)
         
-        await log_event({
-            "dealer_id": dealer,
-            "event_type": "REVIEW_CRISIS_SOW",
-            "metric_value": avg_resp_time,
-            "timestamp": datetime.utcnow().isoformat(),
-            "description": f"Response time {avg_resp_time}h exceeds {threshold_time}h threshold"
-        })
+        folded = [fold(rule["tree"]) for rule in self.rules]
+        evaluated = available[:, self._rule_feeds] if self.rules else np.zeros((n_dealers, 0), dtype=bool)
+        breached = np.stack([f[0] for f in folded], axis=1) if folded else evaluated.copy()
+        headroom = np.stack([f[1] for f in folded], axis=1) if folded else np.zeros((n_dealers, 0))
+        return {
+            "values": values,
+            "evaluated": evaluated,
+            "breached": breached & evaluated,
+            "headroom": np.where(evaluated, headroom, np.nan)
+        }
 
-async def check_pagespeed_metrics(session: aiohttp.ClientSession, dealer: str, triggers: Dict[str, Any]):
-    """Check PageSpeed metrics"""
-    ps_data = await fetch_pagespeed(session, f"https://{dealer}.com")
-    lcp_audit = ps_data.get("lighthouseResult", {}).get("audits", {}).get("largest-contentful-paint", {})
-    lcp = lcp_audit.get("numericValue", 0) / 1000  # Convert to seconds
-    
-    threshold = triggers.get("VDP_SPEED_THRESHOLD", 3.0)
+    def rule_values(self, rule: Dict[str, Any], values: np.ndarray, row: int) -> Dict[str, float]:
+        return {alias: float(values[row, column]) for alias, column in rule["aliases"].items()}
+
+_trigger_engine: Optional[TriggerEngine] = None
+_trigger_spec_mtime: Optional[int] = None
+_trigger_checked_at = float('-inf')
+
+def compile_triggers(spec: Dict[str, Any]) -> TriggerEngine:
+    """Compile the spec's TRIGGER_RULES; the rules live only in the spec file.
+
+    Thresholds may name an AUTONOMOUS_TRIGGERS key; "when" nests {"all": [...]} /
+    {"any": [...]} around {"metric": <dot path into the feed payload>, "op",
+    "threshold"} conditions.
+    """
+    logic = spec.get("V_AGENTIC_AND_AUTONOMOUS_LOGIC")
+    if not isinstance(logic, dict) or "TRIGGER_RULES" not in logic:
+        raise ValueError("DTRI spec has no V_AGENTIC_AND_AUTONOMOUS_LOGIC.TRIGGER_RULES")
+    return TriggerEngine(logic["TRIGGER_RULES"], logic.get("AUTONOMOUS_TRIGGERS", {}))
+
+def trigger_engine() -> TriggerEngine:
+    """Compiled trigger rules, recompiled whenever the spec file changes.
+
+    The spec's mtime is checked at most every SENTINEL_SPEC_CHECK_SECONDS; a
+    spec that fails to compile is logged and the previous rules stay active.
+    With no previous rules to fall back on the error is raised.
+    """
+    global _trigger_engine, _trigger_spec_mtime, _trigger_checked_at
+    now = time.monotonic()
+    if _trigger_engine is not None and now - _trigger_checked_at < SENTINEL_SPEC_CHECK_SECONDS:
+        return _trigger_engine
+    _trigger_checked_at = now
     
-    if lcp > threshold:
-        message = f"LCP={lcp:.1f}s exceeds {threshold}s threshold. Triggering optimization SOW."
-        
-        await post_alert(
-            f"VDP Speed Violation – {dealer}",
-            message,
-            severity="warning",
-            dealer_id=dealer
+    mtime = ENGINE_SPEC_PATH.stat().st_mtime_ns if ENGINE_SPEC_PATH.exists() else None
+    if _trigger_engine is None or mtime != _trigger_spec_mtime:
+        try:
+            engine = compile_triggers(load_engine_spec())
+            if _trigger_engine is not None:
+                logger.info(f"DTRI spec changed, reloaded {len(engine.rules)} trigger rules")
+            _trigger_engine = engine
+        except Exception as e:
+            logger.error(f"Error compiling trigger rules from {ENGINE_SPEC_PATH}: {e}")
+            if _trigger_engine is None:
+                raise
+        _trigger_spec_mtime = mtime
+    return _trigger_engine
+
+# -------- Breach State --------
+class BreachStateStore:
+    """Persistent breach episodes per (dealer, trigger rule), kept in local SQLite.
+
+    A rule enters the breached state the first time it fires and only clears
+    once its headroom is back beyond the rule's clear band ("clear_band",
+    default SENTINEL_HYSTERESIS_BAND), so a metric hovering at the threshold
+    doesn't flap. observe() returns just the transitions; callers alert and log
+    on those instead of on every breached reading.
+    """
+
+    COLUMNS = ("dealer_id", "rule_id", "breached", "first_breach_at", "consecutive",
+               "last_breach_at", "last_clear_at", "recalibrated")
+
+    def __init__(self, path: Path = SENTINEL_BREACH_STATE_PATH):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS breach_state (dealer_id TEXT NOT NULL, rule_id TEXT NOT NULL, "
+            "breached INTEGER NOT NULL, first_breach_at TEXT, consecutive INTEGER NOT NULL DEFAULT 0, "
+            "last_breach_at TEXT, last_clear_at TEXT, recalibrated INTEGER NOT NULL DEFAULT 0, "
+            "PRIMARY KEY (dealer_id, rule_id))"
         )
+        self._conn.commit()
+        # Dealers whose rows are cached; None until track() narrows it to a shard
+        self._dealers: Optional[set] = None
+        self._states: Dict[tuple, Dict[str, Any]] = self._load()
+        self.stats = {"entered": 0, "cleared": 0, "held_in_band": 0, "recalibrations": 0}
+
+    def _load(self, dealers: Optional[List[str]] = None) -> Dict[tuple, Dict[str, Any]]:
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM breach_state"
+        if dealers is None:
+            rows = self._conn.execute(query).fetchall()
+        else:
+            rows = []
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(dealers), 500):
+                chunk = dealers[i:i + 500]
+                rows += self._conn.execute(
+                    f"{query} WHERE dealer_id IN ({', '.join('?' for _ in chunk)})", chunk
+                ).fetchall()
+        return {(row[0], row[1]): dict(zip(self.COLUMNS, row)) for row in rows}
+
+    def track(self, dealers: List[str]):
+        """Follow shard ownership: reload rows of newly acquired dealers, drop released ones.
+
+        Another instance may have advanced a dealer's episodes while it owned
+        it, so cached rows are only trusted while this instance keeps the dealer.
+        """
+        owned = set(dealers)
+        acquired = owned if self._dealers is None else owned - self._dealers
+        self._states = {key: state for key, state in self._states.items() if key[0] in owned}
+        if acquired:
+            self._states.update(self._load(sorted(acquired)))
+        self._dealers = owned
+
+    def is_breached(self, dealer: str, rule_id: str) -> bool:
+        state = self._states.get((dealer, rule_id))
+        return bool(state and state["breached"])
+
+    def _save(self, states: List[Dict[str, Any]]):
+        if not states:
+            return
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO breach_state ({', '.join(self.COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in self.COLUMNS)})",
+            [tuple(state[c] for c in self.COLUMNS) for state in states]
+        )
+        self._conn.commit()
+
+    def observe(self, observations: List[tuple]) -> List[tuple]:
+        """Apply (dealer, rule_id, breached, headroom, clear_band) readings; returns (kind, state) transitions"""
+        now = datetime.utcnow().isoformat()
+        changed, transitions = [], []
+        for dealer, rule_id, breached, headroom, clear_band in observations:
+            state = self._states.get((dealer, rule_id))
+            if breached:
+                if state and state["breached"]:
+                    state["consecutive"] += 1
+                    state["last_breach_at"] = now
+                else:
+                    state = dict(state or {"dealer_id": dealer, "rule_id": rule_id, "last_clear_at": None},
+                                 breached=1, first_breach_at=now, consecutive=1, last_breach_at=now, recalibrated=0)
+                    self._states[(dealer, rule_id)] = state
+                    transitions.append(("breached", state))
+                    self.stats["entered"] += 1
+                changed.append(state)
+            elif state and state["breached"]:
+                if headroom is not None and headroom >= clear_band:
+                    state.update(breached=0, consecutive=0, last_clear_at=now)
+                    transitions.append(("cleared", state))
+                    self.stats["cleared"] += 1
+                    changed.append(state)
+                else:
+                    self.stats["held_in_band"] += 1
+        self._save(changed)
+        return transitions
+
+    def persistent(self, min_breaches: int, min_seconds: float) -> List[Dict[str, Any]]:
+        """Ongoing breach episodes that persisted long enough and haven't triggered a recalibration yet"""
+        cutoff = (datetime.utcnow() - timedelta(seconds=min_seconds)).isoformat()
+        return [state for state in self._states.values()
+                if state["breached"] and not state["recalibrated"]
+                and state["consecutive"] >= min_breaches and state["first_breach_at"] <= cutoff]
+
+    def mark_recalibrated(self, states: List[Dict[str, Any]]):
+        for state in states:
+            state["recalibrated"] = 1
+        self.stats["recalibrations"] += 1
+        self._save(states)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.stats, breached=sum(1 for state in self._states.values() if state["breached"]))
+
+_breach_state_store: Optional[BreachStateStore] = None
+
+def breach_state_store() -> BreachStateStore:
+    """Process-wide breach state store"""
+    global _breach_state_store
+    if _breach_state_store is None:
+        _breach_state_store = BreachStateStore()
+    return _breach_state_store
+
+async def maybe_trigger_recalibration():
+    """Trigger β-recalibration once per persistent breach pattern (AUTO_BETA_RECALIBRATION)"""
+    if os.getenv("AUTO_BETA_RECALIBRATION", "false").lower() != "true":
+        return
+    store = breach_state_store()
+    episodes = store.persistent(SENTINEL_RECALIBRATION_MIN_BREACHES, SENTINEL_RECALIBRATION_MIN_SECONDS)
+    if not episodes:
+        return
+    logger.info(f"{len(episodes)} persistent breach patterns, triggering beta recalibration")
+    if await trigger_beta_recalibration():
+        store.mark_recalibrated(episodes)
+
+# -------- Sharding --------
+class ShardCoordinator:
+    """Dealer ownership across sentinel instances sharing a SQLite coordination store.
+
+    Instances heartbeat into `members`; a dealer belongs to the live member with
+    the highest rendezvous hash, and an instance only checks dealers it holds an
+    unexpired lease on. Leases are renewed on every refresh and released when
+    ownership moves, so dealers of a dead instance are picked up by the others
+    once its leases lapse. Single-cycle runs additionally claim each dealer for
+    the cycle, so no dealer is checked twice in one cycle while membership churns.
+    """
+
+    def __init__(self, instance_id: str = SENTINEL_INSTANCE_ID, path: Path = SENTINEL_COORDINATION_PATH,
+                 member_ttl: float = SENTINEL_MEMBER_TTL_SECONDS, lease_seconds: float = SENTINEL_LEASE_SECONDS):
+        self.instance_id = instance_id
+        self.member_ttl = member_ttl
+        self.lease_seconds = lease_seconds
+        self.joined = False
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS members (instance_id TEXT PRIMARY KEY, heartbeat_at REAL NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (dealer_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cycle_claims (cycle INTEGER NOT NULL, dealer_id TEXT NOT NULL, "
+            "owner TEXT NOT NULL, PRIMARY KEY (cycle, dealer_id))"
+        )
+
+    @staticmethod
+    def _weight(member: str, dealer: str) -> int:
+        return int.from_bytes(hashlib.md5(f"{member}:{dealer}".encode()).digest()[:8], "big")
+
+    def heartbeat(self) -> List[str]:
+        """Record this instance as alive; returns the live members"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO members (instance_id, heartbeat_at) VALUES (?, ?) "
+                "ON CONFLICT(instance_id) DO UPDATE SET heartbeat_at = excluded.heartbeat_at",
+                (self.instance_id, now)
+            )
+            self._conn.execute("DELETE FROM members WHERE heartbeat_at < ?", (now - self.member_ttl,))
+            return [row[0] for row in self._conn.execute("SELECT instance_id FROM members ORDER BY instance_id")]
+
+    def join(self, settle_seconds: float = SENTINEL_JOIN_SECONDS,
+             poll_seconds: float = SENTINEL_JOIN_POLL_SECONDS) -> List[str]:
+        """Heartbeat; on first join, wait until the live members stop changing.
+
+        Instances started for the same cycle then see each other before they
+        split the dealers. Later calls return right away.
+        """
+        members = self.heartbeat()
+        if self.joined:
+            return members
+        deadline = time.monotonic() + settle_seconds
+        while time.monotonic() < deadline:
+            time.sleep(min(poll_seconds, max(0.0, deadline - time.monotonic())))
+            current = self.heartbeat()
+            if current == members:
+                break
+            members = current
+        self.joined = True
+        return members
+
+    def refresh(self, dealers: List[str]) -> List[str]:
+        """Heartbeat, rebalance leases and return the dealers this instance currently owns"""
+        members = self.heartbeat()
+        mine = [d for d in dealers if max(members, key=lambda m: self._weight(m, d)) == self.instance_id]
+        now = time.time()
+        owned = []
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Release what rebalanced away before taking anything new
+                held = {row[0] for row in self._conn.execute(
+                    "SELECT dealer_id FROM leases WHERE owner = ?", (self.instance_id,)
+                )}
+                released = held - set(mine)
+                self._conn.executemany(
+                    "DELETE FROM leases WHERE dealer_id = ? AND owner = ?",
+                    [(d, self.instance_id) for d in released]
+                )
+                for dealer in mine:
+                    cursor = self._conn.execute(
+                        "INSERT INTO leases (dealer_id, owner, expires_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(dealer_id) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                        "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                        (dealer, self.instance_id, now + self.lease_seconds, now)
+                    )
+                    if cursor.rowcount:
+                        owned.append(dealer)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
         
-        await log_event({
-            "dealer_id": dealer,
-            "event_type": "VDP_OPTIMIZATION_SOW",
-            "metric_value": lcp,
-            "timestamp": datetime.utcnow().isoformat(),
-            "description": f"LCP {lcp:.1f}s exceeds {threshold}s threshold"
-        })
+        _metrics["shard"] = {
+            "instance_id": self.instance_id,
+            "members": len(members),
+            "assigned": len(mine),
+            "owned": len(owned),
+            "awaiting_handover": len(mine) - len(owned)
+        }
+        return owned
 
-async def check_tsm_metrics(session: aiohttp.ClientSession, dealer: str, triggers: Dict[str, Any]):
-    """Check TSM (Trust Sensitivity Multiplier) metrics"""
-    econ = await fetch_tsm_external(session)
-    tsm = econ.get("current_tsm", 1.0)
-    
-    threshold = triggers.get("TSM_DEFENSIVE_THRESHOLD", 1.4)
+    def claim_cycle(self, cycle: int, dealers: List[str]) -> List[str]:
+        """Claim dealers for one monitoring cycle; returns those not already checked this cycle"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                claimed = [
+                    dealer for dealer in dealers
+                    if self._conn.execute(
+                        "INSERT OR IGNORE INTO cycle_claims (cycle, dealer_id, owner) VALUES (?, ?, ?)",
+                        (cycle, dealer, self.instance_id)
+                    ).rowcount
+                ]
+                self._conn.execute("DELETE FROM cycle_claims WHERE cycle < ?", (cycle - 1,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return claimed
+
+    def leave(self):
+        """Give up membership and leases so other instances take over immediately"""
+        with self._lock:
+            self._conn.execute("DELETE FROM leases WHERE owner = ?", (self.instance_id,))
+            self._conn.execute("DELETE FROM members WHERE instance_id = ?", (self.instance_id,))
+
+_shard_coordinator: Optional[ShardCoordinator] = None
+
+def shard_coordinator() -> Optional[ShardCoordinator]:
+    """Process-wide shard coordinator, or None when sharding is disabled"""
+    global _shard_coordinator
+    if SENTINEL_SHARDING and _shard_coordinator is None:
+        _shard_coordinator = ShardCoordinator()
+        atexit.register(_shard_coordinator.leave)
+    return _shard_coordinator
+
+# -------- Sentinel Logic --------
+def monitored_dealers() -> List[str]:
+    """Dealer list from MONITORED_DEALERS"""
+    dealers_env = os.getenv("MONITORED_DEALERS", "toyota-naples,fort-myers-honda")
+    return [d.strip() for d in dealers_env.split(",") if d.strip()]
+
+def sentinel_metrics() -> Dict[str, Any]:
+    """Snapshot of the most recent monitoring metrics"""
+    snapshot = json.loads(json.dumps(_metrics, default=str))
+    snapshot["feed_cache"] = feed_cache().stats()
+    snapshot["event_sink"] = dict(event_sink().stats)
+    snapshot["alerts"] = dict(alert_dispatcher().stats)
+    snapshot["upstreams"] = {feed: breaker.snapshot() for feed, breaker in _circuit_breakers.items()}
+    snapshot["breach_state"] = breach_state_store().snapshot()
+    return snapshot
+
+# Feed pullers by the feed name trigger rules refer to
+FEED_FETCHERS = {
+    "gbp": lambda session, dealer, max_age=None: fetch_gbp_review_metrics(session, dealer, max_age=max_age),
+    "pagespeed": lambda session, dealer, max_age=None: fetch_pagespeed(session, f"https://{dealer}.com", max_age=max_age),
+    "tsm": lambda session, dealer, max_age=None: fetch_tsm_external(session, max_age=max_age),
+    "competitive": lambda session, dealer, max_age=None: fetch_competitive_dtri(session, dealer, max_age=max_age)
+}
+
+def check_reading(headroom: float, breached: bool, rules: Dict[str, bool]) -> Dict[str, Any]:
+    """What a check observed; headroom is the relative distance to the nearest trigger (<= 0 once breached)"""
+    return {"headroom": headroom, "breached": breached, "rules": rules, "status": "ok"}
+
+def skipped_reading(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Reading for a check whose feed result was stale or unavailable; triggers were not evaluated"""
+    return {"headroom": None, "breached": False, "rules": {}, "status": feed_status(data)}
+
+async def run_fetch(feed: str, session: aiohttp.ClientSession, dealer: str,
+                    global_limit: asyncio.Semaphore, feed_limits: Dict[str, asyncio.Semaphore],
+                    max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Pull one dealer's feed under the global and per-feed concurrency limits; None if it failed.
+
+    ``max_age`` caps how old a cached feed result may be (see FeedCache.get).
+    """
+    # Per-feed slot first, so pulls queued on a saturated feed don't hold global slots
+    async with feed_limits.setdefault(feed, asyncio.Semaphore(SENTINEL_MAX_CONCURRENCY)), global_limit:
+        try:
+            return await FEED_FETCHERS[feed](session, dealer, max_age=max_age)
+        except Exception as e:
+            logger.error(f"Error running {feed} check for dealer {dealer}: {e}")
+            return None
+
+async def process_breaches(engine: TriggerEngine, evaluation: Dict[str, np.ndarray], dealers: List[str],
+                           results: Dict[str, List[Any]]):
+    """Update breach state; alert and log an event only when a (dealer, rule) enters or leaves breach"""
+    store = breach_state_store()
+    breached = evaluation["breached"]
+    # Only cells breaching now or breached before can change state
+    tracked = np.array([[store.is_breached(dealer, rule["id"]) for rule in engine.rules] for dealer in dealers],
+                       dtype=bool).reshape(breached.shape)
+    cells = np.argwhere(evaluation["evaluated"] & (breached | tracked))
+    transitions = store.observe([
+        (dealers[row], engine.rules[r]["id"], bool(breached[row, r]),
+         None if np.isnan(evaluation["headroom"][row, r]) else float(evaluation["headroom"][row, r]),
+         float(engine.rules[r].get("clear_band", SENTINEL_HYSTERESIS_BAND)))
+        for row, r in cells
+    ])
     
-    if tsm > threshold:
-        message = f"TSM={tsm:.2f}. Entering DEFENSIVE MODE. Prioritize Trust fixes over growth."
+    rows = {dealer: i for i, dealer in enumerate(dealers)}
+    rule_index = {rule["id"]: r for r, rule in enumerate(engine.rules)}
+    for kind, state in transitions:
+        row, r = rows[state["dealer_id"]], rule_index[state["rule_id"]]
+        rule, dealer = engine.rules[r], state["dealer_id"]
+        values = engine.rule_values(rule, evaluation["values"], row)
+        data = results[rule["feed"]][row]
+        context = {name: _lookup(data, tuple(path.split("."))) or "Unknown"
+                   for name, path in rule.get("context", {}).items()}
+        fields = dict(engine.thresholds, **values, **context, dealer=dealer)
+        
+        if kind == "cleared":
+            await log_event({
+                "dealer_id": dealer,
+                "event_type": f"{rule['id']}_CLEARED",
+                "metric_value": values.get(rule.get("metric_value")),
+                "timestamp": state["last_clear_at"],
+                "description": f"{rule['id']} cleared after breaching since {state['first_breach_at']}"
+            })
+            continue
         
         await post_alert(
-            "Economic Risk Spike",
-            message,
-            severity="critical",
-            dealer_id=dealer
+            _render(rule.get("title", rule["id"]), fields),
+            _render(rule.get("message", rule["id"]), fields),
+            severity=rule.get("severity", "warning"),
+            dealer_id=dealer,
+            event_type=rule["id"]
         )
         
         await log_event({
             "dealer_id": dealer,
-            "event_type": "TSM_DEFENSIVE_MODE",
-            "metric_value": tsm,
-            "timestamp": datetime.utcnow().isoformat(),
-            "description": f"TSM {tsm:.2f} exceeds {threshold} defensive threshold"
+            "event_type": rule["id"],
+            "metric_value": values.get(rule.get("metric_value")),
+            "timestamp": state["first_breach_at"],
+            "description": _render(rule.get("description", rule.get("message", rule["id"])), fields)
         })
 
-async def check_competitive_metrics(session: aiohttp.ClientSession, dealer: str, triggers: Dict[str, Any]):
-    """Check competitive DTRI delta metrics"""
-    comp = await fetch_competitive_dtri(session, dealer)
-    delta = comp.get("delta", 0)
+async def check_feed(engine: TriggerEngine, feed: str, session: aiohttp.ClientSession, dealer: str,
+                     global_limit: asyncio.Semaphore, feed_limits: Dict[str, asyncio.Semaphore],
+                     max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Pull one dealer's feed and evaluate the rules that read it; None if the pull failed"""
+    data = await run_fetch(feed, session, dealer, global_limit, feed_limits, max_age)
+    if data is None:
+        return None
+    if not feed_usable(data):
+        return skipped_reading(data)
     
-    threshold = triggers.get("COMPETITIVE_DELTA_THRESHOLD", 10.0)
+    results = {feed: [data]}
+    evaluation = engine.evaluate(results, 1)
+    await process_breaches(engine, evaluation, [dealer], results)
     
-    if delta > threshold:
-        competitor = comp.get("competitor_name", "Unknown")
-        message = f"Rival lead detected ({delta:.1f}pt delta vs {competitor}). Launching Competitive Attack SOW."
-        
-        await post_alert(
-            f"Competitive DTRI Threat – {dealer}",
-            message,
-            severity="warning",
-            dealer_id=dealer
+    rule_columns = [r for r, rule in enumerate(engine.rules) if rule["feed"] == feed]
+    headroom = evaluation["headroom"][0, rule_columns]
+    return check_reading(
+        float(np.nanmin(headroom)) if rule_columns and not np.isnan(headroom).all() else None,
+        bool(evaluation["breached"][0, rule_columns].any()),
+        {engine.rules[r]["id"]: bool(evaluation["breached"][0, r]) for r in rule_columns}
+    )
+
+async def sentinel_monitor():
+    """Main sentinel monitoring loop"""
+    logger.info("Starting MAXIMUS Sentinel monitoring cycle")
+    started = time.monotonic()
+    
+    engine = trigger_engine()
+    
+    # Get dealer list from environment or use defaults
+    dealers = monitored_dealers()
+    coordinator = shard_coordinator()
+    if coordinator:
+        # Give instances started for the same cycle a moment to register
+        await asyncio.to_thread(coordinator.join)
+        owned = await asyncio.to_thread(coordinator.refresh, dealers)
+        breach_state_store().track(owned)
+        cycle = int(time.time() // (int(os.getenv("SENTINEL_INTERVAL_MINUTES", "15")) * 60))
+        dealers = await asyncio.to_thread(coordinator.claim_cycle, cycle, owned)
+        logger.info(f"Shard {coordinator.instance_id} owns {len(owned)} dealers, {len(dealers)} unchecked this cycle")
+    
+    logger.info(f"Monitoring {len(dealers)} dealers against {len(engine.rules)} trigger rules "
+                f"with up to {SENTINEL_MAX_CONCURRENCY} concurrent checks")
+    
+    # Every (dealer, feed) pull runs concurrently; the semaphores bound total
+    # in-flight requests and protect each upstream feed's rate limits
+    global_limit = asyncio.Semaphore(SENTINEL_MAX_CONCURRENCY)
+    feed_limits = {feed: asyncio.Semaphore(limit) for feed, limit in SENTINEL_FEED_CONCURRENCY.items()}
+    connector = aiohttp.TCPConnector(limit=SENTINEL_MAX_CONCURRENCY)
+    
+    async with aiohttp.ClientSession(connector=connector) as session:
+        outcomes = await asyncio.gather(*[
+            run_fetch(feed, session, dealer, global_limit, feed_limits)
+            for dealer in dealers
+            for feed in engine.feeds
+        ])
+        # Let stale-while-revalidate refreshes finish while the session is open
+        await feed_cache().drain()
+    
+    # One vectorized pass over the fleet, then alerts/events for each breach
+    n_feeds = len(engine.feeds)
+    results = {feed: outcomes[f::n_feeds] for f, feed in enumerate(engine.feeds)}
+    evaluation = engine.evaluate(results, len(dealers))
+    await process_breaches(engine, evaluation, dealers, results)
+    await alert_dispatcher().flush()
+    await maybe_trigger_recalibration()
+    
+    cycle_seconds = time.monotonic() - started
+    failures = sum(1 for outcome in outcomes if outcome is None)
+    skipped = sum(1 for outcome in outcomes if outcome is not None and not feed_usable(outcome))
+    _metrics["last_cycle"] = {
+        "completed_at": datetime.utcnow().isoformat(),
+        "dealers": len(dealers),
+        "checks": len(outcomes),
+        "failed_checks": failures,
+        "skipped_checks": skipped,
+        "breaches": int(evaluation["breached"].sum()),
+        "cycle_seconds": round(cycle_seconds, 3)
+    }
+    _metrics["cycles"] = _metrics.get("cycles", 0) + 1
+    
+    logger.info(f"Sentinel monitoring cycle complete: {len(outcomes)} checks for {len(dealers)} dealers "
+                f"in {cycle_seconds:.1f}s ({failures} failed, {skipped} skipped on stale/unavailable feeds)")
+    return _metrics["last_cycle"]
+
+# -------- Adaptive Scheduler --------
+def next_check_interval(state: Dict[str, Any], reading: Optional[Dict[str, Any]], now: float,
+                        base_interval: float) -> float:
+    """Update a dealer/check pair's state with its latest reading and pick its next interval.
+
+    Breaches are re-checked at the minimum interval. Otherwise the interval is
+    the time the metric would need, drifting at its recent rate, to close its
+    headroom to the threshold, divided by SENTINEL_SAFETY_FACTOR; it may grow by
+    at most SENTINEL_INTERVAL_GROWTH per check and stays at or below the base
+    interval for SENTINEL_BREACH_MEMORY_SECONDS after a breach.
+    """
+    previous_interval = state.get("interval", base_interval)
+    if reading is None or reading["headroom"] is None:
+        # Failed or skipped check: retry on the base cadence without touching the estimates
+        return min(max(base_interval, SENTINEL_MIN_INTERVAL_SECONDS), SENTINEL_MAX_INTERVAL_SECONDS)
+    
+    headroom = reading["headroom"]
+    if "headroom" in state and now > state["checked_at"]:
+        drift = abs(headroom - state["headroom"]) / (now - state["checked_at"])
+        volatility = state.get("volatility")
+        state["volatility"] = drift if volatility is None else (
+            SENTINEL_VOLATILITY_ALPHA * drift + (1 - SENTINEL_VOLATILITY_ALPHA) * volatility
         )
-        
-        await log_event({
-            "dealer_id": dealer,
-            "event_type": "COMPETITIVE_ATTACK_SOW",
-            "metric_value": delta,
-            "timestamp": datetime.utcnow().isoformat(),
-            "description": f"Competitive delta {delta:.1f} exceeds {threshold}pt threshold"
-        })
+    state["headroom"] = headroom
+    state["checked_at"] = now
+    state["breached"] = reading["breached"]
+    if reading["breached"]:
+        state["last_breach_at"] = now
+        return SENTINEL_MIN_INTERVAL_SECONDS
+    
+    volatility = state.get("volatility")
+    if volatility is None:
+        interval = base_interval
+    elif volatility > 0:
+        interval = max(headroom, 0.0) / volatility / SENTINEL_SAFETY_FACTOR
+    else:
+        interval = SENTINEL_MAX_INTERVAL_SECONDS
+    interval = min(interval, previous_interval * SENTINEL_INTERVAL_GROWTH)
+    if now - state.get("last_breach_at", float('-inf')) < SENTINEL_BREACH_MEMORY_SECONDS:
+        interval = min(interval, base_interval)
+    return min(max(interval, SENTINEL_MIN_INTERVAL_SECONDS), SENTINEL_MAX_INTERVAL_SECONDS)
 
 async def run_continuous_monitoring():
-    """Run continuous monitoring with configurable intervals"""
+    """Run continuous monitoring, scheduling each dealer/check pair on its own adaptive interval"""
     interval_minutes = int(os.getenv("SENTINEL_INTERVAL_MINUTES", "15"))
     interval_seconds = interval_minutes * 60
     
-    logger.info(f"Starting continuous monitoring with {interval_minutes} minute intervals")
+    logger.info(f"Starting continuous monitoring: base interval {interval_minutes} minutes, "
+                f"bounds {SENTINEL_MIN_INTERVAL_SECONDS:.0f}s-{SENTINEL_MAX_INTERVAL_SECONDS:.0f}s")
+    
+    global_limit = asyncio.Semaphore(SENTINEL_MAX_CONCURRENCY)
+    feed_limits = {feed: asyncio.Semaphore(limit) for feed, limit in SENTINEL_FEED_CONCURRENCY.items()}
+    connector = aiohttp.TCPConnector(limit=SENTINEL_MAX_CONCURRENCY)
+    
+    # Min-heap of (due, seq, dealer, feed); pairs dropped from `states` are skipped when popped
+    queue: List[tuple] = []
+    states: Dict[tuple, Dict[str, Any]] = {}
+    seq = itertools.count()
+    running: set = set()
+    stats = {"checks_run": 0, "failed_checks": 0, "skipped_checks": 0, "max_lateness_seconds": 0.0}
     
-    while True:
+    coordinator = shard_coordinator()
+    
+    async def sync_dealers():
+        dealers = monitored_dealers()
+        if coordinator:
+            dealers = await asyncio.to_thread(coordinator.refresh, dealers)
+            breach_state_store().track(dealers)
+        now = time.monotonic()
+        # Rules may have been hot-reloaded with a different set of feeds
+        wanted = {(dealer, feed) for dealer in dealers for feed in trigger_engine().feeds}
+        for pair in wanted - states.keys():
+            states[pair] = {"interval": interval_seconds}
+            heapq.heappush(queue, (now, next(seq), *pair))
+        for pair in states.keys() - wanted:
+            del states[pair]
+    
+    async def run_pair(session: aiohttp.ClientSession, dealer: str, feed: str, due: float):
+        stats["max_lateness_seconds"] = max(stats["max_lateness_seconds"], round(time.monotonic() - due, 3))
+        interval = interval_seconds
+        state = states.get((dealer, feed))
+        # A pair re-checked faster than its feed is cached (breached or close to a
+        # trigger) must not be answered from the cache entry it saw last time
+        max_age = state["interval"] if state is not None else None
         try:
-            await sentinel_monitor()
-            
-            # Optional: Trigger beta recalibration for persistent issues
-            if os.getenv("AUTO_BETA_RECALIBRATION", "false").lower() == "true":
-                await trigger_beta_recalibration()
-                
+            reading = await check_feed(trigger_engine(), feed, session, dealer, global_limit, feed_limits, max_age)
+            stats["checks_run"] += 1
+            if reading is None:
+                stats["failed_checks"] += 1
+            elif reading["headroom"] is None:
+                stats["skipped_checks"] += 1
+            state = states.get((dealer, feed))
+            if state is not None:
+                interval = next_check_interval(state, reading, time.monotonic(), interval_seconds)
         except Exception as e:
-            logger.error(f"Error in monitoring cycle: {e}")
-        
-        logger.info(f"Waiting {interval_minutes} minutes until next cycle...")
-        await asyncio.sleep(interval_seconds)
+            logger.error(f"Error checking {feed} for dealer {dealer}: {e}")
+        finally:
+            # Always reschedule
+            state = states.get((dealer, feed))
+            if state is not None:
+                state["interval"] = interval
+                heapq.heappush(queue, (time.monotonic() + state["interval"], next(seq), dealer, feed))
+    
+    async def housekeeping():
+        await alert_dispatcher().flush()
+        # Optional: Trigger beta recalibration for persistent issues
+        await maybe_trigger_recalibration()
+        feed_cache().purge()
+        intervals: Dict[str, List[float]] = {}
+        for (_, feed), state in states.items():
+            intervals.setdefault(feed, []).append(state["interval"])
+        _metrics["scheduler"] = dict(
+            stats,
+            pairs=len(states),
+            running=len(running),
+            breached_pairs=sum(1 for state in states.values() if state.get("breached")),
+            mean_interval_seconds={feed: round(sum(v) / len(v), 1) for feed, v in intervals.items()},
+            updated_at=datetime.utcnow().isoformat()
+        )
+        stats["max_lateness_seconds"] = 0.0
+        logger.info(f"Scheduler: {stats['checks_run']} checks run, {len(running)} running, "
+                    f"{_metrics['scheduler']['breached_pairs']} breached pairs")
+    
+    await sync_dealers()
+    next_housekeeping = time.monotonic() + SENTINEL_HOUSEKEEPING_SECONDS
+    
+    async with aiohttp.ClientSession(connector=connector) as session:
+        while True:
+            try:
+                now = time.monotonic()
+                while queue and queue[0][0] <= now:
+                    due, _, dealer, feed = heapq.heappop(queue)
+                    if (dealer, feed) in states:
+                        running.add(asyncio.ensure_future(run_pair(session, dealer, feed, due)))
+                
+                if now >= next_housekeeping:
+                    await sync_dealers()
+                    await housekeeping()
+                    next_housekeeping = now + SENTINEL_HOUSEKEEPING_SECONDS
+                
+                wake_at = min(next_housekeeping, queue[0][0]) if queue else next_housekeeping
+                timeout = max(0.0, wake_at - time.monotonic())
+                if running:
+                    done, running = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if not task.cancelled() and task.exception() is not None:
+                            logger.error(f"Error in monitoring task: {task.exception()}")
+                else:
+                    await asyncio.sleep(timeout)
+            except Exception as e:
+                logger.error(f"Error in monitoring scheduler: {e}")
+                await asyncio.sleep(1)
 
 # -------- Main Entry Point --------
+async def run_sentinel(continuous: bool = False):
+    """Run one cycle (or monitor continuously), then release pooled connections"""
+    try:
+        if continuous:
+            await run_continuous_monitoring()
+        else:
+            await sentinel_monitor()
+    finally:
+        await alert_dispatcher().close()
+
 if __name__ == "__main__":
     import sys
     
-    if len(sys.argv) > 1 and sys.argv[1] == "--continuous":
-        # Run continuous monitoring
-        asyncio.run(run_continuous_monitoring())
-    else:
-        # Run single monitoring cycle
-        asyncio.run(sentinel_monitor())
+    # Run continuous monitoring with --continuous, otherwise a single monitoring cycle
+    asyncio.run(run_sentinel(len(sys.argv) > 1 and sys.argv[1] == "--continuous"))
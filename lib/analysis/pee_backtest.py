@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+PEE Backtesting Suite - Rolling-origin evaluation of Predictive Elasticity Engine models
+Compares accuracy (MAPE, interval coverage) against fit/predict time and peak memory
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from . import predictive_elasticity_engine as pee
+except ImportError:
+    import predictive_elasticity_engine as pee
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKTEST_MODELS = ['prophet', 'linear', 'xgboost', 'simple_revenue']
+BACKTEST_MAX_WORKERS = int(os.getenv("PEE_BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+
+# ---------------- History Sources ----------------
+def load_history_file(path: str) -> pd.DataFrame:
+    """Load events from a JSON payload ({"events": [...]}), an NDJSON file or a directory of them"""
+    events = pee.read_events_file(path)
+    return pee.load_dtri_history(events)
+
+def synthetic_history(vertical: str = "synthetic", days: int = 365, seed: int = 42) -> pd.DataFrame:
+    """Daily DTRI/QAI/EEAT/PIQR/Revenue series with trend, weekly seasonality and noise.
+
+    Revenue responds to DTRI with a known elasticity so model accuracy can be
+    checked against a ground truth.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = pd.date_range(end=pd.Timestamp.now().normalize(), periods=days, freq='D')
+    t = np.arange(days)
+    weekly = np.sin(2 * np.pi * t / 7)
+
+    dtri = 60 + 0.03 * t + 2.0 * weekly + rng.normal(0, 1.0, days)
+    qai = 70 + 0.02 * t + rng.normal(0, 1.5, days)
+    eeat = 65 + 0.01 * t + rng.normal(0, 1.0, days)
+    piqr = 55 + rng.normal(0, 2.0, days)
+    revenue = 250_000 * (dtri / 60) ** 1.2 * (1 + 0.03 * weekly) * (1 + rng.normal(0, 0.01, days))
+
+    series = {'DTRI': dtri, 'QAI': qai, 'EEAT': eeat, 'PIQR': piqr, 'Revenue': revenue}
+    events = [
+        {"timestamp": ts.isoformat(), "metric": metric, "score": float(values[i]), "vertical": vertical}
+        for metric, values in series.items()
+        for i, ts in enumerate(timestamps)
+    ]
+    return pee.load_dtri_history(events)
+
+# ---------------- Model Adapters ----------------
+@contextmanager
+def _isolated_engine_state() -> Iterator[None]:
+    """Point the engine's registries and stores at a throwaway directory.
+
+    The feature store is append-only and the model registries warm-start, so
+    folds must not see each other's state (or the production state on disk).
+    """
+    saved = (pee._prophet_registry, pee._feature_store, pee._xgboost_registry)
+    with tempfile.TemporaryDirectory(prefix="pee_backtest_") as tmp:
+        pee._prophet_registry = pee.ProphetModelRegistry(Path(tmp))
+        pee._feature_store = pee.FeatureStore(Path(tmp) / "features")
+        pee._xgboost_registry = pee.XGBoostModelRegistry(Path(tmp))
+        try:
+            yield
+        finally:
+            pee._prophet_registry, pee._feature_store, pee._xgboost_registry = saved
+
+def _fit_predict_prophet(train: pd.DataFrame, horizon_days: int) -> Tuple[Callable[[], Any], Callable[[Any], pd.DataFrame]]:
+    def fit():
+        dfp = train[train['metric'] == 'DTRI'][['timestamp', 'score']].rename(columns={'timestamp': 'ds', 'score': 'y'})
+        model = pee._new_prophet_model()
+        model.fit(dfp.dropna())
+        return model
+
+    def predict(model):
+        future = model.make_future_dataframe(periods=horizon_days)
+        return model.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(horizon_days)
+
+    return fit, predict
+
+def _fit_predict_linear(train: pd.DataFrame, horizon_days: int) -> Tuple[Callable[[], Any], Callable[[Any], pd.DataFrame]]:
+    # The batched least-squares fit and its horizon are one vectorized call; timed as fit
+    def fit():
+        return pee.linear_trend_forecast(train, 'DTRI', horizon_days)
+
+    return fit, lambda forecast: forecast
+
+def _fit_predict_xgboost(train: pd.DataFrame, vertical: str) -> Tuple[Callable[[], Any], Callable[[Any], Dict[str, Any]]]:
+    def fit():
+        return pee.xgboost_predict(train, vertical, retrain=True)
+
+    def predict(_):
+        return pee.xgboost_predict(train, vertical, retrain=False)
+
+    return fit, predict
+
+def _fit_predict_simple_revenue(train: pd.DataFrame) -> Tuple[Callable[[], Any], Callable[[Any], Dict[str, Any]]]:
+    return (lambda: pee.simple_revenue_prediction(train)), (lambda out: out)
+
+# ---------------- Metrics ----------------
+def mape(actual: np.ndarray, predicted: np.ndarray) -> float:
+    """Mean absolute percentage error over non-zero actuals (as a fraction)"""
+    actual = np.asarray(actual, dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    mask = (actual != 0) & np.isfinite(actual) & np.isfinite(predicted)
+    if not mask.any():
+        return float('nan')
+    return float(np.mean(np.abs((actual[mask] - predicted[mask]) / actual[mask])))
+
+def _score_forecast(forecast: pd.DataFrame, actuals: pd.DataFrame) -> Tuple[float, float, int]:
+    """MAPE and interval coverage of a forecast against actuals matched to the nearest day"""
+    if forecast is None or forecast.empty or actuals.empty:
+        return float('nan'), float('nan'), 0
+    matched = pd.merge_asof(
+        actuals.sort_values('timestamp'),
+        forecast.assign(ds=pd.to_datetime(forecast['ds'])).sort_values('ds'),
+        left_on='timestamp',
+        right_on='ds',
+        direction='nearest',
+        tolerance=pd.Timedelta(days=1)
+    ).dropna(subset=['yhat'])
+    if matched.empty:
+        return float('nan'), float('nan'), 0
+    actual = matched['score'].to_numpy(dtype=np.float64)
+    covered = (actual >= matched['yhat_lower'].to_numpy()) & (actual <= matched['yhat_upper'].to_numpy())
+    return mape(actual, matched['yhat'].to_numpy()), float(covered.mean()), len(matched)
+
+def _peak_rss_mb() -> float:
+    """This process's peak resident set size; ru_maxrss is KiB on Linux, bytes on macOS"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+# ---------------- Rolling-Origin Folds ----------------
+def rolling_origins(df: pd.DataFrame, n_folds: int = 5, horizon_days: int = 14,
+                    step_days: Optional[int] = None, min_train_points: int = 30) -> List[pd.Timestamp]:
+    """Cutoff timestamps for rolling-origin CV, oldest first"""
+    dtri_ts = df.loc[df['metric'] == 'DTRI', 'timestamp']
+    if dtri_ts.empty:
+        return []
+    step = pd.Timedelta(days=step_days or horizon_days)
+    last = dtri_ts.max() - pd.Timedelta(days=horizon_days)
+    cutoffs = [last - step * k for k in range(n_folds - 1, -1, -1)]
+    return [c for c in cutoffs if (dtri_ts <= c).sum() >= min_train_points]
+
+def run_fold(df: pd.DataFrame, vertical: str, model: str, cutoff: pd.Timestamp, horizon_days: int) -> Dict[str, Any]:
+    """Fit one model on data up to ``cutoff`` and score it on the following horizon"""
+    train = df[df['timestamp'] <= cutoff]
+    test = df[(df['timestamp'] > cutoff) & (df['timestamp'] <= cutoff + pd.Timedelta(days=horizon_days))]
+    result = {
+        "vertical": vertical,
+        "model": model,
+        "cutoff": cutoff.isoformat(),
+        "train_rows": len(train),
+        "mape": float('nan'),
+        "coverage": float('nan'),
+        "scored_points": 0,
+        "fit_seconds": float('nan'),
+        "predict_seconds": float('nan'),
+        "peak_rss_mb": float('nan'),
+        "error": None
+    }
+
+    if model == 'prophet' and not pee.PROPHET_AVAILABLE:
+        result["error"] = "Prophet not available"
+        return result
+    if model == 'xgboost' and not pee.XGBOOST_AVAILABLE:
+        result["error"] = "XGBoost not available"
+        return result
+
+    with _isolated_engine_state():
+        if model == 'prophet':
+            fit, predict = _fit_predict_prophet(train, horizon_days)
+        elif model == 'linear':
+            fit, predict = _fit_predict_linear(train, horizon_days)
+        elif model == 'xgboost':
+            fit, predict = _fit_predict_xgboost(train, vertical)
+        elif model == 'simple_revenue':
+            fit, predict = _fit_predict_simple_revenue(train)
+        else:
+            result["error"] = f"Unknown model: {model}"
+            return result
+
+        try:
+            # RSS covers native allocations (XGBoost, Stan) that tracemalloc can't see
+            rss_before = _peak_rss_mb()
+            started = time.perf_counter()
+            fitted = fit()
+            result["fit_seconds"] = time.perf_counter() - started
+            started = time.perf_counter()
+            output = predict(fitted)
+            result["predict_seconds"] = time.perf_counter() - started
+            result["peak_rss_mb"] = _peak_rss_mb() - rss_before
+        except Exception as e:
+            result["error"] = str(e)
+            return result
+
+    if model in ('prophet', 'linear'):
+        actuals = test.loc[test['metric'] == 'DTRI', ['timestamp', 'score']]
+        result["mape"], result["coverage"], result["scored_points"] = _score_forecast(output, actuals)
+    else:
+        # Revenue models predict the next Revenue value; score against the first one after the cutoff
+        actuals = test.loc[test['metric'] == 'Revenue', 'score']
+        if output and not actuals.empty:
+            result["mape"] = mape(actuals.iloc[:1].to_numpy(), [output["predicted_revenue"]])
+            result["scored_points"] = 1
+    return result
+
+def _fold_child(conn, args: Tuple[pd.DataFrame, str, str, pd.Timestamp, int]):
+    try:
+        conn.send(run_fold(*args))
+    finally:
+        conn.close()
+
+def _run_fold_task(args: Tuple[pd.DataFrame, str, str, pd.Timestamp, int]) -> Dict[str, Any]:
+    """Run a fold in a freshly forked process.
+
+    A forked child starts with its peak RSS at its current RSS, so ru_maxrss in
+    the child measures that fold alone rather than the worker's high-water mark
+    from earlier folds.
+    """
+    df, vertical, model, cutoff, _ = args
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_fold_child, args=(sender, args), name=f"pee-backtest-{vertical}-{model}")
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        process.join()
+        logger.error(f"Backtest fold {vertical}/{model}@{cutoff} exited with code {process.exitcode}")
+        return {"vertical": vertical, "model": model, "cutoff": cutoff.isoformat(),
+                "error": f"Fold worker exited with code {process.exitcode}"}
+    finally:
+        receiver.close()
+        process.join()
+
+def backtest(
+    histories: Dict[str, pd.DataFrame],
+    models: Optional[List[str]] = None,
+    n_folds: int = 5,
+    horizon_days: int = 14,
+    max_workers: Optional[int] = None
+) -> pd.DataFrame:
+    """Rolling-origin CV of each model on each vertical's history, folds run in parallel.
+
+    Returns one row per (vertical, model, fold); ``peak_rss_mb`` is the RSS the
+    fold's fit and predict added on top of the process it was forked from.
+    """
+    models = models or BACKTEST_MODELS
+    tasks = []
+    for vertical, df in histories.items():
+        for cutoff in rolling_origins(df, n_folds, horizon_days):
+            for model in models:
+                tasks.append((df, vertical, model, cutoff, horizon_days))
+
+    if not tasks:
+        logger.warning("No backtest folds: histories too short for the requested folds/horizon")
+        return pd.DataFrame()
+
+    max_workers = max(1, min(max_workers or BACKTEST_MAX_WORKERS, len(tasks)))
+    logger.info(f"Running {len(tasks)} backtest folds on {max_workers} workers")
+    if max_workers == 1:
+        rows = [_run_fold_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=pee._reset_worker_state) as executor:
+            rows = list(executor.map(_run_fold_task, tasks))
+    return pd.DataFrame(rows)
+
+def summarize(folds: pd.DataFrame) -> pd.DataFrame:
+    """Mean accuracy and cost per vertical and model"""
+    if folds.empty:
+        return folds
+    ok = folds[folds['error'].isna()]
+    return ok.groupby(['vertical', 'model']).agg(
+        folds=('cutoff', 'count'),
+        mape=('mape', 'mean'),
+        coverage=('coverage', 'mean'),
+        fit_seconds=('fit_seconds', 'mean'),
+        predict_seconds=('predict_seconds', 'mean'),
+        peak_rss_mb=('peak_rss_mb', 'max')
+    ).reset_index()
+
+def recommend_models(summary: pd.DataFrame, max_mape: float = 0.05) -> Dict[str, Dict[str, Optional[str]]]:
+    """Cheapest (fit + predict time) model per vertical whose MAPE meets ``max_mape``.
+
+    Forecast models (DTRI) and revenue models are ranked separately.
+    """
+    recommendations: Dict[str, Dict[str, Optional[str]]] = {}
+    if summary.empty:
+        return recommendations
+    summary = summary.assign(cost=summary['fit_seconds'] + summary['predict_seconds'])
+    for vertical, group in summary.groupby('vertical'):
+        picks = {}
+        for kind, kind_models in (('forecast', ['prophet', 'linear']), ('revenue', ['xgboost', 'simple_revenue'])):
+            eligible = group[group['model'].isin(kind_models) & (group['mape'] <= max_mape)]
+            picks[kind] = eligible.sort_values('cost')['model'].iloc[0] if not eligible.empty else None
+        recommendations[vertical] = picks
+    return recommendations
+
+# ---------------- CLI Interface ----------------
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Backtest PEE forecasting and revenue models")
+    parser.add_argument("histories", nargs="*", help="History files (JSON payload or NDJSON events)")
+    parser.add_argument("--synthetic", type=int, default=0, help="Add N synthetic verticals")
+    parser.add_argument("--days", type=int, default=365, help="Length of synthetic series in days")
+    parser.add_argument("--models", default=",".join(BACKTEST_MODELS), help="Comma-separated models")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--horizon", type=int, default=14, help="Forecast horizon in days")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-mape", type=float, default=0.05, help="Accuracy target for recommendations")
+    args = parser.parse_args()
+
+    histories: Dict[str, pd.DataFrame] = {}
+    for path in args.histories:
+        df = load_history_file(path)
+        for vertical, group in df.groupby('vertical', observed=True):
+            histories[str(vertical)] = group
+    for i in range(args.synthetic):
+        histories[f"synthetic-{i}"] = synthetic_history(f"synthetic-{i}", args.days, seed=42 + i)
+
+    if not histories:
+        logger.error("No histories to backtest; pass files or --synthetic N")
+        sys.exit(1)
+
+    folds = backtest(histories, args.models.split(","), args.folds, args.horizon, args.workers)
+    summary = summarize(folds)
+    print(json.dumps({
+        "generated_at": datetime.utcnow().isoformat(),
+        "summary": json.loads(summary.to_json(orient="records")),
+        "recommendations": recommend_models(summary, args.max_mape)
+    }, indent=2))
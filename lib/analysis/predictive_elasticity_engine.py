@@ -8,9 +8,21 @@ import pandas as pd
 import numpy as np
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Iterable, Iterator, Callable
 import json
 import os
+import time
+import hashlib
+import atexit
+import sqlite3
+import threading
+import uuid
+import shutil
+from urllib.parse import quote, unquote
+from collections import OrderedDict
+from statistics import NormalDist
+import multiprocessing
+from multiprocessing.connection import wait as wait_connections
 from pathlib import Path
 
 # ML Libraries
@@ -23,11 +35,28 @@ except ImportError:
 
 try:
     from prophet import Prophet
+    from prophet.serialize import model_to_json, model_from_json
     PROPHET_AVAILABLE = True
 except ImportError:
     PROPHET_AVAILABLE = False
     logging.warning("Prophet not available, using fallback forecasting")
 
+try:
+    from scipy import sparse as scipy_sparse
+    from scipy import stats as scipy_stats
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logging.warning("PyArrow not available, local results fall back to JSON files")
+
 # Supabase
 try:
     from supabase import create_client, Client
@@ -59,8 +88,38 @@ def supabase_client() -> Optional[Client]:
         return None
 
 # ---------------- Data Loading ----------------
+PEE_TIMESTAMP_FORMAT = os.getenv("PEE_TIMESTAMP_FORMAT", "ISO8601")
+
+# Category dictionaries shared across loads so codes stay stable between frames
+_metric_dictionary: List[str] = ['DTRI', 'QAI', 'EEAT', 'PIQR', 'Revenue']
+_vertical_dictionary: List[str] = ['global']
+
+def _shared_categorical(values: pd.Series, dictionary: List[str]) -> pd.Categorical:
+    """Encode values against a shared, append-only category dictionary"""
+    values = values.astype(str)
+    known = set(dictionary)
+    dictionary.extend(v for v in pd.unique(values) if v not in known)
+    return pd.Categorical(values, categories=dictionary)
+
+def _parse_timestamps(values: pd.Series) -> pd.Series:
+    """Parse timestamps in the configured format straight to datetime64[ns]"""
+    try:
+        parsed = pd.to_datetime(values, format=PEE_TIMESTAMP_FORMAT)
+    except (ValueError, TypeError):
+        logger.warning(f"Timestamps not in {PEE_TIMESTAMP_FORMAT} format, using generic parser")
+        parsed = pd.to_datetime(values)
+    if getattr(parsed.dt, 'tz', None) is not None:
+        parsed = parsed.dt.tz_convert(None)
+    return parsed.astype('datetime64[ns]')
+
 def load_dtri_history(events: List[Dict[str, Any]]) -> pd.DataFrame:
-    """Load and prepare DTRI historical data"""
+    """Load and prepare DTRI historical data.
+
+    ``metric`` and ``vertical`` are categoricals over shared dictionaries,
+    timestamps are parsed in PEE_TIMESTAMP_FORMAT to datetime64[ns], scores are
+    float64, and the sort is skipped when the events already arrive in
+    timestamp order.
+    """
     if not events:
         logger.warning("No events provided")
         return pd.DataFrame()
@@ -74,15 +133,25 @@ def load_dtri_history(events: List[Dict[str, Any]]) -> pd.DataFrame:
         logger.error(f"Missing required columns: {missing_cols}")
         return pd.DataFrame()
     
-    # Convert timestamp and sort
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.sort_values('timestamp', inplace=True)
-    
     # Add vertical if not present
     if 'vertical' not in df.columns:
         df['vertical'] = 'global'
+    else:
+        df['vertical'] = df['vertical'].fillna('global')
+    
+    # Typed columns
+    df['timestamp'] = _parse_timestamps(df['timestamp'])
+    df['metric'] = _shared_categorical(df['metric'], _metric_dictionary)
+    df['vertical'] = _shared_categorical(df['vertical'], _vertical_dictionary)
+    df['score'] = pd.to_numeric(df['score'], errors='coerce').astype(np.float64)
+    
+    # Sort only when needed
+    if not df['timestamp'].is_monotonic_increasing:
+        df.sort_values('timestamp', inplace=True, kind='stable')
     
-    logger.info(f"Loaded {len(df)} events for analysis")
+    bytes_per_event = df.memory_usage(deep=True).sum() / len(df)
+    df.attrs['bytes_per_event'] = float(bytes_per_event)
+    logger.info(f"Loaded {len(df)} events for analysis ({bytes_per_event:.1f} bytes/event)")
     return df
 
 # ---------------- Elasticity Calculation ----------------
@@ -136,9 +205,256 @@ def calc_elasticity(df: pd.DataFrame, vertical: str) -> float:
         logger.error(f"Error calculating elasticity for {vertical}: {e}")
         return 0.0
 
+def _asof_dtri_revenue(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
+    """As-of join of DTRI to the latest Revenue per vertical in one pass.
+
+    Returns the merged frame (timestamp, vertical, score_dtri, score_rev) plus
+    the per-vertical DTRI and Revenue event counts.
+    """
+    subset = df.loc[df['metric'].isin(('DTRI', 'Revenue')), ['timestamp', 'vertical', 'metric', 'score']]
+    subset = subset.sort_values('timestamp', kind='stable')
+    is_dtri = subset['metric'] == 'DTRI'
+    dtri_data = subset.loc[is_dtri, ['timestamp', 'vertical', 'score']]
+    revenue_data = subset.loc[~is_dtri, ['timestamp', 'vertical', 'score']]
+
+    dtri_counts = dtri_data.groupby('vertical', observed=True).size()
+    revenue_counts = revenue_data.groupby('vertical', observed=True).size()
+
+    merged = pd.merge_asof(
+        dtri_data,
+        revenue_data,
+        on='timestamp',
+        by='vertical',
+        suffixes=('_dtri', '_rev')
+    ).dropna(subset=['score_dtri', 'score_rev'])
+    return merged, dtri_counts, revenue_counts
+
+def calc_elasticity_all(df: pd.DataFrame, verticals: Optional[List[str]] = None) -> Dict[str, float]:
+    """Calculate DTRI/Revenue elasticity for every vertical in one pass over the events.
+
+    Equivalent to calling calc_elasticity once per vertical, but the events are
+    scanned once, the as-of join runs per vertical via ``by='vertical'`` and the
+    percent changes are computed group-wise in a single vectorized step.
+    ``'global'`` pools the whole frame, as in calc_elasticity, so it is
+    computed separately. Events sharing a timestamp are taken in input order,
+    which calc_elasticity's unstable sort does not guarantee.
+    """
+    if df.empty:
+        return {}
+
+    if verticals is None:
+        verticals = [str(v) for v in pd.unique(df['vertical'])]
+    results = {vertical: 0.0 for vertical in verticals}
+
+    try:
+        merged, dtri_counts, revenue_counts = _asof_dtri_revenue(df)
+
+        grouped = merged.groupby('vertical', observed=True, sort=False)
+        merged_counts = grouped.size()
+        dtri_pct_change = grouped['score_dtri'].pct_change()
+        revenue_pct_change = grouped['score_rev'].pct_change()
+
+        valid_mask = (dtri_pct_change != 0) & np.isfinite(dtri_pct_change) & np.isfinite(revenue_pct_change)
+        ratios = revenue_pct_change[valid_mask] / dtri_pct_change[valid_mask]
+        means = ratios.groupby(merged.loc[valid_mask, 'vertical'], observed=True).mean()
+
+        for vertical in verticals:
+            if vertical == 'global':
+                results[vertical] = calc_elasticity(df, 'global')
+                continue
+            if dtri_counts.get(vertical, 0) < 2 or revenue_counts.get(vertical, 0) < 2:
+                logger.warning(f"Insufficient data for elasticity calculation: {vertical}")
+                continue
+            if merged_counts.get(vertical, 0) < 2:
+                logger.warning(f"No overlapping DTRI/Revenue data for {vertical}")
+                continue
+
+            elasticity = means.get(vertical, np.nan)
+            if not np.isfinite(elasticity):
+                logger.warning(f"No valid elasticity data for {vertical}")
+                continue
+            results[vertical] = round(float(elasticity), 3)
+
+        logger.info(f"Calculated elasticity for {len(results)} verticals in a single pass")
+        return results
+
+    except Exception as e:
+        logger.error(f"Error calculating multi-vertical elasticity: {e}")
+        return results
+
+def rolling_elasticity(
+    df: pd.DataFrame,
+    window: Optional[Any] = None,
+    min_points: int = 3,
+    verticals: Optional[List[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    """Windowed log-log regression elasticity of Revenue on DTRI, per vertical.
+
+    ``window`` is a number of points (int), a time span (``'30D'``, Timedelta),
+    or None for an expanding window. For every as-of-joined DTRI/Revenue point
+    the elasticity is the OLS slope of ln(Revenue) on ln(DTRI) over the window
+    ending at that point, computed from cumulative sums of x, y, x^2 and xy so
+    the whole series costs O(n).
+
+    Returns, per vertical, a frame with window_start, window_end, n_points and
+    elasticity; windows with fewer than ``min_points`` points or no DTRI
+    variation are left out.
+    """
+    if df.empty:
+        return {}
+
+    merged, _, _ = _asof_dtri_revenue(df)
+    merged = merged[(merged['score_dtri'] > 0) & (merged['score_rev'] > 0)]
+    time_window = pd.Timedelta(window) if window is not None and not isinstance(window, (int, np.integer)) else None
+
+    results: Dict[str, pd.DataFrame] = {}
+    for vertical, group in merged.groupby('vertical', observed=True, sort=False):
+        vertical = str(vertical)
+        if verticals is not None and vertical not in verticals:
+            continue
+
+        ts = group['timestamp'].to_numpy(dtype='datetime64[ns]')
+        x = np.log(group['score_dtri'].to_numpy(dtype=np.float64))
+        y = np.log(group['score_rev'].to_numpy(dtype=np.float64))
+        # Center to keep the cumulative-sum differences well conditioned
+        x -= x.mean()
+        y -= y.mean()
+
+        n_total = len(x)
+        end = np.arange(n_total)
+        if window is None:
+            start = np.zeros(n_total, dtype=np.int64)
+        elif time_window is not None:
+            start = np.searchsorted(ts, ts - time_window.to_timedelta64(), side='right')
+        else:
+            start = np.maximum(0, end - int(window) + 1)
+
+        def window_sum(values: np.ndarray) -> np.ndarray:
+            cumulative = np.concatenate(([0.0], np.cumsum(values)))
+            return cumulative[end + 1] - cumulative[start]
+
+        n = (end - start + 1).astype(np.float64)
+        sum_x, sum_y = window_sum(x), window_sum(y)
+        sum_xx, sum_xy = window_sum(x * x), window_sum(x * y)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s_xx = sum_xx - sum_x * sum_x / n
+            s_xy = sum_xy - sum_x * sum_y / n
+            slope = s_xy / s_xx
+
+        valid = (n >= min_points) & (s_xx > 1e-12 * np.maximum(sum_xx, 1e-300)) & np.isfinite(slope)
+        results[vertical] = pd.DataFrame({
+            'window_start': ts[start[valid]],
+            'window_end': ts[end[valid]],
+            'n_points': n[valid].astype(np.int64),
+            'elasticity': slope[valid]
+        })
+
+    logger.info(f"Calculated rolling elasticity for {len(results)} verticals")
+    return results
+
+# ---------------- Prophet Model Registry ----------------
+PEE_MODEL_DIR = Path(os.getenv("PEE_MODEL_DIR", str(Path(__file__).parent / "models")))
+
+def _registry_key(*parts: str) -> str:
+    """Filesystem-safe registry key"""
+    return "__".join("".join(c if c.isalnum() or c in "-_" else "_" for c in str(p)) for p in parts)
+
+def _rows_fingerprint(row_hashes: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(row_hashes).tobytes()).hexdigest()
+
+class ProphetModelRegistry:
+    """Local disk registry of fitted Prophet models keyed by vertical + metric.
+
+    Each entry stores the serialized model, a fingerprint of the (ds, y) rows it
+    was fitted on and the forecast it produced, so callers can tell whether the
+    history is unchanged (serve the cached forecast), has only grown (warm-start
+    from the stored parameters) or was rewritten (fit from scratch).
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or PEE_MODEL_DIR) / "prophet"
+
+    def _path(self, vertical: str, metric: str) -> Path:
+        return self.root / f"{_registry_key(vertical, metric)}.json"
+
+    def load(self, vertical: str, metric: str) -> Optional[Dict[str, Any]]:
+        path = self._path(vertical, metric)
+        if not path.exists():
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable Prophet registry entry {path}: {e}")
+            return None
+
+    def save(self, vertical: str, metric: str, model: "Prophet", row_hashes: np.ndarray,
+             forecast_data: pd.DataFrame, horizon_days: int):
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "vertical": vertical,
+            "metric": metric,
+            "n_rows": int(len(row_hashes)),
+            "fingerprint": _rows_fingerprint(row_hashes),
+            "horizon_days": horizon_days,
+            "model": model_to_json(model),
+            "forecast": forecast_data.assign(ds=forecast_data['ds'].astype(str)).to_dict('records'),
+            "saved_at": datetime.utcnow().isoformat()
+        }
+        path = self._path(vertical, metric)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def match(entry: Optional[Dict[str, Any]], row_hashes: np.ndarray) -> str:
+        """Classify the history against a registry entry: 'unchanged', 'appended' or 'new'"""
+        if not entry:
+            return "new"
+        n_rows = entry.get("n_rows", 0)
+        if len(row_hashes) < n_rows or _rows_fingerprint(row_hashes[:n_rows]) != entry.get("fingerprint"):
+            return "new"
+        return "unchanged" if len(row_hashes) == n_rows else "appended"
+
+def _prophet_warm_start_params(model: "Prophet") -> Dict[str, Any]:
+    """Extract fitted parameters in the form Prophet.fit(init=...) expects"""
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = model.params[name][0][0]
+    for name in ['delta', 'beta']:
+        params[name] = model.params[name][0]
+    return params
+
+_prophet_registry: Optional[ProphetModelRegistry] = None
+
+def prophet_registry() -> ProphetModelRegistry:
+    """Process-wide Prophet model registry"""
+    global _prophet_registry
+    if _prophet_registry is None:
+        _prophet_registry = ProphetModelRegistry()
+    return _prophet_registry
+
 # ---------------- Prophet Forecast ----------------
-def prophet_forecast(df: pd.DataFrame, metric: str = 'DTRI', horizon_days: int = 90) -> pd.DataFrame:
-    """Generate Prophet forecast for specified metric"""
+def _new_prophet_model() -> "Prophet":
+    return Prophet(
+        growth='linear',
+        changepoint_prior_scale=0.15,
+        seasonality_mode='multiplicative',
+        daily_seasonality=False,
+        weekly_seasonality=True,
+        yearly_seasonality=False
+    )
+
+def prophet_forecast(df: pd.DataFrame, metric: str = 'DTRI', horizon_days: int = 90,
+                     use_registry: bool = True) -> pd.DataFrame:
+    """Generate Prophet forecast for specified metric.
+
+    With ``use_registry`` the fitted model is kept in the local model registry:
+    an unchanged history serves the cached forecast and a history that has only
+    grown warm-starts from the previous fit's parameters.
+    """
     if not PROPHET_AVAILABLE:
         logger.warning("Prophet not available, using linear trend forecast")
         return linear_trend_forecast(df, metric, horizon_days)
@@ -158,17 +474,35 @@ def prophet_forecast(df: pd.DataFrame, metric: str = 'DTRI', horizon_days: int =
             logger.warning("Insufficient clean data for Prophet forecast")
             return pd.DataFrame()
         
-        # Initialize and fit Prophet model
-        model = Prophet(
-            growth='linear',
-            changepoint_prior_scale=0.15,
-            seasonality_mode='multiplicative',
-            daily_seasonality=False,
-            weekly_seasonality=True,
-            yearly_seasonality=False
-        )
+        vertical = str(df['vertical'].iloc[0]) if 'vertical' in df.columns else 'global'
+        registry = prophet_registry() if use_registry else None
+        entry = None
+        status = "new"
+        row_hashes = pd.util.hash_pandas_object(dfp[['ds', 'y']], index=False).to_numpy()
+        if registry:
+            entry = registry.load(vertical, metric)
+            status = ProphetModelRegistry.match(entry, row_hashes)
+        
+        if status == "unchanged" and entry.get("horizon_days") == horizon_days:
+            forecast_data = pd.DataFrame(entry["forecast"])
+            forecast_data['ds'] = pd.to_datetime(forecast_data['ds'])
+            logger.info(f"Serving cached Prophet forecast for {vertical}/{metric}")
+            return forecast_data
         
-        model.fit(dfp)
+        # Initialize and fit Prophet model, warm-starting when history only grew
+        model = _new_prophet_model()
+        if status in ("appended", "unchanged"):
+            try:
+                init = _prophet_warm_start_params(model_from_json(entry["model"]))
+                model.fit(dfp, init=init)
+                logger.info(f"Warm-started Prophet for {vertical}/{metric} "
+                            f"({len(dfp) - entry['n_rows']} new rows)")
+            except Exception as e:
+                logger.warning(f"Prophet warm start failed for {vertical}/{metric}, refitting: {e}")
+                model = _new_prophet_model()
+                model.fit(dfp)
+        else:
+            model.fit(dfp)
         
         # Generate forecast
         future = model.make_future_dataframe(periods=horizon_days)
@@ -176,7 +510,13 @@ def prophet_forecast(df: pd.DataFrame, metric: str = 'DTRI', horizon_days: int =
         
         # Extract forecast data
         forecast_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(horizon_days)
-        forecast_data['vertical'] = df['vertical'].iloc[0] if 'vertical' in df.columns else 'global'
+        forecast_data['vertical'] = vertical
+        
+        if registry:
+            try:
+                registry.save(vertical, metric, model, row_hashes, forecast_data, horizon_days)
+            except Exception as e:
+                logger.warning(f"Failed to save Prophet model for {vertical}/{metric}: {e}")
         
         logger.info(f"Generated Prophet forecast for {metric}: {len(forecast_data)} points")
         return forecast_data
@@ -188,34 +528,14 @@ def prophet_forecast(df: pd.DataFrame, metric: str = 'DTRI', horizon_days: int =
 def linear_trend_forecast(df: pd.DataFrame, metric: str = 'DTRI', horizon_days: int = 90) -> pd.DataFrame:
     """Fallback linear trend forecast when Prophet is not available"""
     try:
-        df_metric = df[df['metric'] == metric].copy()
+        df_metric = df[df['metric'] == metric]
         if len(df_metric) < 2:
             return pd.DataFrame()
         
-        # Simple linear regression
-        df_metric['days'] = (df_metric['timestamp'] - df_metric['timestamp'].min()).dt.days
-        x = df_metric['days'].values.reshape(-1, 1)
-        y = df_metric['score'].values
-        
-        # Calculate trend
-        slope = np.polyfit(x.flatten(), y, 1)[0]
-        intercept = np.polyfit(x.flatten(), y, 1)[1]
-        
-        # Generate forecast
-        last_day = df_metric['days'].max()
-        forecast_days = np.arange(last_day + 1, last_day + horizon_days + 1)
-        forecast_values = slope * forecast_days + intercept
-        
-        # Create forecast DataFrame
-        forecast_dates = [df_metric['timestamp'].max() + timedelta(days=int(d - last_day)) for d in forecast_days]
-        
-        forecast_data = pd.DataFrame({
-            'ds': forecast_dates,
-            'yhat': forecast_values,
-            'yhat_lower': forecast_values * 0.95,  # Simple confidence bounds
-            'yhat_upper': forecast_values * 1.05,
-            'vertical': df['vertical'].iloc[0] if 'vertical' in df.columns else 'global'
-        })
+        forecast_data = batch_trend_forecast(df_metric, series_cols=[], horizon_days=horizon_days)
+        if forecast_data.empty:
+            return pd.DataFrame()
+        forecast_data['vertical'] = df['vertical'].iloc[0] if 'vertical' in df.columns else 'global'
         
         logger.info(f"Generated linear trend forecast for {metric}: {len(forecast_data)} points")
         return forecast_data
@@ -224,63 +544,641 @@ def linear_trend_forecast(df: pd.DataFrame, metric: str = 'DTRI', horizon_days:
         logger.error(f"Error in linear trend forecast: {e}")
         return pd.DataFrame()
 
+NS_PER_DAY = 86_400 * 10**9
+
+def batch_trend_forecast(
+    df: pd.DataFrame,
+    series_cols: Optional[List[str]] = None,
+    horizon_days: int = 90,
+    interval: float = 0.95,
+    value_col: str = 'score',
+    origin: Optional[pd.Timestamp] = None,
+    include_residual_variance: bool = False
+) -> pd.DataFrame:
+    """Linear trend forecast for many series at once (e.g. every dealer x metric).
+
+    All fits are solved together: per-series sums of x, y, x^2 and xy are
+    accumulated with ``np.bincount`` and the normal equations are solved in one
+    vectorized step. Bands are prediction intervals derived from each series'
+    residual variance (Student-t when scipy is available, normal otherwise), and
+    forecast dates are generated with datetime64 arithmetic.
+
+    Each series' horizon starts the day after its own last point, or after
+    ``origin`` for every series when given (so horizons line up across series).
+
+    Returns a long frame with the series columns plus ds, yhat, yhat_lower and
+    yhat_upper (and residual_variance on request); series with fewer than two
+    points are skipped.
+    """
+    if series_cols is None:
+        series_cols = [c for c in ('dealer_id', 'vertical', 'metric') if c in df.columns]
+    
+    data = df[[*series_cols, 'timestamp', value_col]].dropna(subset=['timestamp', value_col])
+    if data.empty:
+        return pd.DataFrame()
+    
+    # Series codes and keys
+    if series_cols:
+        grouper = data.groupby(series_cols, sort=False, observed=True)
+        codes = grouper.ngroup().to_numpy()
+        keys = grouper.size().index.to_frame(index=False)
+    else:
+        codes = np.zeros(len(data), dtype=np.int64)
+        keys = pd.DataFrame(index=range(1))
+    n_series = len(keys)
+    
+    ts = data['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    first_ts = np.full(n_series, np.iinfo(np.int64).max, dtype=np.int64)
+    last_ts = np.full(n_series, np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(first_ts, codes, ts)
+    np.maximum.at(last_ts, codes, ts)
+    
+    x = (ts - first_ts[codes]) / NS_PER_DAY
+    y = data[value_col].to_numpy(dtype=np.float64)
+    
+    # Normal equations for every series in one pass
+    n = np.bincount(codes, minlength=n_series).astype(np.float64)
+    sum_x = np.bincount(codes, weights=x, minlength=n_series)
+    sum_y = np.bincount(codes, weights=y, minlength=n_series)
+    sum_xx = np.bincount(codes, weights=x * x, minlength=n_series)
+    sum_xy = np.bincount(codes, weights=x * y, minlength=n_series)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        denom = n * sum_xx - sum_x ** 2
+        slope = np.where(denom > 0, (n * sum_xy - sum_x * sum_y) / denom, 0.0)
+        intercept = (sum_y - slope * sum_x) / n
+        
+        residuals = y - (intercept[codes] + slope[codes] * x)
+        sse = np.bincount(codes, weights=residuals ** 2, minlength=n_series)
+        dof = n - 2
+        sigma2 = np.where(dof > 0, sse / np.maximum(dof, 1), 0.0)
+        x_mean = sum_x / n
+        s_xx = sum_xx - n * x_mean ** 2
+        s_xx = np.where(s_xx > 0, s_xx, np.inf)
+    
+    valid = np.flatnonzero(n >= 2)
+    if valid.size == 0:
+        return pd.DataFrame()
+    
+    # Horizon arrays
+    steps = np.arange(1, horizon_days + 1, dtype=np.float64)
+    if origin is not None:
+        last_ts = np.full(n_series, pd.Timestamp(origin).as_unit('ns').value, dtype=np.int64)
+    last_x = ((last_ts - first_ts) / NS_PER_DAY)[valid]
+    x_future = last_x[:, None] + steps[None, :]
+    yhat = intercept[valid, None] + slope[valid, None] * x_future
+    
+    se = np.sqrt(sigma2[valid, None] * (
+        1.0 + 1.0 / n[valid, None] + (x_future - x_mean[valid, None]) ** 2 / s_xx[valid, None]
+    ))
+    if SCIPY_AVAILABLE:
+        quantile = scipy_stats.t.ppf((1 + interval) / 2, np.maximum(dof[valid], 1))
+    else:
+        quantile = np.full(valid.size, NormalDist().inv_cdf((1 + interval) / 2))
+    half_width = quantile[:, None] * se
+    
+    dates = last_ts[valid, None] + (np.arange(1, horizon_days + 1, dtype=np.int64) * NS_PER_DAY)[None, :]
+    
+    forecast_data = keys.iloc[np.repeat(valid, horizon_days)].reset_index(drop=True)
+    forecast_data['ds'] = dates.ravel().astype('datetime64[ns]')
+    forecast_data['yhat'] = yhat.ravel()
+    forecast_data['yhat_lower'] = (yhat - half_width).ravel()
+    forecast_data['yhat_upper'] = (yhat + half_width).ravel()
+    if include_residual_variance:
+        forecast_data['residual_variance'] = np.repeat(sigma2[valid], horizon_days)
+    
+    logger.info(f"Generated batched trend forecast for {valid.size} series x {horizon_days} days")
+    return forecast_data
+
+# ---------------- Hierarchical Forecasting ----------------
+def _summing_matrix(rows: List[np.ndarray], weights: List[np.ndarray], n_leaves: int):
+    """Aggregation matrix (one row per aggregate node), sparse when scipy is available"""
+    row_idx = np.concatenate([np.full(len(cols), i) for i, cols in enumerate(rows)])
+    col_idx = np.concatenate(rows)
+    data = np.concatenate(weights)
+    if SCIPY_AVAILABLE:
+        return scipy_sparse.csr_matrix((data, (row_idx, col_idx)), shape=(len(rows), n_leaves))
+    dense = np.zeros((len(rows), n_leaves))
+    dense[row_idx, col_idx] = data
+    return dense
+
+def _mint_reconcile(s_agg, y_agg: np.ndarray, w_agg: np.ndarray, y_leaf: np.ndarray, w_leaf: np.ndarray) -> np.ndarray:
+    """MinT (diagonal W) reconciled leaf forecasts.
+
+    Solves b = (S' W^-1 S)^-1 S' W^-1 y with S = [S_agg; I]. Because
+    S' W^-1 S = W_leaf^-1 + S_agg' W_agg^-1 S_agg is diagonal plus a rank-k
+    update (k = number of aggregate nodes), the Woodbury identity reduces the
+    solve to a k x k system, so no leaf x leaf matrix is ever formed.
+    """
+    rhs = s_agg.T @ (y_agg / w_agg[:, None]) + y_leaf / w_leaf[:, None]
+    d_inv_rhs = rhs * w_leaf[:, None]
+    if SCIPY_AVAILABLE:
+        inner = (s_agg @ scipy_sparse.diags(w_leaf) @ s_agg.T).toarray()
+    else:
+        inner = (s_agg * w_leaf[None, :]) @ s_agg.T
+    inner[np.diag_indices_from(inner)] += w_agg
+    correction = np.linalg.solve(inner, s_agg @ d_inv_rhs)
+    return d_inv_rhs - w_leaf[:, None] * np.asarray(s_agg.T @ correction)
+
+def hierarchical_forecast(
+    df: pd.DataFrame,
+    metric: str = 'DTRI',
+    horizon_days: int = 90,
+    method: str = 'bottom_up',
+    leaf_col: str = 'dealer_id',
+    aggregation: Optional[str] = None
+) -> pd.DataFrame:
+    """Coherent global -> vertical -> dealer forecasts for one metric.
+
+    Leaf (vertical x dealer) series are forecast in one batched trend fit on
+    daily buckets with a shared origin. Aggregates come from a summing matrix S:
+    ``bottom_up`` aggregates the leaf forecasts directly; ``mint`` also fits the
+    aggregate series (again in one batched call) and reconciles everything with
+    the MinT estimator using residual variances as a diagonal W.
+
+    ``aggregation`` is 'sum' (default for Revenue) or 'mean' (default for index
+    metrics such as DTRI). Without ``leaf_col`` in the frame, verticals are the
+    leaves. Returns level, vertical, leaf, ds, yhat, yhat_lower, yhat_upper;
+    aggregate bands assume independent leaf errors.
+    """
+    if method not in ('bottom_up', 'mint'):
+        raise ValueError(f"Unknown reconciliation method: {method}")
+    aggregation = aggregation or ('sum' if metric == 'Revenue' else 'mean')
+    leaf_cols = ['vertical', leaf_col] if leaf_col in df.columns else ['vertical']
+
+    data = df.loc[df['metric'] == metric, [*leaf_cols, 'timestamp', 'score']].dropna()
+    if data.empty:
+        return pd.DataFrame()
+    data['timestamp'] = data['timestamp'].dt.floor('D')
+    daily = data.groupby([*leaf_cols, 'timestamp'], observed=True, sort=False)['score'].mean().reset_index()
+    origin = daily['timestamp'].max()
+
+    # Batched base forecasts at the leaves
+    base = batch_trend_forecast(daily, series_cols=leaf_cols, horizon_days=horizon_days,
+                                origin=origin, include_residual_variance=True)
+    if base.empty:
+        return pd.DataFrame()
+    leaves = base.iloc[::horizon_days][leaf_cols].reset_index(drop=True)
+    n_leaves = len(leaves)
+    y_leaf = base['yhat'].to_numpy().reshape(n_leaves, horizon_days)
+    hw_leaf = (base['yhat_upper'] - base['yhat']).to_numpy().reshape(n_leaves, horizon_days)
+    w_leaf = np.maximum(base['residual_variance'].to_numpy()[::horizon_days], 1e-9)
+    ds = base['ds'].to_numpy()[:horizon_days]
+
+    # Summing matrix: global row, then one row per vertical when dealers are the leaves
+    node_names = ['global']
+    rows = [np.arange(n_leaves)]
+    if len(leaf_cols) > 1:
+        vertical_codes, vertical_names = pd.factorize(leaves['vertical'].astype(str))
+        for code, name in enumerate(vertical_names):
+            node_names.append(name)
+            rows.append(np.flatnonzero(vertical_codes == code))
+    weights = [np.full(len(r), 1.0 if aggregation == 'sum' else 1.0 / len(r)) for r in rows]
+    s_agg = _summing_matrix(rows, weights, n_leaves)
+
+    if method == 'mint':
+        leaf_index = pd.MultiIndex.from_frame(leaves) if len(leaf_cols) > 1 else pd.Index(leaves['vertical'])
+        daily_leaf = daily.set_index(leaf_cols).index
+        positions = leaf_index.get_indexer(daily_leaf)
+        node_frames = []
+        for node, cols in zip(node_names, rows):
+            node_daily = daily.loc[np.isin(positions, cols), ['timestamp', 'score']]
+            agg = node_daily.groupby('timestamp')['score'].agg(aggregation).reset_index()
+            node_frames.append(agg.assign(node=node))
+        agg_base = batch_trend_forecast(pd.concat(node_frames, ignore_index=True), series_cols=['node'],
+                                        horizon_days=horizon_days, origin=origin, include_residual_variance=True)
+        fitted_nodes = agg_base.iloc[::horizon_days]['node'].tolist() if not agg_base.empty else []
+        keep = [node_names.index(n) for n in fitted_nodes]
+        if keep:
+            y_agg = agg_base['yhat'].to_numpy().reshape(len(keep), horizon_days)
+            w_agg = np.maximum(agg_base['residual_variance'].to_numpy()[::horizon_days], 1e-9)
+            y_leaf = _mint_reconcile(s_agg[keep], y_agg, w_agg, y_leaf, w_leaf)
+
+    y_agg_rec = np.asarray(s_agg @ y_leaf)
+    hw_agg = np.sqrt(np.asarray(s_agg.multiply(s_agg) @ hw_leaf ** 2) if SCIPY_AVAILABLE
+                     else (s_agg ** 2) @ hw_leaf ** 2)
+
+    frames = []
+    for i, node in enumerate(node_names):
+        frames.append(pd.DataFrame({
+            'level': 'global' if i == 0 else 'vertical',
+            'vertical': node,
+            'leaf': None,
+            'ds': ds,
+            'yhat': y_agg_rec[i],
+            'yhat_lower': y_agg_rec[i] - hw_agg[i],
+            'yhat_upper': y_agg_rec[i] + hw_agg[i]
+        }))
+    leaf_names = leaves[leaf_cols[-1]].astype(str).to_numpy()
+    frames.append(pd.DataFrame({
+        'level': 'leaf',
+        'vertical': np.repeat(leaves['vertical'].astype(str).to_numpy(), horizon_days),
+        'leaf': np.repeat(leaf_names, horizon_days),
+        'ds': np.tile(ds, n_leaves),
+        'yhat': y_leaf.ravel(),
+        'yhat_lower': (y_leaf - hw_leaf).ravel(),
+        'yhat_upper': (y_leaf + hw_leaf).ravel()
+    }))
+
+    logger.info(f"Generated {method} hierarchical forecast for {metric}: "
+                f"{n_leaves} leaves, {len(node_names)} aggregate nodes")
+    return pd.concat(frames, ignore_index=True)
+
+# ---------------- Feature Store ----------------
+PEE_FEATURE_STORE_DIR = Path(os.getenv("PEE_FEATURE_STORE_DIR", str(Path(__file__).parent / "features")))
+
+FEATURE_STORE_METRICS = ['DTRI', 'QAI', 'EEAT', 'PIQR', 'Revenue']
+
+def _ffill_rows(values: np.ndarray) -> np.ndarray:
+    """Forward-fill NaNs down each column of a 2D array"""
+    idx = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    return values[idx, np.arange(values.shape[1])]
+
+class FeatureStore:
+    """Wide timestamp x metric matrix per vertical, kept as memory-mapped arrays.
+
+    New events are pivoted on their own and forward-filled from the last stored
+    row, so appending costs O(new events) instead of re-pivoting the history.
+    Rows are append-only: events at or before the stored high-water timestamp
+    are dropped with a warning. Views start at the first row where every metric has been seen,
+    so they are complete (no NaNs) and returned without copying.
+    """
+
+    def __init__(self, root: Optional[Path] = None, metrics: Optional[List[str]] = None):
+        self.root = Path(root or PEE_FEATURE_STORE_DIR)
+        self.metrics = list(metrics or FEATURE_STORE_METRICS)
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _dir(self, vertical: str) -> Path:
+        return self.root / _registry_key(vertical)
+
+    def meta(self, vertical: str) -> Dict[str, Any]:
+        meta_path = self._dir(vertical) / "meta.json"
+        if meta_path.exists():
+            with open(meta_path) as f:
+                return json.load(f)
+        return {"n_rows": 0, "capacity": 0, "last_ts": None, "first_complete": None,
+                "seen": [False] * len(self.metrics)}
+
+    def _write_meta(self, vertical: str, meta: Dict[str, Any]):
+        meta_path = self._dir(vertical) / "meta.json"
+        tmp_path = meta_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def _open(self, vertical: str, capacity: int) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._arrays.get(vertical)
+        if cached is not None and cached[0].shape[0] == capacity:
+            return cached
+        vertical_dir = self._dir(vertical)
+        arrays = (
+            np.lib.format.open_memmap(vertical_dir / "timestamps.npy", mode='r+'),
+            np.lib.format.open_memmap(vertical_dir / "values.npy", mode='r+')
+        )
+        self._arrays[vertical] = arrays
+        return arrays
+
+    def _grow(self, vertical: str, meta: Dict[str, Any], needed: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Reallocate the backing files with doubled capacity"""
+        capacity = max(1024, meta["capacity"])
+        while capacity < needed:
+            capacity *= 2
+        vertical_dir = self._dir(vertical)
+        vertical_dir.mkdir(parents=True, exist_ok=True)
+        n_rows = meta["n_rows"]
+
+        new_ts = np.lib.format.open_memmap(vertical_dir / "timestamps.npy.tmp", mode='w+',
+                                           dtype=np.int64, shape=(capacity,))
+        new_values = np.lib.format.open_memmap(vertical_dir / "values.npy.tmp", mode='w+',
+                                               dtype=np.float64, shape=(capacity, len(self.metrics)))
+        if n_rows:
+            old_ts, old_values = self._open(vertical, meta["capacity"])
+            new_ts[:n_rows] = old_ts[:n_rows]
+            new_values[:n_rows] = old_values[:n_rows]
+        new_ts.flush()
+        new_values.flush()
+        del new_ts, new_values
+        self._arrays.pop(vertical, None)
+
+        os.replace(vertical_dir / "timestamps.npy.tmp", vertical_dir / "timestamps.npy")
+        os.replace(vertical_dir / "values.npy.tmp", vertical_dir / "values.npy")
+        meta["capacity"] = capacity
+        return self._open(vertical, capacity)
+
+    def append(self, vertical: str, df: pd.DataFrame) -> int:
+        """Append events newer than the stored high-water mark; returns rows added"""
+        meta = self.meta(vertical)
+        n_rows = meta["n_rows"]
+
+        events = df[df['metric'].isin(self.metrics)]
+        if meta["last_ts"] is not None:
+            ts_ns = events['timestamp'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+            late = ts_ns <= meta["last_ts"]
+            if late.any():
+                logger.warning(f"Feature store for {vertical} dropped {int(late.sum())} late events "
+                               f"at or before {pd.Timestamp(meta['last_ts'])}")
+            events = events[~late]
+        if events.empty:
+            return 0
+
+        wide = events.pivot_table(
+            index='timestamp',
+            columns='metric',
+            values='score',
+            aggfunc='mean',
+            observed=True
+        ).reindex(columns=self.metrics)
+        block = wide.to_numpy(dtype=np.float64)
+        block_ts = wide.index.to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        if n_rows:
+            timestamps, values = self._open(vertical, meta["capacity"])
+            block = _ffill_rows(np.vstack([values[n_rows - 1:n_rows], block]))[1:]
+        else:
+            block = _ffill_rows(block)
+
+        if n_rows + len(block) > meta["capacity"]:
+            timestamps, values = self._grow(vertical, meta, n_rows + len(block))
+        else:
+            timestamps, values = self._open(vertical, meta["capacity"])
+
+        timestamps[n_rows:n_rows + len(block)] = block_ts
+        values[n_rows:n_rows + len(block)] = block
+        timestamps.flush()
+        values.flush()
+
+        if meta["first_complete"] is None:
+            complete = np.flatnonzero(~np.isnan(block).any(axis=1))
+            if complete.size:
+                meta["first_complete"] = n_rows + int(complete[0])
+        meta["seen"] = [bool(seen or not np.isnan(block[:, i]).all()) for i, seen in enumerate(meta["seen"])]
+        meta["n_rows"] = n_rows + len(block)
+        meta["last_ts"] = int(block_ts[-1])
+        self._write_meta(vertical, meta)
+        return len(block)
+
+    def view(self, vertical: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Zero-copy (timestamps_ns, values) views over the complete rows"""
+        meta = self.meta(vertical)
+        if not meta["n_rows"] or meta["first_complete"] is None:
+            return np.empty(0, dtype=np.int64), np.empty((0, len(self.metrics)))
+        timestamps, values = self._open(vertical, meta["capacity"])
+        start, end = meta["first_complete"], meta["n_rows"]
+        return timestamps[start:end], values[start:end]
+
+    def features(self, vertical: str, features: List[str], target: str) -> Tuple[pd.DataFrame, pd.Series]:
+        """Feature matrix and target over the complete rows, backed by the memory map"""
+        timestamps, values = self.view(vertical)
+        index = pd.DatetimeIndex(timestamps.view('datetime64[ns]'), name='timestamp')
+        feature_idx = [self.metrics.index(f) for f in features]
+        if feature_idx == list(range(feature_idx[0], feature_idx[0] + len(feature_idx))):
+            X = pd.DataFrame(values[:, feature_idx[0]:feature_idx[-1] + 1], index=index, columns=features, copy=False)
+        else:
+            X = pd.DataFrame(values[:, feature_idx], index=index, columns=features)
+        y = pd.Series(values[:, self.metrics.index(target)], index=index, name=target, copy=False)
+        return X, y
+
+    def missing(self, vertical: str, metrics: List[str]) -> List[str]:
+        seen = dict(zip(self.metrics, self.meta(vertical)["seen"]))
+        return [m for m in metrics if not seen.get(m, False)]
+
+    def drop(self, vertical: str):
+        """Forget a vertical's rows so the next append rebuilds it from scratch"""
+        self._arrays.pop(vertical, None)
+        shutil.rmtree(self._dir(vertical), ignore_errors=True)
+
+_feature_store: Optional[FeatureStore] = None
+
+def feature_store() -> FeatureStore:
+    """Process-wide PEE feature store"""
+    global _feature_store
+    if _feature_store is None:
+        _feature_store = FeatureStore()
+    return _feature_store
+
+# ---------------- XGBoost Model Registry ----------------
+PEE_XGB_LRU_SIZE = int(os.getenv("PEE_XGB_LRU_SIZE", "16"))
+PEE_XGB_INCREMENTAL_ROUNDS = int(os.getenv("PEE_XGB_INCREMENTAL_ROUNDS", "50"))
+# Continued boosting trains on a trailing window that includes older rows and is
+# judged on the newest PEE_XGB_HOLDOUT_ROWS rows, which it doesn't train on; past
+# PEE_XGB_MAX_TREES trees or PEE_XGB_REFIT_DAYS since the last full fit, refit
+PEE_XGB_WINDOW_ROWS = int(os.getenv("PEE_XGB_WINDOW_ROWS", "500"))
+PEE_XGB_HOLDOUT_ROWS = int(os.getenv("PEE_XGB_HOLDOUT_ROWS", "20"))
+PEE_XGB_HOLDOUT_TOLERANCE = float(os.getenv("PEE_XGB_HOLDOUT_TOLERANCE", "0.05"))
+PEE_XGB_MAX_TREES = int(os.getenv("PEE_XGB_MAX_TREES", "600"))
+PEE_XGB_REFIT_DAYS = float(os.getenv("PEE_XGB_REFIT_DAYS", "7"))
+
+XGB_FEATURES = ['DTRI', 'QAI', 'EEAT', 'PIQR']
+XGB_TARGET = 'Revenue'
+
+class XGBoostModelRegistry:
+    """Local disk registry of per-vertical XGBoost boosters with an in-memory LRU.
+
+    Each entry holds the booster, its feature schema and a training watermark
+    (the latest timestamp it has been trained on), so later calls can continue
+    boosting on newer rows only, or predict without retraining at all.
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_in_memory: int = PEE_XGB_LRU_SIZE):
+        self.root = Path(root or PEE_MODEL_DIR) / "xgboost"
+        self.max_in_memory = max(1, max_in_memory)
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _paths(self, vertical: str) -> Tuple[Path, Path]:
+        key = _registry_key(vertical)
+        return self.root / f"{key}.model.json", self.root / f"{key}.meta.json"
+
+    def _remember(self, vertical: str, entry: Dict[str, Any]):
+        self._cache[vertical] = entry
+        self._cache.move_to_end(vertical)
+        while len(self._cache) > self.max_in_memory:
+            self._cache.popitem(last=False)
+
+    def get(self, vertical: str) -> Optional[Dict[str, Any]]:
+        if vertical in self._cache:
+            self._cache.move_to_end(vertical)
+            return self._cache[vertical]
+
+        model_path, meta_path = self._paths(vertical)
+        if not model_path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path) as f:
+                entry = json.load(f)
+            model = XGBRegressor()
+            model.load_model(str(model_path))
+            entry["model"] = model
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable XGBoost registry entry for {vertical}: {e}")
+            return None
+
+        self._remember(vertical, entry)
+        return entry
+
+    def put(self, vertical: str, model: "XGBRegressor", features: List[str],
+            watermark: pd.Timestamp, model_score: float, n_rows: int,
+            full_fit_at: Optional[str] = None) -> Dict[str, Any]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        model_path, meta_path = self._paths(vertical)
+        now = datetime.utcnow().isoformat()
+        meta = {
+            "vertical": vertical,
+            "features": list(features),
+            "watermark": pd.Timestamp(watermark).isoformat(),
+            "model_score": model_score,
+            "n_rows": n_rows,
+            "n_trees": int(model.get_booster().num_boosted_rounds()),
+            "full_fit_at": full_fit_at or now,
+            "saved_at": now
+        }
+        model.save_model(str(model_path))
+        tmp_path = meta_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+        entry = dict(meta, model=model)
+        self._remember(vertical, entry)
+        return entry
+
+    def drop(self, vertical: str):
+        self._cache.pop(vertical, None)
+        for path in self._paths(vertical):
+            path.unlink(missing_ok=True)
+
+_xgboost_registry: Optional[XGBoostModelRegistry] = None
+
+def xgboost_registry() -> XGBoostModelRegistry:
+    """Process-wide XGBoost model registry"""
+    global _xgboost_registry
+    if _xgboost_registry is None:
+        _xgboost_registry = XGBoostModelRegistry()
+    return _xgboost_registry
+
 # ---------------- XGBoost Model ----------------
-def xgboost_predict(df: pd.DataFrame) -> Optional[Dict[str, Any]]:
-    """Train XGBoost model and predict revenue"""
+def _new_xgboost_model(n_estimators: int = 300) -> "XGBRegressor":
+    return XGBRegressor(
+        n_estimators=n_estimators,
+        learning_rate=0.08,
+        max_depth=4,
+        random_state=42
+    )
+
+def _continue_xgboost(entry: Dict[str, Any], X: pd.DataFrame, y: pd.Series,
+                      vertical: str) -> Tuple[Optional["XGBRegressor"], float]:
+    """Continue boosting the saved booster; (None, 0.0) when a full refit is due"""
+    booster = entry["model"].get_booster()
+    n_trees = booster.num_boosted_rounds()
+    if n_trees + PEE_XGB_INCREMENTAL_ROUNDS > PEE_XGB_MAX_TREES:
+        logger.info(f"XGBoost for {vertical} has {n_trees} trees, refitting")
+        return None, 0.0
+    full_fit_at = entry.get("full_fit_at")
+    if full_fit_at is None or datetime.utcnow() - datetime.fromisoformat(full_fit_at) > timedelta(days=PEE_XGB_REFIT_DAYS):
+        logger.info(f"XGBoost for {vertical} is due its scheduled full refit")
+        return None, 0.0
+    
+    # Train on a trailing window (old rows included, so the new trees don't
+    # overfit the append) and judge both boosters on the newest rows
+    holdout = max(1, min(PEE_XGB_HOLDOUT_ROWS, len(X) // 5))
+    X_train, y_train = X.iloc[:-holdout].tail(PEE_XGB_WINDOW_ROWS), y.iloc[:-holdout].tail(PEE_XGB_WINDOW_ROWS)
+    X_holdout, y_holdout = X.iloc[-holdout:], y.iloc[-holdout:]
+    candidate = _new_xgboost_model(PEE_XGB_INCREMENTAL_ROUNDS)
+    candidate.fit(X_train, y_train, xgb_model=booster)
+    
+    saved_error = float(np.mean((entry["model"].predict(X_holdout) - y_holdout.to_numpy()) ** 2))
+    candidate_error = float(np.mean((candidate.predict(X_holdout) - y_holdout.to_numpy()) ** 2))
+    if candidate_error > saved_error * (1 + PEE_XGB_HOLDOUT_TOLERANCE):
+        logger.info(f"Continued XGBoost for {vertical} regressed on the newest {holdout} rows "
+                    f"(MSE {candidate_error:.3f} > {saved_error:.3f}), refitting")
+        return None, 0.0
+    
+    logger.info(f"Continued XGBoost for {vertical} to {n_trees + PEE_XGB_INCREMENTAL_ROUNDS} trees")
+    return candidate, float(candidate.score(X, y))
+
+def xgboost_predict(df: pd.DataFrame, vertical: Optional[str] = None, retrain: bool = True) -> Optional[Dict[str, Any]]:
+    """Predict revenue with the vertical's XGBoost model.
+
+    Features come from the vertical's feature store (see FeatureStore), so only
+    events newer than the stored rows are pivoted. The booster is kept in the
+    model registry. With ``retrain`` a known model is reused as-is when there are
+    no rows past its watermark. Otherwise it continues boosting on a trailing
+    window of the history, holding out the newest rows; the continuation is kept
+    only if its error on that slice is within PEE_XGB_HOLDOUT_TOLERANCE of the
+    saved booster's. A regression, a booster that would exceed
+    PEE_XGB_MAX_TREES, a full fit older than PEE_XGB_REFIT_DAYS, a new vertical
+    or a changed feature schema mean a full refit. Without ``retrain`` the
+    stored booster only scores.
+    """
     if not XGBOOST_AVAILABLE:
         logger.warning("XGBoost not available, using simple regression")
         return simple_revenue_prediction(df)
     
     try:
-        # Pivot data to wide format
-        pivot = df.pivot_table(
-            index='timestamp',
-            columns='metric',
-            values='score',
-            aggfunc='mean'
-        ).fillna(method='ffill')
+        if vertical is None:
+            vertical = str(df['vertical'].iloc[0]) if 'vertical' in df.columns else 'global'
         
-        # Define features and target
-        features = ['DTRI', 'QAI', 'EEAT', 'PIQR']
-        target = 'Revenue'
+        # Append the vertical's new events to its wide feature store and take views over it
+        if vertical != 'global' and 'vertical' in df.columns:
+            df = df[df['vertical'] == vertical]
+        features = XGB_FEATURES
+        target = XGB_TARGET
+        store = feature_store()
+        store.append(vertical, df)
         
         # Check if required columns exist
-        missing_features = [f for f in features if f not in pivot.columns]
+        missing_features = store.missing(vertical, features)
         if missing_features:
             logger.warning(f"Missing features for XGBoost: {missing_features}")
             return simple_revenue_prediction(df)
         
-        if target not in pivot.columns:
+        if store.missing(vertical, [target]):
             logger.warning(f"Target variable '{target}' not found")
             return None
         
-        if len(pivot) < 10:
-            logger.warning(f"Insufficient data for XGBoost: {len(pivot)} rows")
+        X, y = store.features(vertical, features, target)
+        if len(X) < 10:
+            logger.warning(f"Insufficient data for XGBoost: {len(X)} rows")
             return simple_revenue_prediction(df)
         
-        # Prepare data
-        X = pivot[features].fillna(pivot[features].mean())
-        y = pivot[target].fillna(pivot[target].mean())
-        
-        # Train model
-        model = XGBRegressor(
-            n_estimators=300,
-            learning_rate=0.08,
-            max_depth=4,
-            random_state=42
-        )
+        registry = xgboost_registry()
+        entry = registry.get(vertical)
+        if entry and entry.get("features") != features:
+            logger.info(f"Feature schema changed for {vertical}, retraining XGBoost from scratch")
+            entry = None
         
-        model.fit(X, y)
+        if entry and not retrain:
+            # Prediction only: reuse the loaded booster
+            model = entry["model"]
+            model_score = entry.get("model_score", 0.0)
+        elif entry and not (X.index > pd.Timestamp(entry["watermark"])).any():
+            model = entry["model"]
+            model_score = entry.get("model_score", 0.0)
+        else:
+            model = None
+            full_fit_at = None
+            if entry:
+                model, model_score = _continue_xgboost(entry, X, y, vertical)
+                full_fit_at = entry.get("full_fit_at")
+            
+            if model is None:
+                # Train model
+                model = _new_xgboost_model()
+                model.fit(X, y)
+                model_score = float(model.score(X, y))
+                full_fit_at = None
+            registry.put(vertical, model, features, X.index.max(), model_score, len(X), full_fit_at)
         
         # Get predictions and feature importance
         predicted_revenue = float(model.predict(X.tail(1))[0])
-        importance = dict(zip(features, model.feature_importances_))
+        importance = {f: float(w) for f, w in zip(features, model.feature_importances_)}
         
         logger.info(f"XGBoost prediction complete. Revenue: {predicted_revenue:.2f}")
         return {
             "importance": importance,
             "predicted_revenue": predicted_revenue,
-            "model_score": float(model.score(X, y))
+            "model_score": model_score
         }
         
     except Exception as e:
@@ -309,11 +1207,272 @@ def simple_revenue_prediction(df: pd.DataFrame) -> Optional[Dict[str, Any]]:
         logger.error(f"Error in simple revenue prediction: {e}")
         return None
 
+# ---------------- What-if Scenarios ----------------
+def _scenario_matrix(scenarios: Any, features: List[str]) -> np.ndarray:
+    """Delta matrix (n_scenarios x n_features) from a grid dict or a list of delta dicts"""
+    if isinstance(scenarios, dict):
+        axes = [np.atleast_1d(np.asarray(scenarios.get(f, [0.0]), dtype=np.float64)) for f in features]
+        mesh = np.meshgrid(*axes, indexing='ij')
+        return np.column_stack([m.ravel() for m in mesh])
+    return np.array([[float(s.get(f, 0.0)) for f in features] for s in scenarios], dtype=np.float64).reshape(-1, len(features))
+
+def simulate_scenarios(
+    vertical: str,
+    scenarios: Any,
+    df: Optional[pd.DataFrame] = None,
+    elasticity: Optional[float] = None
+) -> pd.DataFrame:
+    """Score what-if feature deltas against the vertical's cached revenue model.
+
+    ``scenarios`` is either a grid (``{"DTRI": [0, 5, 10], "EEAT": [0, 3]}``,
+    expanded to the cartesian product) or a list of delta dicts. Each scenario
+    is applied to the latest feature row in the feature store and all of them
+    are scored in one batched predict with the registry's booster; nothing is
+    retrained. When ``df`` is given it is appended to the feature store first
+    (and trains the model if the vertical has none).
+
+    Returns the deltas with predicted_revenue, revenue_delta (model vs. the
+    unchanged row) and elasticity_revenue_delta (latest Revenue x elasticity x
+    relative DTRI change) side by side.
+    """
+    features = XGB_FEATURES
+    deltas = _scenario_matrix(scenarios, features)
+
+    store = feature_store()
+    if df is not None and vertical != 'global' and 'vertical' in df.columns:
+        df = df[df['vertical'] == vertical]
+    if df is not None and not df.empty:
+        store.append(vertical, df)
+    timestamps, values = store.view(vertical)
+    if not len(timestamps):
+        raise ValueError(f"No feature history for vertical {vertical}")
+    latest = values[-1]
+    feature_idx = [store.metrics.index(f) for f in features]
+    base_row = latest[feature_idx]
+    latest_revenue = float(latest[store.metrics.index(XGB_TARGET)])
+
+    entry = xgboost_registry().get(vertical) if XGBOOST_AVAILABLE else None
+    if entry is None and df is not None and XGBOOST_AVAILABLE:
+        xgboost_predict(df, vertical)
+        entry = xgboost_registry().get(vertical)
+
+    rows = np.vstack([base_row, base_row[None, :] + deltas])
+    if entry is not None:
+        predictions = entry["model"].predict(pd.DataFrame(rows, columns=features))
+        baseline = float(predictions[0])
+        predicted = predictions[1:].astype(np.float64)
+    else:
+        logger.warning(f"No revenue model for {vertical}, returning elasticity estimates only")
+        baseline = latest_revenue
+        predicted = np.full(len(deltas), np.nan)
+
+    if elasticity is None:
+        if df is not None and not df.empty:
+            elasticity = calc_elasticity(df, vertical)
+        elif PYARROW_AVAILABLE:
+            elasticity = result_store().latest_elasticity(vertical).get(vertical, {}).get("elasticity", 0.0)
+        else:
+            elasticity = 0.0
+
+    dtri_idx = features.index('DTRI')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dtri_rel_change = deltas[:, dtri_idx] / base_row[dtri_idx] if base_row[dtri_idx] else np.zeros(len(deltas))
+
+    result = pd.DataFrame(deltas, columns=[f"delta_{f}" for f in features])
+    result['predicted_revenue'] = predicted
+    result['revenue_delta'] = predicted - baseline
+    result['elasticity_revenue_delta'] = latest_revenue * float(elasticity) * dtri_rel_change
+    result.attrs.update({"vertical": vertical, "baseline_revenue": baseline, "elasticity": float(elasticity)})
+
+    logger.info(f"Simulated {len(result)} scenarios for {vertical}")
+    return result
+
 # ---------------- Persistence ----------------
+PEE_PERSIST_BATCH_SIZE = int(os.getenv("PEE_PERSIST_BATCH_SIZE", "500"))
+PEE_PERSIST_FLUSH_SECONDS = float(os.getenv("PEE_PERSIST_FLUSH_SECONDS", "5"))
+PEE_OUTBOX_CLAIM_SECONDS = float(os.getenv("PEE_OUTBOX_CLAIM_SECONDS", "300"))
+PEE_OUTBOX_PATH = Path(os.getenv("PEE_OUTBOX_PATH", str(Path(__file__).parent / "output" / "pee_outbox.sqlite3")))
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+def shared_supabase_client() -> Optional[Client]:
+    """Supabase client reused for the life of the process"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = supabase_client()
+        return _shared_client
+
+class SupabaseSink:
+    """Writes batches to Supabase tables"""
+
+    def __init__(self, client: Client):
+        self.client = client
+
+    def write(self, table: str, rows: List[Dict[str, Any]]):
+        self.client.table(table).upsert(rows).execute()
+
+class SQLiteSink:
+    """Local stand-in for the remote store; each table holds JSON rows"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def write(self, table: str, rows: List[Dict[str, Any]]):
+        with sqlite3.connect(self.path) as conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (id INTEGER PRIMARY KEY AUTOINCREMENT, row TEXT NOT NULL)')
+            conn.executemany(f'INSERT INTO "{table}" (row) VALUES (?)', [(json.dumps(r),) for r in rows])
+
+class ResultWriter:
+    """Write-behind persistence for PEE results.
+
+    Rows are appended to a local SQLite outbox (so they survive crashes and
+    remote outages) and a background thread drains it into the sink as
+    size-bounded bulk upserts, per table, whenever a batch fills up or the flush
+    interval elapses. Rows are only removed from the outbox after the sink
+    accepts them; failed batches are retried on the next flush. Batches are
+    claimed before sending, so several processes can share one outbox without
+    double-writing.
+    """
+
+    def __init__(self, sink: Any, outbox_path: Path = PEE_OUTBOX_PATH,
+                 batch_size: int = PEE_PERSIST_BATCH_SIZE, flush_seconds: float = PEE_PERSIST_FLUSH_SECONDS):
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self.outbox_path = Path(outbox_path)
+        self.outbox_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._conn = sqlite3.connect(str(self.outbox_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, table_name TEXT NOT NULL, "
+            "payload TEXT NOT NULL, created_at TEXT NOT NULL, "
+            "claimed_by TEXT, claimed_at REAL)"
+        )
+        self._conn.commit()
+        self._claim_token = f"{os.getpid()}-{id(self)}"
+        self._thread = threading.Thread(target=self._run, name="pee-result-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, table: str, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        now = datetime.utcnow().isoformat()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO outbox (table_name, payload, created_at) VALUES (?, ?, ?)",
+                [(table, json.dumps(row, default=str), now) for row in rows]
+            )
+            self._conn.commit()
+        if self.pending() >= self.batch_size:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def flush(self) -> int:
+        """Drain the outbox into the sink; returns rows written"""
+        with self._flush_lock:
+            return self._flush_tables()
+
+    def _flush_tables(self) -> int:
+        written = 0
+        with self._lock:
+            tables = [r[0] for r in self._conn.execute("SELECT DISTINCT table_name FROM outbox")]
+        for table in tables:
+            while True:
+                with self._lock:
+                    now = time.time()
+                    self._conn.execute(
+                        "UPDATE outbox SET claimed_by = ?, claimed_at = ? WHERE id IN ("
+                        "SELECT id FROM outbox WHERE table_name = ? "
+                        "AND (claimed_by IS NULL OR claimed_at < ?) ORDER BY id LIMIT ?)",
+                        (self._claim_token, now, table, now - PEE_OUTBOX_CLAIM_SECONDS, self.batch_size)
+                    )
+                    self._conn.commit()
+                    batch = self._conn.execute(
+                        "SELECT id, payload FROM outbox WHERE claimed_by = ? AND table_name = ? ORDER BY id",
+                        (self._claim_token, table)
+                    ).fetchall()
+                if not batch:
+                    break
+                try:
+                    self.sink.write(table, [json.loads(payload) for _, payload in batch])
+                except Exception as e:
+                    logger.error(f"Flush to {table} failed, {len(batch)} rows kept in outbox: {e}")
+                    with self._lock:
+                        self._conn.execute(
+                            "UPDATE outbox SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = ?",
+                            (self._claim_token,)
+                        )
+                        self._conn.commit()
+                    break
+                with self._lock:
+                    self._conn.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id, _ in batch])
+                    self._conn.commit()
+                written += len(batch)
+        if written:
+            logger.info(f"Flushed {written} result rows")
+        return written
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Result writer flush error: {e}")
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        self._thread.join(timeout=self.flush_seconds + 5)
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+_result_writer: Optional[ResultWriter] = None
+_result_writer_lock = threading.Lock()
+
+def result_writer() -> Optional[ResultWriter]:
+    """Process-wide result writer, or None when no remote store is configured.
+
+    PEE_RESULT_SINK=sqlite:///path/to/db.sqlite3 selects the local SQLite
+    stand-in; otherwise results go to Supabase.
+    """
+    global _result_writer
+    with _result_writer_lock:
+        if _result_writer is None:
+            sink_url = os.getenv("PEE_RESULT_SINK", "")
+            if sink_url.startswith("sqlite:///"):
+                sink = SQLiteSink(sink_url[len("sqlite:///"):])
+            else:
+                sb = shared_supabase_client()
+                if not sb:
+                    return None
+                sink = SupabaseSink(sb)
+            _result_writer = ResultWriter(sink)
+            atexit.register(_result_writer.close)
+        return _result_writer
+
+def flush_results():
+    """Synchronously drain any buffered result rows"""
+    writer = result_writer()
+    if writer:
+        writer.flush()
+
 def persist_results(vertical: str, elasticity: float, forecast_df: pd.DataFrame, xgboost_out: Optional[Dict[str, Any]]):
-    """Persist results to Supabase"""
-    sb = supabase_client()
-    if not sb:
+    """Queue results for write-behind persistence to Supabase"""
+    writer = result_writer()
+    if not writer:
         logger.warning("Supabase not available, saving to local file")
         save_results_locally(vertical, elasticity, forecast_df, xgboost_out)
         return
@@ -321,18 +1480,16 @@ def persist_results(vertical: str, elasticity: float, forecast_df: pd.DataFrame,
     try:
         now = datetime.utcnow().isoformat()
         
-        # 1. Save elasticity coefficient
-        elasticity_result = sb.table("elasticity_coefficients").insert({
+        # 1. Elasticity coefficient
+        writer.enqueue("elasticity_coefficients", [{
             "vertical": vertical,
             "elasticity": elasticity,
             "timestamp": now
-        }).execute()
-        
-        logger.info(f"Saved elasticity coefficient for {vertical}: {elasticity}")
+        }])
         
-        # 2. Save forecast (batch insert)
+        # 2. Forecast (flushed in size-bounded batches)
         if not forecast_df.empty:
-            forecast_records = [
+            writer.enqueue("dtri_forecast", [
                 {
                     "vertical": row.vertical,
                     "forecast_date": row.ds.isoformat(),
@@ -342,29 +1499,172 @@ def persist_results(vertical: str, elasticity: float, forecast_df: pd.DataFrame,
                     "created_at": now
                 }
                 for row in forecast_df.itertuples()
-            ]
-            
-            forecast_result = sb.table("dtri_forecast").insert(forecast_records).execute()
-            logger.info(f"Saved {len(forecast_records)} forecast points for {vertical}")
+            ])
         
-        # 3. Save revenue prediction
+        # 3. Revenue prediction
         if xgboost_out:
-            revenue_result = sb.table("revenue_predictions").insert({
+            writer.enqueue("revenue_predictions", [{
                 "vertical": vertical,
                 "predicted_revenue": xgboost_out["predicted_revenue"],
                 "feature_weights": json.dumps(xgboost_out["importance"]),
                 "model_score": xgboost_out.get("model_score", 0.0),
                 "timestamp": now
-            }).execute()
-            
-            logger.info(f"Saved revenue prediction for {vertical}: {xgboost_out['predicted_revenue']:.2f}")
+            }])
+        
+        logger.info(f"Queued results for {vertical} ({len(forecast_df)} forecast points)")
         
     except Exception as e:
-        logger.error(f"Error persisting results to Supabase: {e}")
+        logger.error(f"Error queueing results for persistence: {e}")
         save_results_locally(vertical, elasticity, forecast_df, xgboost_out)
 
+# ---------------- Local Result Store ----------------
+PEE_RESULT_STORE_DIR = Path(os.getenv("PEE_RESULT_STORE_DIR", str(Path(__file__).parent / "output" / "store")))
+
+class ResultStore:
+    """Append-only Parquet store for PEE results, partitioned by vertical and run date.
+
+    Layout: ``<root>/<dataset>/vertical=<v>/date=<YYYY-MM-DD>/part-*.parquet`` for
+    the ``elasticity``, ``forecast`` and ``revenue_predictions`` datasets. Columns
+    are typed (timestamps as timestamp[us, UTC], scores as float64), and queries
+    go through pyarrow datasets so only the matching partitions and the
+    requested columns are read.
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or PEE_RESULT_STORE_DIR)
+
+    @staticmethod
+    def _partitioning():
+        return pa_dataset.partitioning(
+            pa.schema([('vertical', pa.string()), ('date', pa.string())]),
+            flavor='hive'
+        )
+
+    def _write(self, dataset: str, vertical: str, run_ts: pd.Timestamp, table: "pa.Table"):
+        partition = self.root / dataset / f"vertical={quote(vertical, safe='')}" / f"date={run_ts.strftime('%Y-%m-%d')}"
+        partition.mkdir(parents=True, exist_ok=True)
+        name = f"part-{run_ts.strftime('%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = partition / f".{name}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, partition / name)
+
+    def write(self, vertical: str, elasticity: float, forecast_df: pd.DataFrame,
+              xgboost_out: Optional[Dict[str, Any]], run_ts: Optional[pd.Timestamp] = None):
+        run_ts = pd.Timestamp(run_ts or datetime.utcnow())
+        if run_ts.tz is not None:
+            run_ts = run_ts.tz_convert('UTC').tz_localize(None)
+        run_ts_utc = run_ts.tz_localize('UTC')
+        ts_type = pa.timestamp('us', tz='UTC')
+
+        self._write("elasticity", vertical, run_ts, pa.table({
+            "timestamp": pa.array([run_ts_utc], type=ts_type),
+            "elasticity": pa.array([float(elasticity)], type=pa.float64())
+        }))
+
+        if not forecast_df.empty:
+            ds = pd.to_datetime(forecast_df['ds'])
+            ds = ds.dt.tz_localize('UTC') if ds.dt.tz is None else ds.dt.tz_convert('UTC')
+            self._write("forecast", vertical, run_ts, pa.table({
+                "run_ts": pa.array([run_ts_utc] * len(forecast_df), type=ts_type),
+                "ds": pa.array(ds, type=ts_type),
+                "yhat": pa.array(forecast_df['yhat'].to_numpy(dtype=np.float64)),
+                "yhat_lower": pa.array(forecast_df['yhat_lower'].to_numpy(dtype=np.float64)),
+                "yhat_upper": pa.array(forecast_df['yhat_upper'].to_numpy(dtype=np.float64))
+            }))
+
+        if xgboost_out:
+            self._write("revenue_predictions", vertical, run_ts, pa.table({
+                "timestamp": pa.array([run_ts_utc], type=ts_type),
+                "predicted_revenue": pa.array([float(xgboost_out["predicted_revenue"])], type=pa.float64()),
+                "model_score": pa.array([float(xgboost_out.get("model_score", 0.0))], type=pa.float64()),
+                "feature_weights": pa.array([json.dumps(xgboost_out.get("importance") or {})], type=pa.string())
+            }))
+
+    def _scan(self, dataset: str, columns: List[str], vertical: Optional[str] = None,
+              start_date: Optional[str] = None, end_date: Optional[str] = None,
+              row_filter: Optional[Any] = None) -> pd.DataFrame:
+        path = self.root / dataset
+        if not path.exists():
+            return pd.DataFrame(columns=['vertical', *columns])
+
+        expr = None
+        for part in (
+            (pa_dataset.field('vertical') == vertical) if vertical else None,
+            (pa_dataset.field('date') >= start_date) if start_date else None,
+            (pa_dataset.field('date') <= end_date) if end_date else None,
+            row_filter
+        ):
+            if part is not None:
+                expr = part if expr is None else expr & part
+
+        dataset_obj = pa_dataset.dataset(str(path), format='parquet', partitioning=self._partitioning(),
+                                         exclude_invalid_files=True)
+        return dataset_obj.to_table(columns=['vertical', *columns], filter=expr).to_pandas()
+
+    def latest_elasticity(self, vertical: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Most recent elasticity per vertical, reading only each vertical's newest date partition"""
+        base = self.root / "elasticity"
+        if not base.exists():
+            return {}
+        vertical_dirs = [base / f"vertical={quote(vertical, safe='')}"] if vertical else sorted(base.glob("vertical=*"))
+
+        latest: Dict[str, Dict[str, Any]] = {}
+        for vertical_dir in vertical_dirs:
+            date_dirs = sorted(vertical_dir.glob("date=*"))
+            if not date_dirs:
+                continue
+            name = unquote(vertical_dir.name.split("=", 1)[1])
+            date = date_dirs[-1].name.split("=", 1)[1]
+            df = self._scan("elasticity", ['timestamp', 'elasticity'], vertical=name, start_date=date, end_date=date)
+            if df.empty:
+                continue
+            row = df.loc[df['timestamp'].idxmax()]
+            latest[name] = {"elasticity": float(row['elasticity']), "timestamp": row['timestamp'].isoformat()}
+        return latest
+
+    def forecasts(self, vertical: str, start: Optional[str] = None, end: Optional[str] = None,
+                  latest_run_only: bool = True) -> pd.DataFrame:
+        """Forecast points for a vertical with ds in [start, end]"""
+        row_filter = None
+        ts_type = pa.timestamp('us', tz='UTC')
+        if start:
+            row_filter = pa_dataset.field('ds') >= pa.scalar(pd.Timestamp(start, tz='UTC'), type=ts_type)
+        if end:
+            end_expr = pa_dataset.field('ds') <= pa.scalar(pd.Timestamp(end, tz='UTC'), type=ts_type)
+            row_filter = end_expr if row_filter is None else row_filter & end_expr
+
+        df = self._scan("forecast", ['run_ts', 'ds', 'yhat', 'yhat_lower', 'yhat_upper'],
+                        vertical=vertical, row_filter=row_filter)
+        if latest_run_only and not df.empty:
+            df = df[df['run_ts'] == df['run_ts'].max()]
+        return df.sort_values('ds').reset_index(drop=True)
+
+    def prediction_history(self, vertical: str, start_date: Optional[str] = None,
+                           end_date: Optional[str] = None) -> pd.DataFrame:
+        """Revenue predictions for a vertical, optionally bounded by run date"""
+        df = self._scan("revenue_predictions", ['timestamp', 'predicted_revenue', 'model_score', 'feature_weights'],
+                        vertical=vertical, start_date=start_date, end_date=end_date)
+        return df.sort_values('timestamp').reset_index(drop=True)
+
+_result_store: Optional[ResultStore] = None
+
+def result_store() -> ResultStore:
+    """Process-wide local result store"""
+    global _result_store
+    if _result_store is None:
+        _result_store = ResultStore()
+    return _result_store
+
 def save_results_locally(vertical: str, elasticity: float, forecast_df: pd.DataFrame, xgboost_out: Optional[Dict[str, Any]]):
-    """Save results to local JSON file as fallback"""
+    """Save results to the local Parquet result store (JSON file if PyArrow is missing)"""
+    if PYARROW_AVAILABLE:
+        try:
+            result_store().write(vertical, elasticity, forecast_df, xgboost_out)
+            logger.info(f"Saved results for {vertical} to local result store")
+            return
+        except Exception as e:
+            logger.error(f"Error writing local result store, falling back to JSON: {e}")
+    
     try:
         results = {
             "vertical": vertical,
@@ -395,15 +1695,18 @@ def run_predictive_elasticity(events: List[Dict[str, Any]], vertical: str = "sal
     try:
         # Load and prepare data
         df = load_dtri_history(events)
+        return run_predictive_elasticity_frame(df, vertical)
+        
+    except Exception as e:
+        logger.error(f"Error in Predictive Elasticity Engine: {e}")
+        return _vertical_error(vertical, str(e))
+
+def run_predictive_elasticity_frame(df: pd.DataFrame, vertical: str) -> Dict[str, Any]:
+    """Run elasticity, forecast, revenue model and persistence on prepared events"""
+    try:
         if df.empty:
             logger.warning("No data available for analysis")
-            return {
-                "vertical": vertical,
-                "error": "No data available",
-                "elasticity": 0.0,
-                "forecast_points": 0,
-                "predicted_revenue": None
-            }
+            return _vertical_error(vertical, "No data available")
         
         # Calculate elasticity
         elasticity = calc_elasticity(df, vertical)
@@ -412,7 +1715,7 @@ def run_predictive_elasticity(events: List[Dict[str, Any]], vertical: str = "sal
         forecast_df = prophet_forecast(df, metric='DTRI', horizon_days=90)
         
         # Train XGBoost model
-        xgboost_out = xgboost_predict(df)
+        xgboost_out = xgboost_predict(df, vertical)
         
         # Persist results
         persist_results(vertical, elasticity, forecast_df, xgboost_out)
@@ -433,17 +1736,457 @@ def run_predictive_elasticity(events: List[Dict[str, Any]], vertical: str = "sal
         
     except Exception as e:
         logger.error(f"Error in Predictive Elasticity Engine: {e}")
-        return {
-            "vertical": vertical,
-            "error": str(e),
-            "elasticity": 0.0,
-            "forecast_points": 0,
-            "predicted_revenue": None
+        return _vertical_error(vertical, str(e))
+
+# ---------------- Parallel Multi-Vertical Runs ----------------
+PEE_MAX_WORKERS = int(os.getenv("PEE_MAX_WORKERS", str(os.cpu_count() or 1)))
+PEE_VERTICAL_TIMEOUT_SECONDS = float(os.getenv("PEE_VERTICAL_TIMEOUT_SECONDS", "600"))
+
+def partition_events_by_vertical(events: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Split raw events into per-vertical lists (events without a vertical go to 'global')"""
+    partitions: Dict[str, List[Dict[str, Any]]] = {}
+    for event in events:
+        partitions.setdefault(event.get("vertical") or "global", []).append(event)
+    return partitions
+
+def _vertical_error(vertical: str, error: str) -> Dict[str, Any]:
+    return {
+        "vertical": vertical,
+        "error": error,
+        "elasticity": 0.0,
+        "forecast_points": 0,
+        "predicted_revenue": None
+    }
+
+def _reset_worker_state():
+    """Worker initializer: drop process-wide clients and writers inherited over fork().
+
+    The parent's SQLite outbox connection, writer thread and Supabase client
+    must not be used from a forked child; workers open their own on demand.
+    """
+    global _result_writer, _result_writer_lock, _shared_client, _shared_client_lock
+    _result_writer = None
+    _result_writer_lock = threading.Lock()
+    _shared_client = None
+    _shared_client_lock = threading.Lock()
+
+def _vertical_worker(conn, vertical_events: List[Dict[str, Any]], vertical: str):
+    _reset_worker_state()
+    try:
+        conn.send(run_predictive_elasticity(vertical_events, vertical))
+    except Exception as e:
+        conn.send(_vertical_error(vertical, str(e)))
+    finally:
+        conn.close()
+
+def run_predictive_elasticity_all(
+    events: List[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    timeout_seconds: Optional[float] = None
+) -> Dict[str, Dict[str, Any]]:
+    """Run the PEE for every vertical in the events in parallel worker processes.
+
+    Each vertical's Prophet and XGBoost fits run in their own process, so wall
+    time tracks the slowest vertical rather than the sum. At most
+    ``max_workers`` verticals are in flight; a vertical still running after
+    ``timeout_seconds`` is reported as timed out and its process terminated.
+    """
+    partitions = partition_events_by_vertical(events)
+    if not partitions:
+        logger.warning("No events provided")
+        return {}
+
+    max_workers = max(1, min(max_workers or PEE_MAX_WORKERS, len(partitions)))
+    timeout_seconds = timeout_seconds or PEE_VERTICAL_TIMEOUT_SECONDS
+    logger.info(f"Running PEE for {len(partitions)} verticals on {max_workers} workers")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = list(partitions.items())
+    # Parent end of each worker's pipe -> (vertical, process, started)
+    in_flight: Dict[Any, Tuple[str, Any, float]] = {}
+    started = time.monotonic()
+
+    def stop(process):
+        process.terminate()
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+    try:
+        while pending or in_flight:
+            while pending and len(in_flight) < max_workers:
+                vertical, vertical_events = pending.pop(0)
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=_vertical_worker, args=(sender, vertical_events, vertical),
+                                                  name=f"pee-{vertical}", daemon=True)
+                process.start()
+                sender.close()
+                in_flight[receiver] = (vertical, process, time.monotonic())
+
+            next_deadline = min(submitted + timeout_seconds for _, _, submitted in in_flight.values())
+            ready = wait_connections(list(in_flight), timeout=max(0.0, next_deadline - time.monotonic()))
+
+            for receiver in ready:
+                vertical, process, _ = in_flight.pop(receiver)
+                try:
+                    results[vertical] = receiver.recv()
+                except EOFError:
+                    # The pipe closes as the worker dies; reap it so the exit code is known
+                    process.join(5)
+                    logger.error(f"PEE worker for {vertical} exited with code {process.exitcode} without a result")
+                    results[vertical] = _vertical_error(vertical, f"Worker exited with code {process.exitcode}")
+                receiver.close()
+                process.join(5)
+
+            now = time.monotonic()
+            for receiver, (vertical, process, submitted) in list(in_flight.items()):
+                if now - submitted >= timeout_seconds:
+                    logger.error(f"PEE run for {vertical} exceeded {timeout_seconds:.0f}s timeout, terminating worker")
+                    in_flight.pop(receiver)
+                    stop(process)
+                    receiver.close()
+                    results[vertical] = _vertical_error(vertical, f"Timed out after {timeout_seconds:.0f}s")
+    finally:
+        for receiver, (_, process, _) in in_flight.items():
+            stop(process)
+            receiver.close()
+    
+    # Workers exit without draining their writers; the outbox is shared, so drain it here
+    flush_results()
+
+    logger.info(f"PEE completed {len(results)} verticals in {time.monotonic() - started:.1f}s")
+    return results
+
+# ---------------- Change-Aware Scheduler ----------------
+PEE_SCHEDULER_STATE_PATH = Path(os.getenv("PEE_SCHEDULER_STATE_PATH", str(Path(__file__).parent / "output" / "pee_scheduler_state.json")))
+PEE_SCHEDULER_INTERVAL_SECONDS = float(os.getenv("PEE_SCHEDULER_INTERVAL_SECONDS", "3600"))
+
+def read_events_file(path: str) -> List[Dict[str, Any]]:
+    """Events from a JSON payload ({"events": [...]}), an NDJSON file, or a directory of them"""
+    path = Path(path)
+    if path.is_dir():
+        events: List[Dict[str, Any]] = []
+        for child in sorted(path.iterdir()):
+            if child.suffix in ('.json', '.ndjson', '.jsonl'):
+                events.extend(read_events_file(str(child)))
+        return events
+    with open(path) as f:
+        if path.suffix in ('.ndjson', '.jsonl'):
+            return [json.loads(line) for line in f if line.strip()]
+        payload = json.load(f)
+        return payload.get("events", []) if isinstance(payload, dict) else payload
+
+class ChangeAwareScheduler:
+    """Recomputes the PEE only for verticals whose events changed.
+
+    For every vertical it keeps a content fingerprint and high-water timestamp
+    of the event set it last analysed (persisted to PEE_SCHEDULER_STATE_PATH, so
+    state survives restarts and cron-style invocations). Each tick fingerprints
+    the current events, runs elasticity/forecast/revenue model only for the
+    dirty verticals, stalest first, and records what was skipped.
+
+    A dirty vertical whose events up to the old high-water mark still match the
+    old fingerprint was only appended to, and the incremental feature store and
+    XGBoost booster carry over. Otherwise its history was rewritten, and both
+    are dropped so they are rebuilt from the corrected events.
+    """
+
+    def __init__(self, load_events: Callable[[], List[Dict[str, Any]]],
+                 state_path: Path = PEE_SCHEDULER_STATE_PATH, max_per_tick: Optional[int] = None):
+        self.load_events = load_events
+        self.state_path = Path(state_path)
+        self.max_per_tick = max_per_tick
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path.exists():
+            try:
+                with open(self.state_path) as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable scheduler state {self.state_path}: {e}")
+        return {"verticals": {}, "metrics": {
+            "ticks": 0, "verticals_checked": 0, "verticals_recomputed": 0,
+            "verticals_skipped": 0, "verticals_deferred": 0, "verticals_rewritten": 0,
+            "recompute_errors": 0
+        }}
+
+    def _save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def fingerprint(group: pd.DataFrame) -> Tuple[str, str, int]:
+        """(content hash, high-water timestamp, row count) for one vertical's events"""
+        ordered = group[['timestamp', 'metric', 'score']].astype({'metric': str})
+        ordered = ordered.sort_values(['timestamp', 'metric', 'score'], kind='stable')
+        row_hashes = pd.util.hash_pandas_object(ordered, index=False).to_numpy()
+        return _rows_fingerprint(row_hashes), pd.Timestamp(ordered['timestamp'].iloc[-1]).isoformat(), len(ordered)
+
+    @classmethod
+    def is_append(cls, group: pd.DataFrame, previous: Dict[str, Any]) -> bool:
+        """Whether the events up to the previous high-water mark are exactly the ones analysed then"""
+        prefix = group[group['timestamp'] <= pd.Timestamp(previous["high_water"])]
+        if len(prefix) != previous.get("rows"):
+            return False
+        return cls.fingerprint(prefix)[0] == previous.get("fingerprint")
+
+    def tick(self) -> Dict[str, Any]:
+        started = time.monotonic()
+        now = datetime.utcnow()
+        df = load_dtri_history(self.load_events())
+        known = self.state["verticals"]
+
+        dirty = []
+        checked = 0
+        if not df.empty:
+            for vertical, group in df.groupby('vertical', observed=True, sort=False):
+                vertical = str(vertical)
+                checked += 1
+                content_hash, high_water, n_rows = self.fingerprint(group)
+                previous = known.get(vertical)
+                if previous and previous.get("fingerprint") == content_hash:
+                    continue
+                last_run = previous.get("last_run_at") if previous else None
+                staleness = (now - datetime.fromisoformat(last_run)).total_seconds() if last_run else float('inf')
+                rewritten = previous is not None and not self.is_append(group, previous)
+                dirty.append((staleness, vertical, group, content_hash, high_water, n_rows, rewritten))
+
+        # Stalest first; never-run verticals lead
+        dirty.sort(key=lambda item: item[0], reverse=True)
+        deferred = dirty[self.max_per_tick:] if self.max_per_tick is not None else []
+        dirty = dirty[:self.max_per_tick] if self.max_per_tick is not None else dirty
+
+        recomputed, rewritten, errors = [], [], []
+        for _, vertical, group, content_hash, high_water, n_rows, was_rewritten in dirty:
+            if was_rewritten:
+                logger.info(f"History for {vertical} was rewritten, rebuilding its feature store and model")
+                feature_store().drop(vertical)
+                xgboost_registry().drop(vertical)
+                rewritten.append(vertical)
+            result = run_predictive_elasticity_frame(group, vertical)
+            if result.get("error"):
+                errors.append(vertical)
+                continue
+            known[vertical] = {
+                "fingerprint": content_hash,
+                "high_water": high_water,
+                "rows": n_rows,
+                "last_run_at": datetime.utcnow().isoformat()
+            }
+            recomputed.append(vertical)
+
+        metrics = self.state["metrics"]
+        skipped = checked - len(dirty) - len(deferred)
+        metrics["ticks"] += 1
+        metrics["verticals_checked"] += checked
+        metrics["verticals_recomputed"] += len(recomputed)
+        metrics["verticals_rewritten"] = metrics.get("verticals_rewritten", 0) + len(rewritten)
+        metrics["verticals_skipped"] += skipped
+        metrics["verticals_deferred"] += len(deferred)
+        metrics["recompute_errors"] += len(errors)
+        metrics["last_tick_at"] = now.isoformat()
+        metrics["last_tick_seconds"] = round(time.monotonic() - started, 3)
+        self._save_state()
+
+        summary = {
+            "checked": checked,
+            "recomputed": recomputed,
+            "rewritten": rewritten,
+            "skipped": skipped,
+            "deferred": [item[1] for item in deferred],
+            "errors": errors,
+            "seconds": metrics["last_tick_seconds"]
         }
+        logger.info(f"Scheduler tick: {len(recomputed)} recomputed, {skipped} unchanged, "
+                    f"{len(deferred)} deferred, {len(errors)} failed in {summary['seconds']}s")
+        return summary
+
+    def run_forever(self, interval_seconds: float = PEE_SCHEDULER_INTERVAL_SECONDS):
+        logger.info(f"Starting PEE scheduler with {interval_seconds:.0f}s ticks")
+        while True:
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Error in scheduler tick: {e}")
+            time.sleep(interval_seconds)
+
+# ---------------- Streaming NDJSON Input ----------------
+PEE_STREAM_CHUNK_SIZE = int(os.getenv("PEE_STREAM_CHUNK_SIZE", "50000"))
+
+class VerticalColumnBuffer:
+    """Typed column buffers for one vertical's streamed events.
+
+    Raw values are held as Python objects only until the next chunk boundary;
+    each chunk is then compacted into int64 timestamps, int16 metric codes
+    (against a dictionary shared by all verticals) and float64 scores.
+    """
+
+    def __init__(self, metric_codes: Dict[str, int]):
+        self.metric_codes = metric_codes
+        self._raw_ts: List[Any] = []
+        self._raw_metric: List[int] = []
+        self._raw_score: List[float] = []
+        self._ts_chunks: List[np.ndarray] = []
+        self._metric_chunks: List[np.ndarray] = []
+        self._score_chunks: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._raw_ts) + sum(len(c) for c in self._ts_chunks)
+
+    @property
+    def raw_count(self) -> int:
+        return len(self._raw_ts)
+
+    def add(self, event: Dict[str, Any]):
+        metric = event["metric"]
+        code = self.metric_codes.setdefault(metric, len(self.metric_codes))
+        self._raw_ts.append(event["timestamp"])
+        self._raw_metric.append(code)
+        self._raw_score.append(event["score"])
+
+    def compact(self):
+        if not self._raw_ts:
+            return
+        timestamps = pd.to_datetime(pd.Index(self._raw_ts), utc=True).tz_convert(None)
+        self._ts_chunks.append(timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64))
+        self._metric_chunks.append(np.asarray(self._raw_metric, dtype=np.int16))
+        self._score_chunks.append(pd.to_numeric(pd.Series(self._raw_score), errors='coerce').to_numpy(dtype=np.float64))
+        self._raw_ts, self._raw_metric, self._raw_score = [], [], []
+
+    def to_frame(self, vertical: str) -> pd.DataFrame:
+        """Events as a frame in the shape load_dtri_history produces"""
+        self.compact()
+        if not self._ts_chunks:
+            return pd.DataFrame()
+        categories = sorted(self.metric_codes, key=self.metric_codes.get)
+        df = pd.DataFrame({
+            'timestamp': np.concatenate(self._ts_chunks).view('datetime64[ns]'),
+            'metric': pd.Categorical.from_codes(np.concatenate(self._metric_chunks), categories=categories),
+            'score': np.concatenate(self._score_chunks),
+            'vertical': vertical
+        })
+        df.sort_values('timestamp', inplace=True, kind='stable')
+        df.reset_index(drop=True, inplace=True)
+        return df
+
+def stream_predictive_elasticity(
+    lines: Iterable[str],
+    chunk_size: int = PEE_STREAM_CHUNK_SIZE,
+    grouped: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """Run the PEE over an NDJSON event stream, yielding one result per vertical.
+
+    Events are routed into per-vertical column buffers; every ``chunk_size``
+    lines the buffered Python values are compacted into typed arrays. A vertical
+    is analysed and its buffer freed as soon as it is known to be complete: on a
+    control line ``{"vertical": v, "end": true}``, when the vertical changes and
+    ``grouped`` is set (input sorted by vertical), or at end of stream.
+
+    Memory is ``chunk_size`` raw events plus 18 bytes per compacted event of
+    every vertical still open. Only grouped input or end markers bound that to
+    the open verticals; otherwise every vertical stays open until end of
+    stream, so memory grows with the whole input.
+    """
+    metric_codes: Dict[str, int] = {}
+    buffers: Dict[str, VerticalColumnBuffer] = {}
+    finished: set = set()
+    current: Optional[str] = None
+    raw_pending = 0
+
+    def complete(vertical: str) -> Dict[str, Any]:
+        buffer = buffers.pop(vertical)
+        finished.add(vertical)
+        df = buffer.to_frame(vertical)
+        logger.info(f"Streamed {len(df)} events for {vertical}, running analysis")
+        return run_predictive_elasticity_frame(df, vertical)
+
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping invalid NDJSON line {line_no}: {e}")
+            continue
+
+        vertical = event.get("vertical") or "global"
+        if event.get("end"):
+            if vertical in buffers:
+                yield complete(vertical)
+            continue
+
+        if grouped and current is not None and vertical != current and current in buffers:
+            yield complete(current)
+        current = vertical
+
+        if not all(k in event for k in ('timestamp', 'metric', 'score')):
+            logger.warning(f"Skipping event on line {line_no}: missing timestamp/metric/score")
+            continue
+        if vertical in finished:
+            logger.warning(f"Skipping late event on line {line_no} for completed vertical {vertical}")
+            continue
+
+        buffers.setdefault(vertical, VerticalColumnBuffer(metric_codes)).add(event)
+        raw_pending += 1
+        if raw_pending >= chunk_size:
+            for buffer in buffers.values():
+                buffer.compact()
+            raw_pending = 0
+
+    for vertical in list(buffers):
+        yield complete(vertical)
 
 # ---------------- CLI Interface ----------------
 if __name__ == "__main__":
     import sys
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Predictive Elasticity Engine")
+    parser.add_argument("--all-verticals", action="store_true",
+                        help="Run every vertical in the events on a process pool")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Process pool size for --all-verticals (default: PEE_MAX_WORKERS)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Per-vertical timeout in seconds (default: PEE_VERTICAL_TIMEOUT_SECONDS)")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="Stream NDJSON events from stdin and write one NDJSON result per vertical; "
+                             "without --grouped or end markers every vertical is buffered until EOF")
+    parser.add_argument("--chunk-size", type=int, default=PEE_STREAM_CHUNK_SIZE,
+                        help="Lines buffered before compacting into typed columns (--ndjson)")
+    parser.add_argument("--grouped", action="store_true",
+                        help="NDJSON input is sorted by vertical; analyse each vertical when it ends")
+    parser.add_argument("--daemon", metavar="EVENTS_PATH",
+                        help="Re-read events from a file/directory every tick and recompute only changed verticals")
+    parser.add_argument("--interval", type=float, default=PEE_SCHEDULER_INTERVAL_SECONDS,
+                        help="Seconds between scheduler ticks (--daemon)")
+    parser.add_argument("--once", action="store_true", help="Run a single scheduler tick and exit (--daemon)")
+    parser.add_argument("--max-per-tick", type=int, default=None,
+                        help="Recompute at most N dirty verticals per tick (--daemon)")
+    args = parser.parse_args()
+    
+    if args.daemon:
+        scheduler = ChangeAwareScheduler(lambda: read_events_file(args.daemon), max_per_tick=args.max_per_tick)
+        if args.once:
+            print(json.dumps(scheduler.tick(), indent=2))
+        else:
+            scheduler.run_forever(args.interval)
+        sys.exit(0)
+    
+    if args.ndjson:
+        try:
+            for result in stream_predictive_elasticity(sys.stdin, args.chunk_size, args.grouped):
+                sys.stdout.write(json.dumps(result) + "\n")
+                sys.stdout.flush()
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}")
+            sys.exit(1)
+        sys.exit(0)
     
     try:
         # Read input from stdin
@@ -452,7 +2195,10 @@ if __name__ == "__main__":
         vertical = payload.get("vertical", "sales")
         
         # Run analysis
-        result = run_predictive_elasticity(events, vertical)
+        if args.all_verticals:
+            result = run_predictive_elasticity_all(events, args.workers, args.timeout)
+        else:
+            result = run_predictive_elasticity(events, vertical)
         
         # Output result
         print(json.dumps(result, indent=2))
@@ -462,4 +2208,4 @@ if __name__ == "__main__":
         sys.exit(1)
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
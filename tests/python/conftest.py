@@ -0,0 +1,52 @@
+"""Shared setup for the Python analysis tests.
+
+The analysis modules import ``supabase`` and ``aiohttp`` at module level. When
+those clients aren't installed, minimal placeholder modules are registered so
+the pure computation under test can be imported; nothing here talks to a
+remote service.
+"""
+
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+for path in (ROOT, ROOT / "lib" / "analysis"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+try:
+    from supabase import create_client  # noqa: F401
+except ImportError:
+    # The repo's supabase/ directory (migrations) would otherwise import as an empty namespace package
+    supabase = types.ModuleType("supabase")
+
+    def create_client(url, key):
+        raise RuntimeError("supabase is not installed")
+
+    supabase.create_client = create_client
+    supabase.Client = object
+    sys.modules["supabase"] = supabase
+
+try:
+    from aiohttp import ClientSession  # noqa: F401
+except ImportError:
+    aiohttp = types.ModuleType("aiohttp")
+
+    class ClientSession:
+        def __init__(self, *args, **kwargs):
+            self.closed = False
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            self.closed = True
+
+        async def close(self):
+            self.closed = True
+
+    aiohttp.ClientSession = ClientSession
+    aiohttp.TCPConnector = lambda **kwargs: None
+    aiohttp.ClientTimeout = lambda **kwargs: None
+    sys.modules["aiohttp"] = aiohttp
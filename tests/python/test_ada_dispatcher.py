@@ -0,0 +1,195 @@
+import asyncio
+import sys
+
+import pytest
+
+from ada_dispatcher import (ConsistentHashRing, DispatchError, WorkerSupervisor, dispatch, forward_headers,
+                            tenant_key)
+
+TENANTS = [f"tenant-{i}" for i in range(2000)]
+
+
+# ---------------- Hash ring ----------------
+def test_empty_ring_routes_nowhere():
+    assert ConsistentHashRing().get("tenant-1") is None
+
+
+def test_routing_is_deterministic_and_covers_nodes():
+    ring = ConsistentHashRing(["w0", "w1", "w2"])
+    again = ConsistentHashRing(["w2", "w0", "w1"])
+    owners = [ring.get(t) for t in TENANTS]
+    assert owners == [again.get(t) for t in TENANTS]
+    assert set(owners) == {"w0", "w1", "w2"}
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = ConsistentHashRing(["w0", "w1", "w2"])
+    before = {t: ring.get(t) for t in TENANTS}
+    ring.add("w3")
+    moved = {t for t in TENANTS if ring.get(t) != before[t]}
+    assert moved
+    assert all(ring.get(t) == "w3" for t in moved)
+    # Roughly a quarter of the keys should move to the new node
+    assert len(moved) < len(TENANTS) / 2
+
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = ConsistentHashRing(["w0", "w1", "w2", "w3"])
+    before = {t: ring.get(t) for t in TENANTS}
+    ring.remove("w1")
+    for tenant, owner in before.items():
+        if owner == "w1":
+            assert ring.get(tenant) in {"w0", "w2", "w3"}
+        else:
+            assert ring.get(tenant) == owner
+
+
+def test_add_and_remove_are_idempotent():
+    ring = ConsistentHashRing(["w0"], replicas=8)
+    ring.add("w0")
+    assert len(ring._hashes) == 8
+    ring.remove("w9")
+    ring.remove("w0")
+    ring.remove("w0")
+    assert ring.get("tenant-1") is None
+
+
+# ---------------- Dispatch ----------------
+class FakeResponse:
+    def __init__(self, status_code=200, content=b"{}", headers=()):
+        self.status_code = status_code
+        self.content = content
+        self.headers = list(headers)
+
+
+class FakeClient:
+    """Records forwarded requests; workers in `refused` reject the connection"""
+
+    def __init__(self, refused=(), broken=()):
+        self.refused = set(refused)
+        self.broken = set(broken)
+        self.requests = []
+
+    async def request(self, method, url, params=None, content=None, headers=None):
+        worker = url.rsplit("/", 1)[0]
+        self.requests.append((method, url, content, headers))
+        if any(url.startswith(w) for w in self.refused):
+            raise ConnectionRefusedError("connection refused")
+        if any(url.startswith(w) for w in self.broken):
+            raise ConnectionResetError("connection reset")
+        return FakeResponse(content=worker.encode())
+
+    async def get(self, url, timeout=None):
+        if any(url.startswith(w) for w in self.refused):
+            raise ConnectionRefusedError("connection refused")
+        return FakeResponse()
+
+
+WORKERS = ["http://127.0.0.1:8100", "http://127.0.0.1:8101", "http://127.0.0.1:8102"]
+
+
+def test_tenant_key_prefers_header_then_body_then_path():
+    assert tenant_key({"x-tenant-id": "t1"}, b'{"tenantId": "t2"}', "analyze") == "t1"
+    assert tenant_key({}, b'{"tenantId": "t2"}', "analyze") == "t2"
+    assert tenant_key({}, b"not json", "analyze") == "analyze"
+    assert tenant_key({}, b"[1, 2]", "analyze") == "analyze"
+
+
+def test_dispatch_pins_tenant_to_its_worker_for_any_method():
+    ring = ConsistentHashRing(WORKERS)
+    client = FakeClient()
+    owner = ring.get("tenant-7")
+    for method in ("GET", "PATCH", "OPTIONS"):
+        asyncio.run(dispatch(ring, client, method, "analyze", {}, [("X-Tenant-Id", "tenant-7")], b""))
+    assert [(m, url) for m, url, _, _ in client.requests] == [
+        ("GET", f"{owner}/analyze"), ("PATCH", f"{owner}/analyze"), ("OPTIONS", f"{owner}/analyze")
+    ]
+
+
+def test_dispatch_drops_host_and_hop_by_hop_request_headers():
+    ring = ConsistentHashRing(WORKERS)
+    client = FakeClient()
+    headers = [("Host", "ada.example"), ("Connection", "keep-alive"), ("Authorization", "Bearer x"),
+               ("Cookie", "a=1"), ("Content-Length", "2")]
+    asyncio.run(dispatch(ring, client, "POST", "analyze", {}, headers, b"{}"))
+    assert client.requests[0][3] == [("Authorization", "Bearer x"), ("Cookie", "a=1")]
+
+
+def test_response_headers_are_relayed_including_repeats():
+    upstream = [("Content-Type", "application/json"), ("Set-Cookie", "a=1"), ("Set-Cookie", "b=2"),
+                ("X-Request-Id", "r1"), ("Content-Encoding", "gzip"), ("Transfer-Encoding", "chunked"),
+                ("Content-Length", "10")]
+    assert forward_headers(upstream, drop=("content-encoding",)) == [
+        ("Content-Type", "application/json"), ("Set-Cookie", "a=1"), ("Set-Cookie", "b=2"), ("X-Request-Id", "r1")
+    ]
+
+
+def test_dispatch_fails_over_when_a_worker_refuses_connections():
+    ring = ConsistentHashRing(WORKERS)
+    owner = ring.get("tenant-7")
+    client = FakeClient(refused=[owner])
+    body = b'{"tenantId": "tenant-7"}'
+
+    response = asyncio.run(dispatch(ring, client, "POST", "analyze", {}, [], body))
+    assert response.content.decode() != owner
+    assert owner not in ring.nodes
+    # Only the dead worker's tenants move
+    assert response.content.decode() == ring.get("tenant-7")
+
+
+def test_dispatch_reports_502_after_the_request_may_have_reached_a_worker():
+    ring = ConsistentHashRing(WORKERS)
+    owner = ring.get("tenant-7")
+    client = FakeClient(broken=[owner])
+    with pytest.raises(DispatchError) as error:
+        asyncio.run(dispatch(ring, client, "POST", "analyze", {}, [("x-tenant-id", "tenant-7")], b""))
+    assert error.value.status_code == 502
+    assert len(client.requests) == 1
+    assert owner not in ring.nodes
+
+
+def test_dispatch_without_workers_is_503():
+    with pytest.raises(DispatchError) as error:
+        asyncio.run(dispatch(ConsistentHashRing(), FakeClient(), "GET", "health", {}, [], b""))
+    assert error.value.status_code == 503
+
+
+# ---------------- Supervision ----------------
+def sleeper_command(port):
+    return [sys.executable, "-c", "import time; time.sleep(60)"]
+
+
+@pytest.fixture
+def supervisor():
+    supervisor = WorkerSupervisor(2, base_port=8100, command=sleeper_command)
+    supervisor.start()
+    yield supervisor
+    supervisor.stop()
+
+
+def test_healthy_workers_join_the_ring(supervisor):
+    asyncio.run(supervisor.check_workers(FakeClient()))
+    assert supervisor.ring.nodes == {WORKERS[0], WORKERS[1]}
+
+
+def test_unhealthy_worker_leaves_and_rejoins_the_ring(supervisor):
+    asyncio.run(supervisor.check_workers(FakeClient()))
+    asyncio.run(supervisor.check_workers(FakeClient(refused=[WORKERS[1]])))
+    assert supervisor.ring.nodes == {WORKERS[0]}
+    asyncio.run(supervisor.check_workers(FakeClient()))
+    assert supervisor.ring.nodes == {WORKERS[0], WORKERS[1]}
+
+
+def test_exited_worker_is_respawned(supervisor):
+    asyncio.run(supervisor.check_workers(FakeClient()))
+    dead = supervisor.processes[8101]
+    dead.kill()
+    dead.wait()
+
+    asyncio.run(supervisor.check_workers(FakeClient()))
+    assert supervisor.processes[8101] is not dead
+    assert supervisor.processes[8101].poll() is None
+    # The replacement rejoins only after passing a health check
+    assert supervisor.ring.nodes == {WORKERS[0]}
+    asyncio.run(supervisor.check_workers(FakeClient()))
+    assert supervisor.ring.nodes == {WORKERS[0], WORKERS[1]}
@@ -0,0 +1,691 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+import maximus_sentinel_agent as sentinel
+
+
+# -------- Concurrent fan-out --------
+def test_run_fetch_bounds_in_flight_requests(monkeypatch):
+    in_flight = {"all": 0, "gbp": 0}
+    peak = {"all": 0, "gbp": 0}
+
+    def fetcher(feed):
+        async def fetch(session, dealer, max_age=None):
+            in_flight["all"] += 1
+            in_flight[feed] = in_flight.get(feed, 0) + 1
+            for key in ("all", feed):
+                peak[key] = max(peak.get(key, 0), in_flight[key])
+            await asyncio.sleep(0.01)
+            in_flight["all"] -= 1
+            in_flight[feed] -= 1
+            if dealer == "broken":
+                raise RuntimeError("upstream exploded")
+            return {"dealer": dealer, "feed": feed}
+        return fetch
+
+    monkeypatch.setattr(sentinel, "FEED_FETCHERS", {"gbp": fetcher("gbp"), "tsm": fetcher("tsm")})
+    dealers = [f"dealer-{i}" for i in range(20)] + ["broken"]
+
+    async def run():
+        global_limit = asyncio.Semaphore(6)
+        feed_limits = {"gbp": asyncio.Semaphore(2)}
+        return await asyncio.gather(*[
+            sentinel.run_fetch(feed, None, dealer, global_limit, feed_limits)
+            for dealer in dealers
+            for feed in ("gbp", "tsm")
+        ])
+
+    outcomes = asyncio.run(run())
+    assert peak["all"] == 6
+    assert peak["gbp"] == 2
+    # A failing pull is reported as None without affecting the others
+    assert outcomes[-2:] == [None, None]
+    assert outcomes[0] == {"dealer": "dealer-0", "feed": "gbp"}
+    assert sum(outcome is not None for outcome in outcomes) == 40
+
+
+# -------- Feed cache --------
+class Clock:
+    """Stands in for the time module; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sentinel, "time", clock)
+    return clock
+
+
+class CountingFetch:
+    def __init__(self, *values, delay=0.0):
+        self.values = list(values)
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.values[min(self.calls, len(self.values)) - 1]
+
+
+def test_feed_cache_coalesces_concurrent_misses(clock):
+    cache = sentinel.FeedCache({"gbp": 60}, stale_seconds=300)
+    fetch = CountingFetch({"rating": 4.5}, delay=0.01)
+
+    async def run():
+        return await asyncio.gather(*[cache.get("gbp", ("dealer",), fetch) for _ in range(5)])
+
+    assert asyncio.run(run()) == [{"rating": 4.5}] * 5
+    assert fetch.calls == 1
+    assert cache.stats()["gbp"]["misses"] == 1
+    assert cache.stats()["gbp"]["coalesced"] == 4
+
+
+def test_feed_cache_serves_stale_while_revalidating(clock):
+    cache = sentinel.FeedCache({"gbp": 60}, stale_seconds=300)
+    fetch = CountingFetch({"rating": 4.5}, {"rating": 4.0})
+
+    async def run():
+        first = await cache.get("gbp", ("dealer",), fetch)
+        clock.now += 30
+        fresh = await cache.get("gbp", ("dealer",), fetch)
+        clock.now += 60
+        # Past the TTL: the old value comes back at once and one refresh starts
+        stale = await cache.get("gbp", ("dealer",), fetch)
+        again = await cache.get("gbp", ("dealer",), fetch)
+        await cache.drain()
+        refreshed = await cache.get("gbp", ("dealer",), fetch)
+        return first, fresh, stale, again, refreshed
+
+    first, fresh, stale, again, refreshed = asyncio.run(run())
+    assert first == fresh == stale == again == {"rating": 4.5}
+    assert refreshed == {"rating": 4.0}
+    assert fetch.calls == 2
+    assert cache.stats()["gbp"]["stale_hits"] == 2
+
+
+def test_feed_cache_flags_last_good_value_when_upstream_fails(clock):
+    cache = sentinel.FeedCache({"gbp": 60}, stale_seconds=300)
+    fetch = CountingFetch({"rating": 4.5}, {"feed_status": "unavailable"})
+
+    async def run():
+        await cache.get("gbp", ("dealer",), fetch)
+        clock.now += 400
+        return await cache.get("gbp", ("dealer",), fetch)
+
+    result = asyncio.run(run())
+    assert result["rating"] == 4.5
+    assert result["feed_status"] == "stale"
+    assert not sentinel.feed_usable(result)
+
+    # Entries past the stale window are purged
+    cache.purge()
+    assert cache._entries == {}
+
+
+def test_feed_cache_max_age_below_ttl_bypasses_the_entry(clock):
+    cache = sentinel.FeedCache({"gbp": 600}, stale_seconds=3600)
+    fetch = CountingFetch({"rating": 4.5}, {"rating": 3.0})
+
+    async def run():
+        await cache.get("gbp", ("dealer",), fetch)
+        clock.now += 120
+        cached = await cache.get("gbp", ("dealer",), fetch, max_age=900)
+        # Older than the caller's max_age: fetched now, not served stale
+        fresh = await cache.get("gbp", ("dealer",), fetch, max_age=60)
+        return cached, fresh
+
+    cached, fresh = asyncio.run(run())
+    assert cached == {"rating": 4.5}
+    assert fresh == {"rating": 3.0}
+    assert fetch.calls == 2
+
+
+# -------- Event sink --------
+class FakeTable:
+    def __init__(self, client):
+        self.client = client
+
+    def insert(self, rows):
+        self.rows = rows
+        return self
+
+    def execute(self):
+        if self.client.accept is not None and len(self.client.inserted) + len(self.rows) > self.client.accept:
+            raise RuntimeError("remote unavailable")
+        self.client.inserted.extend(self.rows)
+
+
+class FakeSupabase:
+    def __init__(self, accept=None):
+        self.accept = accept  # total rows accepted before inserts start failing
+        self.inserted = []
+
+    def table(self, name):
+        assert name == "sentinel_events"
+        return FakeTable(self)
+
+
+@pytest.fixture
+def make_sink(tmp_path):
+    sinks = []
+
+    def make(client=None, batch_size=100, spill_max_bytes=2**20):
+        sink = sentinel.EventSink(tmp_path / "spill.ndjson", batch_size=batch_size, flush_seconds=3600,
+                                  spill_max_bytes=spill_max_bytes)
+        sink._client = client
+        sinks.append(sink)
+        return sink
+
+    yield make
+    for sink in sinks:
+        sink._stopped.set()
+        sink._wake.set()
+
+
+def test_event_sink_spills_failed_batch_and_replays_oldest_first(make_sink):
+    client = FakeSupabase(accept=0)
+    sink = make_sink(client)
+    for i in range(3):
+        sink.enqueue({"i": i})
+    assert sink.flush() == 0
+    assert [row["i"] for row in sink._read_spill()] == [0, 1, 2]
+
+    client.accept = None
+    sink.enqueue({"i": 3})
+    assert sink.flush() == 4
+    assert [row["i"] for row in client.inserted] == [0, 1, 2, 3]
+    assert not sink.spill_path.exists()
+    assert sink.stats["spilled"] == 3 and sink.stats["written"] == 4
+
+
+def test_event_sink_keeps_only_the_unsent_tail(make_sink):
+    client = FakeSupabase(accept=2)
+    sink = make_sink(client, batch_size=2)
+    sink._append_spill([{"i": 0}, {"i": 1}, {"i": 2}])
+    sink.enqueue({"i": 3})
+    assert sink.flush() == 2
+    assert [row["i"] for row in sink._read_spill()] == [2, 3]
+
+
+def test_event_sink_without_remote_spills_up_to_the_cap(make_sink, monkeypatch):
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    sink = make_sink(spill_max_bytes=40)
+    for i in range(5):
+        sink.enqueue({"event": f"e{i}"})
+    assert sink.flush() == 0
+    # Each spilled line is 16 bytes, so two fit under the cap
+    assert [row["event"] for row in sink._read_spill()] == ["e0", "e1"]
+    assert sink.stats["dropped"] == 3
+
+
+# -------- Alert dispatcher --------
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.posts = []
+        self.closed = False
+
+    def post(self, url, json):
+        self.posts.append(json)
+        return FakeResponse(self.statuses.pop(0) if self.statuses else 200)
+
+
+def test_alerts_are_suppressed_while_queued_and_after_delivery(clock):
+    dispatcher = sentinel.AlertDispatcher(None, suppress_seconds=3600)
+    dispatcher.submit("Low rating", "4.1", "warning", "dealer-a", "LOW_RATING")
+    dispatcher.submit("Low rating", "4.0", "warning", "dealer-a", "LOW_RATING")
+    dispatcher.submit("Low rating", "3.9", "warning", "dealer-b", "LOW_RATING")
+    assert dispatcher.stats["queued"] == 2 and dispatcher.stats["suppressed"] == 1
+
+    asyncio.run(dispatcher.flush())
+    clock.now += 1800
+    dispatcher.submit("Low rating", "4.0", "warning", "dealer-a", "LOW_RATING")
+    assert dispatcher.stats["suppressed"] == 2
+
+    clock.now += 1800
+    dispatcher.submit("Low rating", "4.0", "warning", "dealer-a", "LOW_RATING")
+    assert dispatcher.stats["queued"] == 3
+
+
+def test_failed_delivery_does_not_start_suppression(clock):
+    dispatcher = sentinel.AlertDispatcher("https://hooks.example/alert", suppress_seconds=3600)
+    dispatcher._session = FakeSession([500])
+    dispatcher.submit("Slow site", "LCP 5s", "critical", "dealer-a", "SLOW_SITE")
+    assert asyncio.run(dispatcher.flush()) == 0
+    assert dispatcher.stats["failed"] == 1
+
+    dispatcher.submit("Slow site", "LCP 5s", "critical", "dealer-a", "SLOW_SITE")
+    assert asyncio.run(dispatcher.flush()) == 1
+    dispatcher.submit("Slow site", "LCP 5s", "critical", "dealer-a", "SLOW_SITE")
+    assert dispatcher.stats["suppressed"] == 1
+
+
+def test_alerts_of_one_type_fold_into_a_digest(clock):
+    dispatcher = sentinel.AlertDispatcher("https://hooks.example/alert", digest_min=3)
+    session = dispatcher._session = FakeSession()
+    for dealer in ("a", "b", "c"):
+        dispatcher.submit(f"Low rating – {dealer}", f"rating dropped at {dealer}", "warning", dealer, "LOW_RATING")
+    dispatcher.submit("Slow site – a", "LCP 5s", "critical", "a", "SLOW_SITE")
+    dispatcher.submit("Slow site – b", "LCP 6s", "critical", "b", "SLOW_SITE")
+
+    assert asyncio.run(dispatcher.flush()) == 3
+    texts = [post["text"] for post in session.posts]
+    assert texts[0].startswith("*WARNING ALERT DIGEST:* Low rating (3 dealers)")
+    assert "• c: rating dropped at c" in texts[0]
+    assert texts[1].endswith("Dealer: a") and texts[2].endswith("Dealer: b")
+    assert dispatcher.stats["digests"] == 1
+
+
+def test_token_bucket_paces_after_the_burst(clock, monkeypatch):
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(sentinel.asyncio, "sleep", sleep)
+    bucket = sentinel.TokenBucket(rate=2.0, capacity=3)
+
+    async def run():
+        for _ in range(5):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    assert waits == [pytest.approx(0.5), pytest.approx(0.5)]
+    with pytest.raises(ValueError):
+        sentinel.TokenBucket(rate=0, capacity=1)
+
+
+# -------- Adaptive scheduler --------
+def test_next_check_interval_stays_within_bounds(monkeypatch):
+    monkeypatch.setattr(sentinel, "SENTINEL_MIN_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(sentinel, "SENTINEL_MAX_INTERVAL_SECONDS", 3600)
+    reading = lambda headroom, breached=False: sentinel.check_reading(headroom, breached, {})
+
+    # Failed checks retry on the base cadence, clamped to the bounds
+    assert sentinel.next_check_interval({}, None, 0, base_interval=10) == 60
+    assert sentinel.next_check_interval({}, None, 0, base_interval=10_000) == 3600
+
+    # A flat metric backs off geometrically up to the maximum
+    state = {"interval": 900}
+    assert sentinel.next_check_interval(state, reading(0.5), 0, 900) == 900
+    assert sentinel.next_check_interval(state, reading(0.5), 900, 900) == 1800
+    state["interval"] = 1800
+    assert sentinel.next_check_interval(state, reading(0.5), 2700, 900) == 3600
+    state["interval"] = 3600
+    assert sentinel.next_check_interval(state, reading(0.5), 6300, 900) == 3600
+
+    # A fast-moving metric close to its trigger is floored at the minimum
+    state = {"interval": 900}
+    sentinel.next_check_interval(state, reading(0.5), 0, 900)
+    assert sentinel.next_check_interval(state, reading(0.01), 10, 900) == 60
+
+    # Breaches are re-checked at the minimum, and the interval stays at or
+    # below the base for the breach memory afterwards
+    state = {"interval": 900}
+    assert sentinel.next_check_interval(state, reading(-0.1, breached=True), 0, 900) == 60
+    state["interval"] = 60
+    intervals = []
+    for now in (60, 120, 240, 480, 960):
+        interval = sentinel.next_check_interval(state, reading(0.5), now, 900)
+        state["interval"] = interval
+        intervals.append(interval)
+    assert intervals[0] == 60 and max(intervals) <= 900
+
+
+def test_breached_pair_is_rescheduled_at_the_minimum_interval(monkeypatch):
+    calls = []
+
+    async def check_feed(engine, feed, session, dealer, global_limit, feed_limits, max_age=None):
+        calls.append((feed, max_age))
+        return sentinel.check_reading(-0.2, True, {})
+
+    monkeypatch.setenv("MONITORED_DEALERS", "dealer-a")
+    monkeypatch.setenv("SENTINEL_INTERVAL_MINUTES", "15")
+    monkeypatch.setattr(sentinel, "check_feed", check_feed)
+    monkeypatch.setattr(sentinel, "SENTINEL_MIN_INTERVAL_SECONDS", 0.05)
+    monkeypatch.setattr(sentinel, "SENTINEL_HOUSEKEEPING_SECONDS", 3600)
+    monkeypatch.setattr(sentinel, "shard_coordinator", lambda: None)
+
+    async def run():
+        try:
+            await asyncio.wait_for(sentinel.run_continuous_monitoring(), timeout=0.5)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+    feeds = sentinel.trigger_engine().feeds
+    for feed in feeds:
+        # Not held back to the feed TTL: re-checked every 50ms, and each
+        # re-check refuses cache entries older than that
+        ages = [max_age for f, max_age in calls if f == feed]
+        assert len(ages) >= 4
+        assert ages[0] == 15 * 60
+        assert set(ages[1:]) == {0.05}
+
+
+# -------- Sharding --------
+@pytest.fixture
+def coordinators(tmp_path, clock):
+    def make(instance_id, member_ttl=60, lease_seconds=60):
+        return sentinel.ShardCoordinator(instance_id, tmp_path / "coordination.sqlite3",
+                                         member_ttl=member_ttl, lease_seconds=lease_seconds)
+    return make
+
+
+DEALERS = [f"dealer-{i}" for i in range(20)]
+
+
+def test_shards_split_dealers_without_overlap(coordinators):
+    a, b = coordinators("a"), coordinators("b")
+    a.heartbeat()
+    b.heartbeat()
+    owned_a, owned_b = a.refresh(DEALERS), b.refresh(DEALERS)
+    assert owned_a and owned_b
+    assert set(owned_a).isdisjoint(owned_b)
+    assert sorted(owned_a + owned_b) == sorted(DEALERS)
+
+
+def test_dealers_fail_over_once_a_dead_shards_leases_lapse(coordinators, clock):
+    a, b = coordinators("a"), coordinators("b")
+    a.heartbeat()
+    b.heartbeat()
+    a.refresh(DEALERS)
+    owned_b = b.refresh(DEALERS)
+
+    # b stops heartbeating; until its leases lapse nobody else checks its dealers
+    clock.now += 30
+    assert set(a.refresh(DEALERS)).isdisjoint(owned_b)
+    clock.now += 61
+    assert sorted(a.refresh(DEALERS)) == sorted(DEALERS)
+
+    # b comes back and gets its share once a releases it on the next refresh
+    b.heartbeat()
+    assert b.refresh(DEALERS) == []
+    a.refresh(DEALERS)
+    assert sorted(b.refresh(DEALERS)) == sorted(owned_b)
+
+
+def test_leave_hands_dealers_over_immediately(coordinators):
+    a, b = coordinators("a"), coordinators("b")
+    a.heartbeat()
+    b.heartbeat()
+    a.refresh(DEALERS)
+    b.refresh(DEALERS)
+    b.leave()
+    assert sorted(a.refresh(DEALERS)) == sorted(DEALERS)
+
+
+def test_cycle_claims_prevent_duplicate_checks(coordinators):
+    a, b = coordinators("a"), coordinators("b")
+    first = a.claim_cycle(7, DEALERS[:12])
+    second = b.claim_cycle(7, DEALERS[8:])
+    assert first == DEALERS[:12]
+    assert second == DEALERS[12:]
+    assert a.claim_cycle(7, DEALERS) == []
+    # A new cycle can be claimed again, and claims older than the previous cycle are pruned
+    assert a.claim_cycle(9, DEALERS[:2]) == DEALERS[:2]
+    assert b.claim_cycle(7, DEALERS[:1]) == DEALERS[:1]
+
+
+def test_join_waits_only_until_membership_settles_and_only_once(coordinators, clock):
+    a, b = coordinators("a"), coordinators("b")
+    b.heartbeat()
+    assert a.join(settle_seconds=5, poll_seconds=0.5) == ["a", "b"]
+    # Membership didn't change across one poll, so the wait ended there
+    assert clock.sleeps == [0.5]
+
+    assert a.join(settle_seconds=5, poll_seconds=0.5) == ["a", "b"]
+    assert clock.sleeps == [0.5]
+
+    c = coordinators("c")
+    heartbeat = c.heartbeat
+    late = iter([lambda: None, lambda: coordinators("d").heartbeat()])
+
+    def churning_heartbeat():
+        next(late, lambda: None)()
+        return heartbeat()
+
+    c.heartbeat = churning_heartbeat
+    assert c.join(settle_seconds=5, poll_seconds=0.5) == ["a", "b", "c", "d"]
+    assert clock.sleeps == [0.5, 0.5, 0.5]
+
+
+# -------- Circuit breaker --------
+def test_breaker_opens_after_consecutive_failures():
+    breaker = sentinel.CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.snapshot()["opened"] == 1
+
+
+def test_breaker_success_resets_failure_count():
+    breaker = sentinel.CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_breaker_half_open_trial_closes_or_reopens():
+    breaker = sentinel.CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == "half_open"
+    # Only the trial call goes through while half-open
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    assert breaker.allow() and breaker.state == "half_open"
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_cancelled_half_open_trial_reopens_breaker(monkeypatch):
+    breaker = sentinel.CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    monkeypatch.setitem(sentinel._circuit_breakers, "gbp", breaker)
+
+    async def hang(session, url, timeout, breaker):
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(sentinel, "_hedged_get_json", hang)
+
+    async def run():
+        task = asyncio.ensure_future(sentinel.fetch_feed(None, "gbp", "https://example.invalid", 1))
+        await asyncio.sleep(0)
+        assert breaker.state == "half_open"
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert breaker.state == "open"
+
+
+def test_open_breaker_short_circuits_fetch(monkeypatch):
+    breaker = sentinel.CircuitBreaker(failure_threshold=1, reset_seconds=3600)
+    breaker.record_failure()
+    monkeypatch.setitem(sentinel._circuit_breakers, "gbp", breaker)
+    monkeypatch.setattr(sentinel, "SENTINEL_MOCK_FALLBACK", False)
+
+    result = asyncio.run(sentinel.fetch_feed(None, "gbp", "https://example.invalid", 1))
+    assert result == {"feed_status": "unavailable", "feed_error": "circuit open"}
+    assert breaker.stats["short_circuited"] == 1
+
+
+# -------- Trigger rules --------
+@pytest.fixture
+def spec():
+    with open(sentinel.ENGINE_SPEC_PATH) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def engine(spec):
+    return sentinel.compile_triggers(spec)
+
+
+def rule_index(engine, rule_id):
+    return [rule["id"] for rule in engine.rules].index(rule_id)
+
+
+def test_engine_compiles_spec_rules(spec, engine):
+    rules = spec["V_AGENTIC_AND_AUTONOMOUS_LOGIC"]["TRIGGER_RULES"]
+    assert [rule["id"] for rule in engine.rules] == [rule["id"] for rule in rules]
+    assert engine.feeds == sorted({"gbp", "pagespeed", "tsm", "competitive"})
+
+
+@pytest.mark.parametrize("drop", ["V_AGENTIC_AND_AUTONOMOUS_LOGIC", "TRIGGER_RULES"])
+def test_compile_triggers_requires_spec_rules(spec, drop):
+    if drop == "TRIGGER_RULES":
+        del spec["V_AGENTIC_AND_AUTONOMOUS_LOGIC"][drop]
+    else:
+        del spec[drop]
+    with pytest.raises(ValueError, match="TRIGGER_RULES"):
+        sentinel.compile_triggers(spec)
+
+
+def test_trigger_engine_raises_without_previous_rules(tmp_path, monkeypatch):
+    monkeypatch.setattr(sentinel, "ENGINE_SPEC_PATH", tmp_path / "missing.json")
+    monkeypatch.setattr(sentinel, "_trigger_engine", None)
+    with pytest.raises(ValueError, match="TRIGGER_RULES"):
+        sentinel.trigger_engine()
+
+
+def test_engine_evaluates_all_tree_with_headroom(engine):
+    results = {"gbp": [
+        {"avg_response_time": 5.0, "velocity": 0.5},   # both conditions hold
+        {"avg_response_time": 5.0, "velocity": 1.0},   # velocity is fine
+        {"feed_status": "unavailable"},
+    ]}
+    evaluation = engine.evaluate(results, 3)
+    r = rule_index(engine, "REVIEW_CRISIS_SOW")
+
+    assert evaluation["breached"][:, r].tolist() == [True, False, False]
+    assert evaluation["evaluated"][:, r].tolist() == [True, True, False]
+    # An "all" is as far from firing as its farthest condition
+    assert evaluation["headroom"][0, r] == pytest.approx((4.0 - 5.0) / 4.0)
+    assert evaluation["headroom"][1, r] == pytest.approx((1.0 - 0.85) / 0.85)
+    assert np.isnan(evaluation["headroom"][2, r])
+
+
+def test_engine_applies_scale_and_default(engine):
+    results = {
+        "pagespeed": [{"lighthouseResult": {"audits": {"largest-contentful-paint": {"numericValue": 4500}}}}, {}],
+        "tsm": [{}, {"current_tsm": 1.5}],
+    }
+    evaluation = engine.evaluate(results, 2)
+    vdp, tsm = rule_index(engine, "VDP_OPTIMIZATION_SOW"), rule_index(engine, "TSM_DEFENSIVE_MODE")
+
+    assert evaluation["breached"][:, vdp].tolist() == [True, False]
+    assert engine.rule_values(engine.rules[vdp], evaluation["values"], 0) == {"lcp": pytest.approx(4.5)}
+    # Missing metrics fall back to the rule's default
+    assert evaluation["breached"][:, tsm].tolist() == [False, True]
+    assert evaluation["headroom"][0, tsm] == pytest.approx((1.4 - 1.0) / 1.4)
+
+
+def test_engine_any_tree_takes_nearest_condition():
+    rules = [{"id": "EITHER", "feed": "tsm", "when": {"any": [
+        {"metric": "a", "op": ">", "threshold": 10},
+        {"metric": "b", "op": "<", "threshold": 2},
+    ]}}]
+    engine = sentinel.TriggerEngine(rules, {})
+    evaluation = engine.evaluate({"tsm": [{"a": 5, "b": 3}, {"a": 12, "b": 3}]}, 2)
+    assert evaluation["breached"][:, 0].tolist() == [False, True]
+    assert evaluation["headroom"][0, 0] == pytest.approx(min((10 - 5) / 10, (3 - 2) / 2))
+
+
+@pytest.mark.parametrize("rule, message", [
+    ({"feed": "tsm", "when": {"metric": "a", "op": ">", "threshold": 1}}, "needs 'id'"),
+    ({"id": "X", "feed": "nope", "when": {"metric": "a", "op": ">", "threshold": 1}}, "unknown feed"),
+    ({"id": "X", "feed": "tsm", "when": {"metric": "a", "op": "==", "threshold": 1}}, "unsupported operator"),
+    ({"id": "X", "feed": "tsm", "when": {"metric": "a", "op": ">", "threshold": "MISSING"}}, "unknown threshold"),
+    ({"id": "X", "feed": "tsm", "when": {"all": []}}, "empty 'all'"),
+])
+def test_engine_rejects_invalid_rules(rule, message):
+    with pytest.raises(ValueError, match=message):
+        sentinel.TriggerEngine([rule], {})
+
+
+# -------- Breach state hysteresis --------
+@pytest.fixture
+def store(tmp_path):
+    return sentinel.BreachStateStore(tmp_path / "breach_state.sqlite3")
+
+
+def test_breach_enters_once_and_counts_repeats(store):
+    transitions = store.observe([("d1", "R", True, -0.2, 0.05)])
+    assert [kind for kind, _ in transitions] == ["breached"]
+    assert store.observe([("d1", "R", True, -0.1, 0.05)]) == []
+    assert store.is_breached("d1", "R")
+    assert store.persistent(min_breaches=2, min_seconds=0)[0]["consecutive"] == 2
+
+
+def test_breach_holds_inside_clear_band_then_clears(store):
+    store.observe([("d1", "R", True, -0.2, 0.05)])
+    assert store.observe([("d1", "R", False, 0.02, 0.05)]) == []
+    assert store.is_breached("d1", "R")
+    assert store.stats["held_in_band"] == 1
+
+    transitions = store.observe([("d1", "R", False, 0.08, 0.05)])
+    assert [kind for kind, _ in transitions] == ["cleared"]
+    assert not store.is_breached("d1", "R")
+    # Clear readings for an untracked pair are not transitions
+    assert store.observe([("d2", "R", False, 0.5, 0.05)]) == []
+
+
+def test_recalibrated_episodes_are_not_persistent_again(store):
+    store.observe([("d1", "R", True, -0.2, 0.05)])
+    episodes = store.persistent(min_breaches=1, min_seconds=0)
+    store.mark_recalibrated(episodes)
+    assert store.persistent(min_breaches=1, min_seconds=0) == []
+
+
+def test_breach_state_survives_restart_and_shard_handover(tmp_path):
+    path = tmp_path / "breach_state.sqlite3"
+    first, second = sentinel.BreachStateStore(path), sentinel.BreachStateStore(path)
+    first.track(["d1"])
+    second.track(["d2"])
+    first.observe([("d1", "R", True, -0.2, 0.05)])
+
+    # d1 moves to the second instance, which must see the open episode
+    first.track([])
+    second.track(["d1", "d2"])
+    assert second.is_breached("d1", "R")
+    assert second.observe([("d1", "R", True, -0.2, 0.05)]) == []
+    assert not first.is_breached("d1", "R")
+
+    assert sentinel.BreachStateStore(path).snapshot()["breached"] == 1
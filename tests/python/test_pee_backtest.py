@@ -0,0 +1,42 @@
+import mmap
+
+import pytest
+
+import pee_backtest as backtest
+
+
+@pytest.fixture(scope="module")
+def history():
+    return backtest.synthetic_history("synthetic", days=90)
+
+
+def allocate_native(mb):
+    """Anonymous mapping with every page touched: resident, but invisible to tracemalloc"""
+    buffer = mmap.mmap(-1, mb * 2**20)
+    for offset in range(0, len(buffer), mmap.PAGESIZE):
+        buffer[offset] = 1
+    return buffer
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_backtest_measures_native_memory_per_fold(history, monkeypatch, max_workers):
+    def simple_revenue_prediction(train):
+        buffer = allocate_native(64)
+        buffer.close()
+        return {"predicted_revenue": float(train.loc[train["metric"] == "Revenue", "score"].iloc[-1])}
+
+    monkeypatch.setattr(backtest.pee, "simple_revenue_prediction", simple_revenue_prediction)
+    folds = backtest.backtest({"synthetic": history}, ["simple_revenue", "linear"], n_folds=2,
+                              horizon_days=7, max_workers=max_workers)
+    assert len(folds) == 4
+    assert folds["error"].isna().all()
+    allocating = folds[folds["model"] == "simple_revenue"]["peak_rss_mb"]
+    # Each fold runs in a fresh process, so the first fold's peak doesn't hide the second's
+    assert (allocating >= 60).all()
+    assert (folds[folds["model"] == "linear"]["peak_rss_mb"] < 60).all()
+
+
+def test_backtest_reports_a_crashed_fold(history, monkeypatch):
+    monkeypatch.setattr(backtest.pee, "simple_revenue_prediction", lambda train: backtest.os._exit(3))
+    folds = backtest.backtest({"synthetic": history}, ["simple_revenue"], n_folds=1, horizon_days=7, max_workers=1)
+    assert folds["error"].tolist() == ["Fold worker exited with code 3"]
@@ -0,0 +1,757 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import predictive_elasticity_engine as pee
+
+
+def make_events(verticals=("sales", "service"), n=60, seed=0):
+    """DTRI/Revenue events on unique timestamps per vertical and metric"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for vertical in verticals:
+        for metric in ("DTRI", "Revenue"):
+            hours = rng.choice(5000, size=n, replace=False)
+            for hour in hours:
+                rows.append({
+                    "vertical": vertical,
+                    "metric": metric,
+                    "score": float(rng.uniform(40, 100)),
+                    "timestamp": pd.Timestamp("2026-01-01") + pd.Timedelta(hours=int(hour)),
+                })
+    return pd.DataFrame(rows)
+
+
+# ---------------- Elasticity ----------------
+def test_calc_elasticity_all_matches_per_vertical():
+    df = make_events(("sales", "service", "parts"))
+    verticals = ["sales", "service", "parts", "global"]
+    expected = {v: pee.calc_elasticity(df, v) for v in verticals}
+    assert pee.calc_elasticity_all(df, verticals) == expected
+
+
+def test_calc_elasticity_all_global_pools_every_vertical():
+    df = make_events(("sales", "service"))
+    result = pee.calc_elasticity_all(df, ["global"])
+    assert result["global"] == pee.calc_elasticity(df, "global")
+
+
+def test_calc_elasticity_all_insufficient_data():
+    df = make_events(("sales",), n=1)
+    assert pee.calc_elasticity_all(df, ["sales", "missing"]) == {"sales": 0.0, "missing": 0.0}
+    assert pee.calc_elasticity_all(df.iloc[0:0]) == {}
+
+
+def baseline_load_dtri_history(events):
+    """load_dtri_history as it was before the typed-column loader"""
+    df = pd.DataFrame(events)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    df.sort_values('timestamp', inplace=True)
+    if 'vertical' not in df.columns:
+        df['vertical'] = 'global'
+    return df
+
+
+def test_calc_elasticity_matches_the_baseline_loader():
+    rng = np.random.default_rng(7)
+    hours = rng.permutation(4000)[:480]
+    events = [{
+        "vertical": ("sales", "service", "parts")[i % 3],
+        "metric": ("DTRI", "Revenue")[i // 3 % 2],
+        "score": float(rng.uniform(40, 100)) if i % 2 else float(rng.lognormal(10, 1)),
+        "timestamp": (pd.Timestamp("2026-01-01") + pd.Timedelta(hours=int(hour))).isoformat(),
+    } for i, hour in enumerate(hours)]
+
+    loaded, baseline = pee.load_dtri_history(events), baseline_load_dtri_history(events)
+    assert loaded['score'].dtype == np.float64
+    for vertical in ("sales", "service", "parts", "global"):
+        assert pee.calc_elasticity(loaded, vertical) == pee.calc_elasticity(baseline, vertical)
+
+
+# ---------------- Parallel verticals ----------------
+def vertical_events(*verticals):
+    return [{"vertical": v, "metric": "DTRI", "score": 50.0, "timestamp": "2026-01-01T00:00:00"} for v in verticals]
+
+
+def test_parallel_run_terminates_timed_out_vertical(monkeypatch, tmp_path):
+    def run(events, vertical):
+        if vertical == "slow":
+            (tmp_path / "slow.pid").write_text(str(pee.os.getpid()))
+            pee.time.sleep(60)
+        return {"vertical": vertical, "rows": len(events)}
+
+    monkeypatch.setattr(pee, "run_predictive_elasticity", run)
+    started = pee.time.monotonic()
+    results = pee.run_predictive_elasticity_all(vertical_events("a", "slow", "b", "b"), max_workers=2,
+                                                timeout_seconds=1)
+    assert pee.time.monotonic() - started < 15
+    assert results["a"] == {"vertical": "a", "rows": 1}
+    assert results["b"] == {"vertical": "b", "rows": 2}
+    assert results["slow"]["error"] == "Timed out after 1s"
+    with pytest.raises(ProcessLookupError):
+        pee.os.kill(int((tmp_path / "slow.pid").read_text()), 0)
+
+
+def test_parallel_run_reports_crashed_worker(monkeypatch):
+    def run(events, vertical):
+        if vertical == "crash":
+            pee.os._exit(3)
+        raise ValueError("bad data")
+
+    monkeypatch.setattr(pee, "run_predictive_elasticity", run)
+    results = pee.run_predictive_elasticity_all(vertical_events("crash", "raises"), max_workers=2, timeout_seconds=30)
+    assert results["crash"]["error"] == "Worker exited with code 3"
+    assert results["raises"]["error"] == "bad data"
+
+
+def test_parallel_workers_do_not_reuse_the_parents_writer(monkeypatch):
+    class ParentWriter:
+        def flush(self):
+            return 0
+
+    monkeypatch.setattr(pee, "_result_writer", ParentWriter())
+    monkeypatch.setattr(pee, "run_predictive_elasticity",
+                        lambda events, vertical: {"inherited_writer": pee._result_writer is not None})
+    results = pee.run_predictive_elasticity_all(vertical_events("a"), timeout_seconds=30)
+    assert results["a"] == {"inherited_writer": False}
+
+
+# ---------------- Prophet registry ----------------
+class RecordingProphet:
+    """Stand-in for prophet.Prophet that fits a straight line and records fit calls"""
+
+    fits = []
+
+    def __init__(self, **kwargs):
+        self.params = {}
+
+    def fit(self, df, init=None):
+        x = (df["ds"] - df["ds"].min()).dt.days.to_numpy(dtype=float)
+        slope, intercept = np.polyfit(x, df["y"].to_numpy(dtype=float), 1)
+        self.start, self.last = df["ds"].min(), df["ds"].max()
+        self.params = {"k": [[slope]], "m": [[intercept]], "sigma_obs": [[1.0]], "delta": [[0.0]], "beta": [[0.0]]}
+        RecordingProphet.fits.append({"rows": len(df), "init": init})
+        return self
+
+    def make_future_dataframe(self, periods):
+        return pd.DataFrame({"ds": pd.date_range(self.start, self.last + pd.Timedelta(days=periods), freq="D")})
+
+    def predict(self, future):
+        x = (future["ds"] - self.start).dt.days.to_numpy(dtype=float)
+        yhat = self.params["m"][0][0] + self.params["k"][0][0] * x
+        return future.assign(yhat=yhat, yhat_lower=yhat - 1, yhat_upper=yhat + 1)
+
+
+@pytest.fixture
+def prophet_registry(monkeypatch, tmp_path):
+    RecordingProphet.fits = []
+    models = {}
+
+    def to_json(model):
+        models[id(model)] = model
+        return str(id(model))
+
+    monkeypatch.setattr(pee, "PROPHET_AVAILABLE", True)
+    monkeypatch.setattr(pee, "Prophet", RecordingProphet, raising=False)
+    monkeypatch.setattr(pee, "model_to_json", to_json, raising=False)
+    monkeypatch.setattr(pee, "model_from_json", lambda key: models[int(key)], raising=False)
+    registry = pee.ProphetModelRegistry(tmp_path)
+    monkeypatch.setattr(pee, "_prophet_registry", registry)
+    return registry
+
+
+def daily_history(days, start="2026-01-01"):
+    return pd.DataFrame({
+        "vertical": "sales",
+        "metric": "DTRI",
+        "score": 50.0 + 0.5 * np.arange(days),
+        "timestamp": pd.date_range(start, periods=days, freq="D"),
+    })
+
+
+def test_prophet_registry_classifies_history():
+    hashes = np.arange(10, dtype=np.uint64)
+    entry = {"n_rows": 8, "fingerprint": pee._rows_fingerprint(hashes[:8])}
+    assert pee.ProphetModelRegistry.match(None, hashes) == "new"
+    assert pee.ProphetModelRegistry.match(entry, hashes[:8]) == "unchanged"
+    assert pee.ProphetModelRegistry.match(entry, hashes) == "appended"
+    assert pee.ProphetModelRegistry.match(entry, hashes[:7]) == "new"
+    rewritten = hashes.copy()
+    rewritten[3] = 99
+    assert pee.ProphetModelRegistry.match(entry, rewritten) == "new"
+
+
+def test_prophet_forecast_serves_cache_for_unchanged_history(prophet_registry):
+    history = daily_history(30)
+    first = pee.prophet_forecast(history, horizon_days=7)
+    second = pee.prophet_forecast(history, horizon_days=7)
+    assert len(RecordingProphet.fits) == 1
+    pd.testing.assert_frame_equal(first.reset_index(drop=True), second.reset_index(drop=True), check_dtype=False)
+
+    # A different horizon can't reuse the cached forecast
+    pee.prophet_forecast(history, horizon_days=14)
+    assert len(RecordingProphet.fits) == 2
+
+
+def test_prophet_forecast_warm_starts_appended_history(prophet_registry):
+    pee.prophet_forecast(daily_history(30), horizon_days=7)
+    forecast = pee.prophet_forecast(daily_history(35), horizon_days=7)
+    assert [fit["init"] is not None for fit in RecordingProphet.fits] == [False, True]
+    assert RecordingProphet.fits[1]["init"]["k"] == pytest.approx(0.5)
+    assert forecast["ds"].min() == pd.Timestamp("2026-02-05")
+
+
+def test_prophet_forecast_refits_rewritten_history(prophet_registry):
+    pee.prophet_forecast(daily_history(30), horizon_days=7)
+    rewritten = daily_history(30)
+    rewritten.loc[3, "score"] = 0.0
+    pee.prophet_forecast(rewritten, horizon_days=7)
+    assert [fit["init"] is None for fit in RecordingProphet.fits] == [True, True]
+
+
+# ---------------- Batched OLS ----------------
+def test_batch_trend_forecast_matches_per_series_polyfit():
+    rng = np.random.default_rng(1)
+    frames = []
+    for i, (slope, intercept) in enumerate([(0.5, 10.0), (-1.25, 80.0), (0.0, 42.0)]):
+        days = np.sort(rng.choice(200, size=30, replace=False))
+        frames.append(pd.DataFrame({
+            "dealer_id": f"d{i}",
+            "timestamp": pd.Timestamp("2026-01-01") + pd.to_timedelta(days, unit="D"),
+            "score": intercept + slope * days + rng.normal(0, 2, size=days.size),
+        }))
+    df = pd.concat(frames, ignore_index=True)
+    horizon = 5
+
+    out = pee.batch_trend_forecast(df, series_cols=["dealer_id"], horizon_days=horizon)
+    assert len(out) == 3 * horizon
+
+    for dealer, group in df.groupby("dealer_id"):
+        x = (group["timestamp"] - group["timestamp"].min()).dt.days.to_numpy(dtype=float)
+        slope, intercept = np.polyfit(x, group["score"].to_numpy(), 1)
+        x_future = x.max() + np.arange(1, horizon + 1)
+        forecast = out[out["dealer_id"] == dealer]
+        np.testing.assert_allclose(forecast["yhat"].to_numpy(), intercept + slope * x_future, rtol=1e-9)
+        assert (forecast["yhat_lower"] < forecast["yhat"]).all()
+        assert (forecast["yhat_upper"] > forecast["yhat"]).all()
+        expected_dates = group["timestamp"].max() + pd.to_timedelta(np.arange(1, horizon + 1), unit="D")
+        assert list(forecast["ds"]) == list(expected_dates)
+
+
+def test_batch_trend_forecast_skips_single_point_series():
+    df = pd.DataFrame({
+        "dealer_id": ["a", "a", "b"],
+        "timestamp": pd.to_datetime(["2026-01-01", "2026-01-02", "2026-01-01"]),
+        "score": [1.0, 2.0, 3.0],
+    })
+    out = pee.batch_trend_forecast(df, series_cols=["dealer_id"], horizon_days=3)
+    assert set(out["dealer_id"]) == {"a"}
+
+
+# ---------------- XGBoost continued boosting ----------------
+def xgb_events(start, n, vertical="sales", seed=0):
+    """Every XGBoost feature plus a Revenue that depends on them, one row per hour"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        ts = pd.Timestamp(start) + pd.Timedelta(hours=i)
+        values = {m: float(rng.uniform(40, 100)) for m in pee.XGB_FEATURES}
+        values[pee.XGB_TARGET] = 10 * values["DTRI"] + 5 * values["QAI"] + float(rng.normal(0, 5))
+        rows.extend({"vertical": vertical, "metric": m, "score": s, "timestamp": ts} for m, s in values.items())
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def xgb_registry(monkeypatch, tmp_path):
+    if not pee.XGBOOST_AVAILABLE:
+        pytest.skip("xgboost is not installed")
+    monkeypatch.setattr(pee, "_feature_store", pee.FeatureStore(tmp_path / "features"))
+    registry = pee.XGBoostModelRegistry(tmp_path / "models")
+    monkeypatch.setattr(pee, "_xgboost_registry", registry)
+    return registry
+
+
+def n_trees(registry, vertical="sales"):
+    return registry.get(vertical)["model"].get_booster().num_boosted_rounds()
+
+
+def test_xgboost_continues_boosting_on_a_small_append(xgb_registry):
+    pee.xgboost_predict(xgb_events("2026-01-01", 200), "sales")
+    full_fit_at = xgb_registry.get("sales")["full_fit_at"]
+    assert n_trees(xgb_registry) == 300
+
+    pee.xgboost_predict(xgb_events("2026-01-10", 3, seed=1), "sales")
+    entry = xgb_registry.get("sales")
+    assert n_trees(xgb_registry) == 300 + pee.PEE_XGB_INCREMENTAL_ROUNDS
+    assert entry["full_fit_at"] == full_fit_at
+    assert entry["watermark"] == pd.Timestamp("2026-01-10 02:00").isoformat()
+
+    # Nothing past the watermark: the saved booster is reused as-is
+    model = entry["model"]
+    pee.xgboost_predict(xgb_events("2026-01-10", 3, seed=1), "sales")
+    assert xgb_registry.get("sales")["model"] is model
+
+
+def test_xgboost_refits_when_the_continuation_regresses(xgb_registry, monkeypatch):
+    pee.xgboost_predict(xgb_events("2026-01-01", 200), "sales")
+    # No continuation can beat the saved booster by more than 100% on the holdout
+    monkeypatch.setattr(pee, "PEE_XGB_HOLDOUT_TOLERANCE", -1.0)
+    result = pee.xgboost_predict(xgb_events("2026-01-10", 3, seed=1), "sales")
+    assert n_trees(xgb_registry) == 300
+    assert result["model_score"] == xgb_registry.get("sales")["model_score"]
+
+
+def test_xgboost_refits_past_the_tree_cap(xgb_registry, monkeypatch):
+    monkeypatch.setattr(pee, "PEE_XGB_MAX_TREES", 400)
+    pee.xgboost_predict(xgb_events("2026-01-01", 200), "sales")
+    pee.xgboost_predict(xgb_events("2026-01-10", 3, seed=1), "sales")
+    pee.xgboost_predict(xgb_events("2026-01-11", 3, seed=2), "sales")
+    assert n_trees(xgb_registry) == 400
+    pee.xgboost_predict(xgb_events("2026-01-12", 3, seed=3), "sales")
+    assert n_trees(xgb_registry) == 300
+
+
+def test_xgboost_refits_on_schedule(xgb_registry):
+    pee.xgboost_predict(xgb_events("2026-01-01", 200), "sales")
+    stale = (pee.datetime.utcnow() - pee.timedelta(days=pee.PEE_XGB_REFIT_DAYS + 1)).isoformat()
+    xgb_registry.get("sales")["full_fit_at"] = stale
+    pee.xgboost_predict(xgb_events("2026-01-10", 3, seed=1), "sales")
+    entry = xgb_registry.get("sales")
+    assert n_trees(xgb_registry) == 300
+    assert entry["full_fit_at"] > stale
+
+
+# ---------------- Feature store ----------------
+def wide_events(start, metrics_by_hour):
+    rows = []
+    for hour, metrics in metrics_by_hour.items():
+        for metric, score in metrics.items():
+            rows.append({"metric": metric, "score": score,
+                         "timestamp": pd.Timestamp(start) + pd.Timedelta(hours=hour)})
+    return pd.DataFrame(rows)
+
+
+def test_feature_store_append_forward_fills_and_tracks_completeness(tmp_path):
+    store = pee.FeatureStore(root=tmp_path, metrics=["DTRI", "Revenue"])
+    added = store.append("sales", wide_events("2026-01-01", {
+        0: {"DTRI": 50.0},
+        1: {"Revenue": 1000.0},
+        2: {"DTRI": 55.0},
+    }))
+    assert added == 3
+    meta = store.meta("sales")
+    assert meta["n_rows"] == 3
+    assert meta["first_complete"] == 1
+    assert meta["last_ts"] == pd.Timestamp("2026-01-01 02:00").value
+
+    timestamps, values = store.view("sales")
+    np.testing.assert_array_equal(values, [[50.0, 1000.0], [55.0, 1000.0]])
+    assert list(timestamps.view("datetime64[ns]")) == list(pd.to_datetime(["2026-01-01 01:00", "2026-01-01 02:00"]))
+
+
+def test_feature_store_drops_events_at_or_before_high_water(tmp_path, caplog):
+    store = pee.FeatureStore(root=tmp_path, metrics=["DTRI", "Revenue"])
+    store.append("sales", wide_events("2026-01-01", {0: {"DTRI": 50.0, "Revenue": 10.0}, 5: {"DTRI": 60.0}}))
+
+    late = wide_events("2026-01-01", {3: {"DTRI": 1.0}, 5: {"Revenue": 2.0}})
+    assert store.append("sales", late) == 0
+    assert "dropped 2 late events" in caplog.text
+
+    added = store.append("sales", pd.concat([late, wide_events("2026-01-01", {6: {"Revenue": 20.0}})]))
+    assert added == 1
+    _, values = store.view("sales")
+    # The new row carries DTRI forward from the last stored row
+    np.testing.assert_array_equal(values[-1], [60.0, 20.0])
+
+
+def test_feature_store_grows_and_reopens(tmp_path):
+    store = pee.FeatureStore(root=tmp_path, metrics=["DTRI", "Revenue"])
+    hours = {h: {"DTRI": float(h), "Revenue": float(2 * h)} for h in range(1500)}
+    assert store.append("sales", wide_events("2026-01-01", hours)) == 1500
+    assert store.meta("sales")["capacity"] >= 1500
+
+    reopened = pee.FeatureStore(root=tmp_path, metrics=["DTRI", "Revenue"])
+    X, y = reopened.features("sales", ["DTRI"], "Revenue")
+    assert len(X) == 1500
+    np.testing.assert_array_equal(y.to_numpy(), 2 * X["DTRI"].to_numpy())
+    assert reopened.missing("sales", ["DTRI", "Revenue"]) == []
+    assert reopened.missing("service", ["DTRI"]) == ["DTRI"]
+
+
+def test_xgboost_predict_only_stores_its_own_vertical(monkeypatch, tmp_path):
+    store = pee.FeatureStore(root=tmp_path)
+    monkeypatch.setattr(pee, "XGBOOST_AVAILABLE", True)
+    monkeypatch.setattr(pee, "_feature_store", store)
+    monkeypatch.setattr(pee, "simple_revenue_prediction", lambda df: None)
+    events = pd.concat([
+        wide_events("2026-01-01", {0: {"DTRI": 50.0}}).assign(vertical="sales"),
+        wide_events("2026-01-01", {1: {"DTRI": 70.0}}).assign(vertical="service"),
+    ])
+    pee.xgboost_predict(events, "sales")
+    assert store.meta("sales")["n_rows"] == 1
+    assert store.meta("sales")["last_ts"] == pd.Timestamp("2026-01-01").value
+
+
+
+# ---------------- Result writer ----------------
+class RecordingSink:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.writes = []
+
+    def write(self, table, rows):
+        if self.fail:
+            raise RuntimeError("remote unavailable")
+        self.writes.append((table, rows))
+
+
+def make_writer(sink, outbox_path, batch_size=2):
+    # A long flush interval keeps the background thread out of the way
+    return pee.ResultWriter(sink, outbox_path=outbox_path, batch_size=batch_size, flush_seconds=3600)
+
+
+def test_result_writer_drains_outbox_in_batches(tmp_path):
+    sink = RecordingSink()
+    writer = make_writer(sink, tmp_path / "outbox.sqlite3")
+    try:
+        writer.enqueue("elasticity", [{"i": i} for i in range(3)])
+        writer.enqueue("forecasts", [{"j": 0}])
+        assert writer.pending() == 4
+
+        # Filling a batch wakes the background drain, so count what reached the sink
+        writer.flush()
+        assert writer.pending() == 0
+        assert all(len(rows) <= 2 for _, rows in sink.writes)
+        assert [row["i"] for table, rows in sink.writes if table == "elasticity" for row in rows] == [0, 1, 2]
+        assert [row["j"] for table, rows in sink.writes if table == "forecasts" for row in rows] == [0]
+    finally:
+        writer.close()
+
+
+def test_result_writer_keeps_rows_when_sink_fails(tmp_path):
+    sink = RecordingSink(fail=True)
+    writer = make_writer(sink, tmp_path / "outbox.sqlite3")
+    try:
+        writer.enqueue("elasticity", [{"i": 0}])
+        assert writer.flush() == 0
+        assert writer.pending() == 1
+
+        sink.fail = False
+        assert writer.flush() == 1
+        assert writer.pending() == 0
+    finally:
+        writer.close()
+
+
+def test_result_writer_claims_prevent_double_writes(tmp_path):
+    outbox = tmp_path / "outbox.sqlite3"
+    first_sink, second_sink = RecordingSink(), RecordingSink()
+    first, second = make_writer(first_sink, outbox), make_writer(second_sink, outbox)
+    try:
+        first.enqueue("elasticity", [{"i": 0}, {"i": 1}])
+        # A live claim held by another writer is skipped
+        with first._lock:
+            first._conn.execute("UPDATE outbox SET claimed_by = 'other', claimed_at = ?", (pee.time.time(),))
+            first._conn.commit()
+        assert second.flush() == 0
+        assert second_sink.writes == []
+
+        # An expired claim is taken over
+        with first._lock:
+            first._conn.execute("UPDATE outbox SET claimed_at = ?",
+                                (pee.time.time() - pee.PEE_OUTBOX_CLAIM_SECONDS - 1,))
+            first._conn.commit()
+        assert second.flush() == 2
+        assert first.flush() == 0
+        assert first_sink.writes == []
+    finally:
+        first.close()
+        second.close()
+
+
+# ---------------- Result store ----------------
+@pytest.fixture
+def result_store(tmp_path):
+    if not pee.PYARROW_AVAILABLE:
+        pytest.skip("pyarrow is not installed")
+    return pee.ResultStore(tmp_path)
+
+
+def forecast_frame(start, days, yhat=1.0):
+    ds = pd.date_range(start, periods=days, freq="D")
+    return pd.DataFrame({"ds": ds, "yhat": yhat, "yhat_lower": yhat - 1, "yhat_upper": yhat + 1})
+
+
+def test_result_store_round_trip(result_store):
+    xgboost_out = {"predicted_revenue": 1234.5, "model_score": 0.9, "importance": {"DTRI": 1.0}}
+    result_store.write("sales", 0.42, forecast_frame("2026-03-01", 3), xgboost_out,
+                       run_ts=pd.Timestamp("2026-02-28 12:00"))
+
+    assert result_store.latest_elasticity() == {
+        "sales": {"elasticity": 0.42, "timestamp": "2026-02-28T12:00:00+00:00"}
+    }
+    forecast = result_store.forecasts("sales")
+    assert list(forecast["ds"]) == list(pd.date_range("2026-03-01", periods=3, freq="D", tz="UTC"))
+    assert forecast["yhat"].dtype == np.float64
+    history = result_store.prediction_history("sales")
+    assert history["predicted_revenue"].tolist() == [1234.5]
+    assert pee.json.loads(history["feature_weights"].iloc[0]) == {"DTRI": 1.0}
+
+
+def test_result_store_partitions_tz_aware_runs_by_utc_date(result_store, tmp_path):
+    # 20:00 in New York is 01:00 UTC the next day
+    result_store.write("sales", 0.1, forecast_frame("2026-03-01", 1), None,
+                       run_ts=pd.Timestamp("2026-02-28 20:00", tz="America/New_York"))
+    assert (tmp_path / "elasticity" / "vertical=sales" / "date=2026-03-01").is_dir()
+    assert result_store.latest_elasticity()["sales"]["timestamp"] == "2026-03-01T01:00:00+00:00"
+
+
+def test_result_store_prunes_partitions(result_store, monkeypatch):
+    for day, value in [("2026-01-01", 0.1), ("2026-01-02", 0.2), ("2026-01-03", 0.3)]:
+        result_store.write("sales", value, forecast_frame(day, 1, yhat=value), None, run_ts=pd.Timestamp(day))
+    result_store.write("service", 0.9, forecast_frame("2026-01-03", 1), None, run_ts=pd.Timestamp("2026-01-03"))
+
+    scans = []
+    scan = result_store._scan
+    monkeypatch.setattr(result_store, "_scan", lambda dataset, columns, **kwargs: scans.append(kwargs) or
+                        scan(dataset, columns, **kwargs))
+    assert result_store.latest_elasticity("sales") == {
+        "sales": {"elasticity": 0.3, "timestamp": "2026-01-03T00:00:00+00:00"}
+    }
+    assert scans == [{"vertical": "sales", "start_date": "2026-01-03", "end_date": "2026-01-03"}]
+
+    df = result_store._scan("elasticity", ["elasticity"], vertical="sales", start_date="2026-01-02")
+    assert sorted(df["elasticity"]) == [0.2, 0.3]
+    assert set(df["vertical"]) == {"sales"}
+
+    forecast = result_store.forecasts("sales", start="2026-01-02", latest_run_only=False)
+    assert forecast["yhat"].tolist() == [0.2, 0.3]
+
+
+# ---------------- NDJSON streaming ----------------
+@pytest.fixture
+def streamed(monkeypatch):
+    """Record each frame handed to the analysis, and how many lines had been read by then"""
+    calls = []
+    state = {"read": 0}
+
+    def run(df, vertical):
+        calls.append({"vertical": vertical, "df": df, "read": state["read"]})
+        return {"vertical": vertical, "rows": len(df)}
+
+    def lines(events):
+        for event in events:
+            state["read"] += 1
+            yield pee.json.dumps(event)
+
+    monkeypatch.setattr(pee, "run_predictive_elasticity_frame", run)
+    return calls, lines
+
+
+def ndjson_events(vertical, n, start=0):
+    return [{"vertical": vertical, "metric": "DTRI" if i % 2 else "Revenue", "score": float(i),
+             "timestamp": f"2026-01-01T{start + i:02d}:00:00Z"} for i in range(n)]
+
+
+def test_stream_grouped_completes_each_vertical_when_it_changes(streamed):
+    calls, lines = streamed
+    events = ndjson_events("sales", 4) + ndjson_events("service", 3)
+    results = list(pee.stream_predictive_elasticity(lines(events), chunk_size=2, grouped=True))
+    assert results == [{"vertical": "sales", "rows": 4}, {"vertical": "service", "rows": 3}]
+    # sales is analysed on the first service line, before the rest of the stream is read
+    assert calls[0]["read"] == 5
+    df = calls[0]["df"]
+    assert df["score"].tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert df["metric"].tolist() == ["Revenue", "DTRI", "Revenue", "DTRI"]
+    assert df["timestamp"].iloc[-1] == pd.Timestamp("2026-01-01 03:00")
+
+
+def test_stream_end_marker_completes_interleaved_vertical(streamed):
+    calls, lines = streamed
+    sales, service = ndjson_events("sales", 3), ndjson_events("service", 3)
+    events = [sales[0], service[0], sales[1], {"vertical": "sales", "end": True},
+              service[1], sales[2], service[2]]
+    results = list(pee.stream_predictive_elasticity(lines(events), chunk_size=1))
+    assert results == [{"vertical": "sales", "rows": 2}, {"vertical": "service", "rows": 3}]
+    assert calls[0]["read"] == 4
+
+
+def test_stream_ungrouped_buffers_until_end_of_stream(streamed):
+    calls, lines = streamed
+    events = ndjson_events("sales", 2) + ndjson_events("service", 2) + ndjson_events("sales", 2, start=2)
+    results = list(pee.stream_predictive_elasticity(lines(events), chunk_size=100))
+    assert results == [{"vertical": "sales", "rows": 4}, {"vertical": "service", "rows": 2}]
+    assert [call["read"] for call in calls] == [6, 6]
+
+
+# ---------------- Rolling elasticity ----------------
+@pytest.mark.parametrize("window", [5, "3D", None])
+def test_rolling_elasticity_matches_windowed_polyfit(window):
+    rng = np.random.default_rng(3)
+    rows = []
+    for vertical, beta in (("sales", 0.8), ("service", -0.4)):
+        days = np.sort(rng.choice(60, size=25, replace=False))
+        dtri = rng.uniform(40, 100, size=days.size)
+        revenue = 1000 * dtri ** beta * rng.lognormal(0, 0.05, size=days.size)
+        for day, d, r in zip(days, dtri, revenue):
+            ts = pd.Timestamp("2026-01-01") + pd.Timedelta(days=int(day))
+            rows.append({"vertical": vertical, "metric": "DTRI", "score": d, "timestamp": ts})
+            rows.append({"vertical": vertical, "metric": "Revenue", "score": r, "timestamp": ts})
+    df = pd.DataFrame(rows)
+
+    results = pee.rolling_elasticity(df, window=window)
+    assert set(results) == {"sales", "service"}
+    for vertical, out in results.items():
+        points = df[df["vertical"] == vertical].pivot(index="timestamp", columns="metric", values="score")
+        assert len(out) > 0
+        for row in out.itertuples():
+            in_window = points.loc[row.window_start:row.window_end]
+            assert len(in_window) == row.n_points >= 3
+            slope, _ = np.polyfit(np.log(in_window["DTRI"]), np.log(in_window["Revenue"]), 1)
+            assert row.elasticity == pytest.approx(slope, rel=1e-9, abs=1e-12)
+
+
+# ---------------- MinT reconciliation ----------------
+def test_mint_reconcile_matches_dense_gls():
+    rng = np.random.default_rng(2)
+    n_leaves, horizon = 6, 4
+    rows = [np.arange(n_leaves), np.arange(0, 3), np.arange(3, 6)]
+    weights = [np.full(len(r), 1.0) for r in rows]
+    s_agg = pee._summing_matrix(rows, weights, n_leaves)
+    y_leaf = rng.normal(50, 5, size=(n_leaves, horizon))
+    y_agg = rng.normal(150, 10, size=(len(rows), horizon))
+    w_leaf = rng.uniform(0.5, 3.0, size=n_leaves)
+    w_agg = rng.uniform(0.5, 3.0, size=len(rows))
+
+    reconciled = pee._mint_reconcile(s_agg, y_agg, w_agg, y_leaf, w_leaf)
+
+    s_dense = np.asarray(s_agg.toarray() if hasattr(s_agg, "toarray") else s_agg)
+    S = np.vstack([s_dense, np.eye(n_leaves)])
+    W_inv = np.diag(1.0 / np.concatenate([w_agg, w_leaf]))
+    y = np.vstack([y_agg, y_leaf])
+    expected = np.linalg.solve(S.T @ W_inv @ S, S.T @ W_inv @ y)
+    np.testing.assert_allclose(reconciled, expected, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("method", ["bottom_up", "mint"])
+def test_hierarchical_forecast_is_coherent(method):
+    rng = np.random.default_rng(3)
+    rows = []
+    for vertical in ("sales", "service"):
+        for dealer in range(3):
+            for day in range(40):
+                rows.append({
+                    "vertical": vertical,
+                    "dealer_id": f"{vertical}-{dealer}",
+                    "metric": "Revenue",
+                    "score": 100 + dealer * 10 + day * 0.5 + rng.normal(0, 3),
+                    "timestamp": pd.Timestamp("2026-01-01") + pd.Timedelta(days=day),
+                })
+    out = pee.hierarchical_forecast(pd.DataFrame(rows), metric="Revenue", horizon_days=7, method=method)
+
+    leaves = out[out["level"] == "leaf"]
+    global_yhat = out[out["level"] == "global"]["yhat"].to_numpy()
+    np.testing.assert_allclose(global_yhat, leaves.groupby("ds")["yhat"].sum().to_numpy())
+    for vertical in ("sales", "service"):
+        vertical_yhat = out[(out["level"] == "vertical") & (out["vertical"] == vertical)]["yhat"].to_numpy()
+        leaf_sum = leaves[leaves["vertical"] == vertical].groupby("ds")["yhat"].sum().to_numpy()
+        np.testing.assert_allclose(vertical_yhat, leaf_sum)
+
+
+def test_hierarchical_forecast_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        pee.hierarchical_forecast(make_events(), method="top_down")
+
+
+# ---------------- Scenario simulation ----------------
+def test_simulate_scenarios_scores_grid_with_cached_model(xgb_registry):
+    history = xgb_events("2026-01-01", 200)
+    pee.xgboost_predict(history, "sales")
+    model = xgb_registry.get("sales")["model"]
+
+    out = pee.simulate_scenarios("sales", {"DTRI": [0, 5, 10], "EEAT": [0, 3]}, elasticity=0.5)
+    assert len(out) == 6
+    assert xgb_registry.get("sales")["model"] is model
+    assert n_trees(xgb_registry) == 300
+
+    _, values = pee.feature_store().view("sales")
+    latest = values[-1]
+    base = latest[[pee.feature_store().metrics.index(f) for f in pee.XGB_FEATURES]]
+    deltas = out[[f"delta_{f}" for f in pee.XGB_FEATURES]].to_numpy()
+    rows = pd.DataFrame(np.vstack([base, base + deltas]), columns=pee.XGB_FEATURES)
+    expected = model.predict(rows)
+    np.testing.assert_allclose(out["predicted_revenue"], expected[1:], rtol=1e-6)
+    np.testing.assert_allclose(out["revenue_delta"], expected[1:] - expected[0], rtol=1e-5, atol=1e-3)
+    assert out.loc[(out["delta_DTRI"] == 0) & (out["delta_EEAT"] == 0), "revenue_delta"].tolist() == [0.0]
+
+    revenue = latest[pee.feature_store().metrics.index(pee.XGB_TARGET)]
+    np.testing.assert_allclose(out["elasticity_revenue_delta"], revenue * 0.5 * out["delta_DTRI"] / base[0])
+
+
+def test_simulate_scenarios_without_a_model_returns_elasticity_only(xgb_registry):
+    other = xgb_events("2026-01-01", 20, vertical="service", seed=5)
+    history = pd.concat([xgb_events("2026-01-01", 5), other])
+    xgb_registry.get = lambda vertical: None
+    out = pee.simulate_scenarios("sales", [{"DTRI": 10}, {"QAI": -2}], df=history, elasticity=1.0)
+    assert out["predicted_revenue"].isna().all()
+    assert out["elasticity_revenue_delta"].iloc[1] == 0.0
+    # Only the requested vertical reaches its feature store
+    assert pee.feature_store().meta("sales")["n_rows"] == 5
+
+
+def test_simulate_scenarios_requires_history(xgb_registry):
+    with pytest.raises(ValueError):
+        pee.simulate_scenarios("parts", {"DTRI": [1]})
+
+
+# ---------------- Change-aware scheduler ----------------
+@pytest.fixture
+def scheduler_runs(monkeypatch, tmp_path):
+    runs, dropped = [], []
+    monkeypatch.setattr(pee, "run_predictive_elasticity_frame",
+                        lambda df, vertical: runs.append((vertical, len(df))) or {"vertical": vertical})
+    monkeypatch.setattr(pee, "_feature_store", pee.FeatureStore(tmp_path / "features"))
+    monkeypatch.setattr(pee, "_xgboost_registry", pee.XGBoostModelRegistry(tmp_path / "models"))
+    monkeypatch.setattr(pee.FeatureStore, "drop", lambda self, vertical: dropped.append(vertical))
+    return runs, dropped
+
+
+def event_records(df):
+    return [dict(row, timestamp=row["timestamp"].isoformat()) for row in df.to_dict("records")]
+
+
+def test_scheduler_second_tick_skips_clean_verticals(scheduler_runs, tmp_path):
+    runs, dropped = scheduler_runs
+    events = event_records(make_events(("sales", "service", "parts"), n=10))
+    scheduler = pee.ChangeAwareScheduler(lambda: events, state_path=tmp_path / "state.json")
+
+    first = scheduler.tick()
+    assert sorted(first["recomputed"]) == ["parts", "sales", "service"]
+
+    second = scheduler.tick()
+    assert second["recomputed"] == [] and second["skipped"] == 3
+    assert len(runs) == 3
+
+    # State persists across scheduler instances
+    events.append({"vertical": "sales", "metric": "DTRI", "score": 70.0, "timestamp": "2027-01-01T00:00:00"})
+    restarted = pee.ChangeAwareScheduler(lambda: events, state_path=tmp_path / "state.json")
+    third = restarted.tick()
+    assert third["recomputed"] == ["sales"] and third["skipped"] == 2
+    assert third["rewritten"] == [] and dropped == []
+    assert runs[-1] == ("sales", 21)
+
+
+def test_scheduler_rebuilds_incremental_state_for_rewritten_history(scheduler_runs, tmp_path):
+    runs, dropped = scheduler_runs
+    events = event_records(make_events(("sales", "service"), n=10))
+    scheduler = pee.ChangeAwareScheduler(lambda: events, state_path=tmp_path / "state.json")
+    scheduler.tick()
+
+    # A corrected score before the high-water mark is a rewrite, not an append
+    index = next(i for i, e in enumerate(events) if e["vertical"] == "service")
+    events[index] = dict(events[index], score=events[index]["score"] + 1)
+    summary = scheduler.tick()
+    assert summary["recomputed"] == ["service"]
+    assert summary["rewritten"] == ["service"]
+    assert dropped == ["service"]
+    assert scheduler.state["metrics"]["verticals_rewritten"] == 1